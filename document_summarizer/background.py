@@ -0,0 +1,46 @@
+"""
+Background tasks - work that shouldn't hold up a response
+Input: a function and its arguments
+Output: concurrent.futures.Future
+Dependencies: Django settings and database connections
+
+Saving summaries (text files, rendered PDFs) runs here once a streamed
+summary has been sent, so the client never waits on storage or reportlab.
+Tasks run in a small thread pool shared by the process; a task keeps running
+if the client that triggered it disconnects.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, getattr(settings, 'SUMMARY_BACKGROUND_WORKERS', 2)),
+                thread_name_prefix='summary-background'
+            )
+    return _executor
+
+
+def run_in_background(function, *args, **kwargs):
+    """Run function(*args, **kwargs) in the background pool and return its Future"""
+    return _get_executor().submit(_run_task, function, args, kwargs)
+
+
+def _run_task(function, args, kwargs):
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        print(f"Background task {function.__name__} failed: {e}")
+        raise
+    finally:
+        # Pool threads outlive requests, so release their database connection like a request would
+        close_old_connections()
@@ -45,23 +45,24 @@ def create_summary_pdf(summary_data):
     buffer.seek(0)
     return buffer.getvalue()
 
-def create_download_link(summary_data, request):
-    """Create downloadable PDF and return metadata"""
+def summary_owner(request):
+    """User a summary is saved for (anonymous requests use the shared test account)"""
+    if request.user.is_authenticated:
+        return request.user
+    from accounts.models import User
+    user, created = User.objects.get_or_create(
+        email='test@example.com',
+        defaults={'password': 'testpass123'}
+    )
+    return user
+
+def save_summary_pdf(summary_data, user, base_url):
+    """Render the summary PDF, save it as an UploadedDocument and return its metadata"""
     pdf_content = create_summary_pdf(summary_data)
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f'summary_{timestamp}.pdf'
     
-    # Get user
-    if request.user.is_authenticated:
-        user = request.user
-    else:
-        from accounts.models import User
-        user, created = User.objects.get_or_create(
-            email='test@example.com',
-            defaults={'password': 'testpass123'}
-        )
-    
     # Save file
     from .models import UploadedDocument
     summary_doc = UploadedDocument(
@@ -73,14 +74,38 @@ def create_download_link(summary_data, request):
     summary_doc.file_path.save(filename, ContentFile(pdf_content))
     summary_doc.save()
     
-    # Generate URL
-    current_site = get_current_site(request)
-    base_url = f'http://{current_site.domain}'
-    download_url = f'{base_url}{summary_doc.file_path.url}'
-    
     return {
-        'download_url': download_url,
+        'download_url': f'{base_url}{summary_doc.file_path.url}',
         'filename': filename,
         'file_size': len(pdf_content),
         'document_id': summary_doc.id
-    }
\ No newline at end of file
+    }
+
+def save_summary_text(summary_text, user, base_url):
+    """Save the summary as a .txt UploadedDocument and return its metadata"""
+    from .models import UploadedDocument
+    content = summary_text.encode('utf-8')
+    uploaded_doc = UploadedDocument(
+        user=user,
+        file_name=f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+        file_type='txt',
+        file_size=len(content)
+    )
+    uploaded_doc.file_path.save(uploaded_doc.file_name, ContentFile(content))
+    uploaded_doc.save()
+    
+    return {
+        'download_url': f'{base_url}{uploaded_doc.file_path.url}',
+        'filename': uploaded_doc.file_name,
+        'file_size': uploaded_doc.file_size,
+        'document_id': uploaded_doc.id
+    }
+
+def site_base_url(request):
+    """Base URL for download links of the current site"""
+    current_site = get_current_site(request)
+    return f'http://{current_site.domain}'
+
+def create_download_link(summary_data, request):
+    """Create downloadable PDF and return metadata"""
+    return save_summary_pdf(summary_data, summary_owner(request), site_base_url(request))
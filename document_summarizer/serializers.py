@@ -69,6 +69,8 @@ class SummaryResponseSerializer(serializers.Serializer):
     truncated = serializers.BooleanField()
     tokens_used = serializers.IntegerField(allow_null=True)
     model = serializers.CharField()
+    chunks = serializers.IntegerField(help_text='Parts the document was summarized in (1 = single call)')
+    cache_hit = serializers.BooleanField(help_text='Summary reused from an identical earlier request')
     download_url = serializers.URLField()
     filename = serializers.CharField()
     file_size = serializers.IntegerField()
@@ -88,6 +90,10 @@ class ProcessDocumentSerializer(serializers.Serializer):
     legal_issues = serializers.BooleanField(default=True)
     holdings_and_rulings = serializers.BooleanField(default=True)
     recommendations = serializers.BooleanField(default=False)
+    stream = serializers.BooleanField(
+        default=False,
+        help_text='Send the summary as server-sent events (text/event-stream) while it is generated; saving happens afterwards in the background'
+    )
     
     def validate(self, data):
         action = data.get('action', 'process')
@@ -0,0 +1,231 @@
+"""
+Chunked (map-reduce) summarization for documents longer than one GPT call can take
+Input: document text, settings and the prompt for the final summary
+Output: summary text with usage metadata
+Dependencies: prompt_builder, gpt_client
+
+Short documents are summarized with a single call, as before. Longer ones are
+split on structural boundaries (headings, numbered clauses, paragraphs, lines,
+sentences) into chunks of at most SUMMARY_CHUNK_TOKENS, each chunk is condensed
+into notes concurrently (at most SUMMARY_MAX_PARALLEL calls at a time), notes
+that still don't fit one call are merged level by level, and the final call
+writes the summary in the requested format from the notes. Wall-clock time is
+one round of chunk calls, any merge rounds and the final call, however many
+chunks there are (up to the parallel limit).
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings as django_settings
+
+from .gpt_client import call_gpt_api, stream_gpt_api
+from .prompt_builder import SummaryPromptBuilder
+from ..text_extractor import CHARS_PER_TOKEN
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+# Output cap for chunk notes and merged notes; short outputs keep the calls fast
+NOTES_MAX_TOKENS = 600
+
+# Boundaries tried in order while a piece is over budget. Each match ends a
+# piece, so separators stay with the text they follow.
+SPLIT_BOUNDARIES = (
+    # Line break before a major heading: "ARTICLE 5", "Part II", "§ 3", "IV. REMEDIES"
+    re.compile(
+        r'\n(?=[ \t]*(?:(?:ARTICLE|Article|SECTION|Section|PART|Part|CHAPTER|Chapter|SCHEDULE|Schedule)\s+[\dIVXLC]'
+        r'|§|[IVXLC]+\.\s+[A-Z]))'
+    ),
+    re.compile(r'\n(?=[ \t]*\d+(?:\.\d+)*\.?\s+[A-Z])'),  # Numbered clauses: "12. Termination", "2.1 The Buyer"
+    re.compile(r'\n[ \t]*\n\s*'),  # Paragraphs
+    re.compile(r'\n'),  # Lines
+    re.compile(r'(?<=[.!?;:])\s+'),  # Sentences
+    re.compile(r'\s+'),  # Words
+)
+
+
+def estimate_tokens(text):
+    """Approximate token count (CHARS_PER_TOKEN characters per token)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_text(text, max_tokens):
+    """
+    Split text into chunks of at most max_tokens (estimated), in order.
+
+    Pieces between structural boundaries are packed greedily, so chunks end
+    on the coarsest boundary that keeps them within the budget.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return [chunk.strip() for chunk in _split(text, max_chars, 0) if chunk.strip()]
+
+
+def _split(text, max_chars, level):
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(SPLIT_BOUNDARIES):
+        # A single "word" longer than the budget
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    pieces = _cut(text, SPLIT_BOUNDARIES[level])
+    if len(pieces) == 1:
+        return _split(text, max_chars, level + 1)
+
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if len(piece) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_split(piece, max_chars, level + 1))
+        elif len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cut(text, boundary):
+    pieces = []
+    start = 0
+    for match in boundary.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _run_parallel(function, items, max_workers):
+    """Apply function to items with at most max_workers concurrent calls, keeping order."""
+    if len(items) == 1:
+        return [function(items[0])]
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        return list(executor.map(function, items))
+    finally:
+        # After a failure, don't start the calls still queued
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _config(name, default):
+    return getattr(django_settings, name, default)
+
+
+def summarize_text(text, settings, final_prompt=None, model=DEFAULT_MODEL):
+    """
+    Summarize a document of any length.
+
+    Args:
+        text (str): Document text
+        settings (dict): Summary settings (format, language, inclusions...), see SummaryPromptBuilder
+        final_prompt (callable): Builds the (instructions, document) pair for the final call from the
+            document text or the combined notes; defaults to SummaryPromptBuilder.build_prompt
+        model (str): OpenAI model
+
+    Returns:
+        dict: summary, model, tokens_used (None when not reported), chunks, merge_levels
+    """
+    usage = []
+    text, chunks, merge_levels = _condense(text, settings, model, usage)
+
+    instructions, document = (final_prompt or _default_final_prompt(settings))(text)
+    result = call_gpt_api(instructions, document, model=model)
+    usage.append(result.get('tokens_used'))
+
+    return {
+        'summary': result['summary'],
+        'model': model,
+        'tokens_used': sum(usage) if None not in usage else None,
+        'chunks': chunks,
+        'merge_levels': merge_levels,
+    }
+
+
+def stream_summary(text, settings, final_prompt=None, model=DEFAULT_MODEL, stats=None):
+    """
+    Like summarize_text, but yield the summary text as the final call generates it.
+
+    Chunk and merge calls (long documents only) still complete before the first
+    piece is yielded. chunks and merge_levels are put into stats (a dict) by then.
+    """
+    text, chunks, merge_levels = _condense(text, settings, model, [])
+    if stats is not None:
+        stats.update({'model': model, 'chunks': chunks, 'merge_levels': merge_levels})
+
+    instructions, document = (final_prompt or _default_final_prompt(settings))(text)
+    deltas = stream_gpt_api(instructions, document, model=model)
+    try:
+        yield from deltas
+    finally:
+        deltas.close()
+
+
+def _default_final_prompt(settings):
+    def final_prompt(document):
+        return SummaryPromptBuilder.build_prompt(document, settings), ""
+    return final_prompt
+
+
+def _condense(text, settings, model, usage):
+    """
+    Reduce text to what fits the final call: unchanged when short, else notes on its chunks.
+
+    Returns:
+        tuple: (text for the final call, number of chunks, merge levels)
+    """
+    single_call_tokens = _config('SUMMARY_SINGLE_CALL_TOKENS', 12000)
+    chunk_tokens = _config('SUMMARY_CHUNK_TOKENS', 8000)
+    max_parallel = max(1, _config('SUMMARY_MAX_PARALLEL', 8))
+
+    if estimate_tokens(text) <= single_call_tokens:
+        return text, 1, 0
+
+    chunks = split_text(text, chunk_tokens)
+    total = len(chunks)
+
+    def condense(numbered_chunk):
+        part, chunk = numbered_chunk
+        prompt = SummaryPromptBuilder.build_chunk_prompt(settings, part, total)
+        result = call_gpt_api(prompt, chunk, model=model, max_tokens=NOTES_MAX_TOKENS)
+        usage.append(result.get('tokens_used'))
+        return result['summary']
+
+    notes = _run_parallel(condense, list(enumerate(chunks, start=1)), max_parallel)
+    text = _join_notes(notes)
+
+    # Merge neighbouring notes until they fit the final call
+    merge_prompt = SummaryPromptBuilder.build_merge_prompt(settings)
+
+    def merge(group):
+        if len(group) == 1:
+            return group[0]
+        result = call_gpt_api(merge_prompt, _join_notes(group), model=model, max_tokens=NOTES_MAX_TOKENS)
+        usage.append(result.get('tokens_used'))
+        return result['summary']
+
+    merge_levels = 0
+    while estimate_tokens(text) > single_call_tokens and len(notes) > 1:
+        notes = _run_parallel(merge, _group_notes(notes, chunk_tokens), max_parallel)
+        text = _join_notes(notes)
+        merge_levels += 1
+    return text, total, merge_levels
+
+
+def _join_notes(notes):
+    return "\n\n".join(notes)
+
+
+def _group_notes(notes, max_tokens):
+    """Consecutive notes packed into groups of at most max_tokens, at least two notes per group."""
+    groups = [[]]
+    for note in notes:
+        group = groups[-1]
+        if len(group) >= 2 and estimate_tokens(_join_notes(group + [note])) > max_tokens:
+            groups.append([note])
+        else:
+            group.append(note)
+    return groups
@@ -1,13 +1,12 @@
-from openai import OpenAI
 import time
-from django.conf import settings
 
-client = OpenAI(api_key=getattr(settings, "OPENAI_API_KEY", None))
+from project.llm import get_openai_client
 
-def call_gpt_api(prompt, text, model="gpt-3.5-turbo", max_retries=3):
+def call_gpt_api(prompt, text, model="gpt-3.5-turbo", max_retries=3, max_tokens=1500):
     """
     Calls GPT API with retries and returns summary response.
     """
+    client = get_openai_client()
     for attempt in range(max_retries):
         try:
             response = client.chat.completions.create(
@@ -17,7 +16,7 @@ def call_gpt_api(prompt, text, model="gpt-3.5-turbo", max_retries=3):
                     {"role": "user", "content": f"{prompt}\n\n{text}"}
                 ],
                 temperature=0.5,
-                max_tokens=1500,
+                max_tokens=max_tokens,
             )
 
             summary_text = response.choices[0].message.content.strip()
@@ -31,4 +30,37 @@ def call_gpt_api(prompt, text, model="gpt-3.5-turbo", max_retries=3):
             if attempt < max_retries - 1:
                 time.sleep(1.5 * (attempt + 1))
                 continue
-            raise RuntimeError(f"GPT API failed after {max_retries} attempts: {e}")
\ No newline at end of file
+            raise RuntimeError(f"GPT API failed after {max_retries} attempts: {e}")
+
+def stream_gpt_api(prompt, text, model="gpt-3.5-turbo", max_retries=3, max_tokens=1500):
+    """
+    Calls GPT API with stream=True and yields the summary text as it is generated.
+    Opening the stream is retried like call_gpt_api; closing the generator early
+    closes the upstream response so generation stops.
+    """
+    client = get_openai_client()
+    for attempt in range(max_retries):
+        try:
+            stream = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You are a legal summarization assistant."},
+                    {"role": "user", "content": f"{prompt}\n\n{text}"}
+                ],
+                temperature=0.5,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            break
+        except Exception as e:
+            if attempt < max_retries - 1:
+                time.sleep(1.5 * (attempt + 1))
+                continue
+            raise RuntimeError(f"GPT API failed after {max_retries} attempts: {e}")
+
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        stream.close()
@@ -37,7 +37,7 @@ Format as clear bullet points:
         """Build GPT prompt based on user settings"""
         
         # Extract settings with defaults
-        format_type = settings.get('format', 'bullet_points')
+        format_type = settings.get('format', settings.get('output_format', 'bullet_points'))
         summary_length = settings.get('summary_length', 50)  # percentage
         confidence_threshold = settings.get('confidence_threshold', 80)  # percentage
         inclusions = settings.get('inclusions', ['facts', 'issues'])
@@ -75,4 +75,31 @@ Format as clear bullet points:
         prompt_parts.append(f"\nDocument to summarize:\n{text}\n")
         prompt_parts.append("Summary:")
         
-        return "\n\n".join(prompt_parts)
\ No newline at end of file
+        return "\n\n".join(prompt_parts)
+    
+    @staticmethod
+    def build_chunk_prompt(settings, part, total_parts):
+        """Build the prompt that condenses one part of a document too long for a single call"""
+        inclusions = settings.get('inclusions', ['facts', 'issues'])
+        language = settings.get('language', 'english')
+        
+        prompt_parts = [
+            f"You are reading part {part} of {total_parts} of a longer legal document. Respond in {language}.",
+            "Write dense notes on this part only; they will be combined with the notes on the other parts into one summary.",
+            "Keep parties, dates, amounts, defined terms, section numbers and citations exactly as written. Do not add an introduction or conclusion.",
+        ]
+        if inclusions:
+            prompt_parts.append(f"Focus specifically on: {', '.join(inclusions)}")
+        prompt_parts.append("Document part:")
+        return "\n\n".join(prompt_parts)
+    
+    @staticmethod
+    def build_merge_prompt(settings):
+        """Build the prompt that merges notes on consecutive parts of a document into one set of notes"""
+        language = settings.get('language', 'english')
+        
+        return "\n\n".join([
+            f"Below are notes on consecutive parts of one legal document. Respond in {language}.",
+            "Merge them into a single set of notes in document order, removing repetition but keeping every distinct fact, issue, holding, date, amount and citation.",
+            "Notes:",
+        ])
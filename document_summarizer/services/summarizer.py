@@ -1,4 +1,4 @@
-from django.conf import settings
+from project.llm import get_openai_client
 from .prompt_builder import SummaryPromptBuilder
 from .gpt_client import call_gpt_api
 
@@ -18,7 +18,7 @@ class DocumentSummarizer:
         try:
             prompt = DocumentSummarizer.create_summary_prompt(text, settings_dict)
             
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            client = get_openai_client()
             
             response = client.chat.completions.create(
                 model="gpt-3.5-turbo",
@@ -0,0 +1,142 @@
+"""
+Summary cache - reuses finished summaries for identical requests
+Input: document text, summary settings, model
+Output: cached summary result or None
+Dependencies: Django cache framework, project.disk_cache
+
+The key is a hash of the normalized document text (Unicode NFC, whitespace
+collapsed) plus a canonical fingerprint of the settings that shape the summary
+and the model, so re-submitting the same document with the same options skips
+the GPT calls entirely.
+
+Entries go to the Django cache named by SUMMARY_CACHE_ALIAS when CACHES
+defines it (e.g. Redis or Memcached, see the example in settings), otherwise
+to a size-bounded LRU directory on local disk. Both expire after
+SUMMARY_CACHE_TTL. One cache is kept per process (see get_summary_cache).
+"""
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+
+from django.conf import settings as django_settings
+
+from project.disk_cache import DiskLRUCache
+
+# Bump when prompts or the stored result format change so old entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+# Settings that only affect what happens to the summary afterwards, not its content
+IGNORED_SETTINGS = ('auto_save',)
+
+_caches_lock = threading.Lock()
+_caches = {}
+
+
+def normalize_text(text):
+    """Canonical form of document text for hashing: NFC, whitespace runs collapsed"""
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def settings_fingerprint(settings):
+    """Stable JSON of the settings that change the summary"""
+    relevant = {key: value for key, value in settings.items() if key not in IGNORED_SETTINGS}
+    return json.dumps(relevant, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class SummaryCache:
+    """Stores summary results (summary, model, tokens_used, chunks) by request fingerprint."""
+
+    def __init__(self, store, ttl):
+        self.store = store
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(text, settings, model, prompt='advanced'):
+        """Hash the normalized text together with the settings fingerprint, model and prompt."""
+        digest = hashlib.sha256()
+        digest.update(f'{CACHE_FORMAT_VERSION}|{prompt}|{model}|{settings_fingerprint(settings)}|'.encode())
+        digest.update(normalize_text(text).encode('utf-8'))
+        return f'summary:{digest.hexdigest()}'
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, result):
+        self.store.set(key, result, self.ttl)
+
+
+class DjangoCacheStore:
+    """Entries in a Django cache; backend errors count as misses."""
+
+    def __init__(self, alias):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    def get(self, key):
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            print(f"Summary cache read failed: {e}")
+            return None
+
+    def set(self, key, result, ttl):
+        try:
+            self.cache.set(key, result, timeout=ttl)
+        except Exception as e:
+            print(f"Summary cache write failed: {e}")
+
+
+class FileStore:
+    """Entries as JSON files in a DiskLRUCache, with the expiry stored alongside."""
+
+    def __init__(self, directory, max_bytes):
+        self.disk = DiskLRUCache(directory, max_bytes)
+
+    @staticmethod
+    def _file_key(key):
+        return key.split(':', 1)[-1]
+
+    def get(self, key):
+        raw = self.disk.get(self._file_key(key))
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            entry = None
+        if not entry or entry.get('expires_at', 0) < time.time():
+            self.disk.delete(self._file_key(key))
+            return None
+        return entry['result']
+
+    def set(self, key, result, ttl):
+        entry = {'expires_at': time.time() + ttl, 'result': result}
+        try:
+            self.disk.set(self._file_key(key), json.dumps(entry, separators=(',', ':')).encode())
+        except OSError as e:
+            print(f"Summary cache write failed: {e}")
+
+
+def get_summary_cache():
+    """The process-wide cache for the Django settings, or None when it is disabled."""
+    if not getattr(django_settings, 'SUMMARY_CACHE_ENABLED', True):
+        return None
+
+    ttl = getattr(django_settings, 'SUMMARY_CACHE_TTL', 7 * 24 * 3600)
+    alias = getattr(django_settings, 'SUMMARY_CACHE_ALIAS', 'summaries')
+    if alias in getattr(django_settings, 'CACHES', {}):
+        key = ('alias', alias, ttl)
+    else:
+        key = ('disk', django_settings.SUMMARY_CACHE_DIR, django_settings.SUMMARY_CACHE_MAX_MB * 1024 * 1024, ttl)
+
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            if key[0] == 'alias':
+                store = DjangoCacheStore(alias)
+            else:
+                store = FileStore(key[1], key[2])
+            cache = _caches[key] = SummaryCache(store, ttl)
+    return cache
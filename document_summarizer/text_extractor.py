@@ -3,66 +3,114 @@ Text extraction from documents
 Input: file object and file type
 Output: extracted text string
 Dependencies: PyMuPDF, python-docx
+
+PDF text comes from the shared page-text store (pdf.text_store), so a
+document already read by another endpoint isn't parsed again.
+
+Documents are read as a stream of chunks (pages, paragraphs) that stops as
+soon as the character budget is filled: pages past the budget are never
+opened, so a long PDF costs about as much as the pages that fit.
 """
-# import fitz  # PyMuPDF
-import pymupdf as fitz
+import codecs
+
 from docx import Document
 from io import BytesIO
 
+from pdf.text_store import iter_page_texts
+
+TRUNCATION_MARKER = "...[truncated]"
+CHARS_PER_TOKEN = 4  # Rough average for English text with OpenAI tokenizers
+TXT_CHUNK_SIZE = 64 * 1024
+
 class TextExtractor:
     MAX_TEXT_LENGTH = 50000  # Safe length for processing
-    
+
     @staticmethod
-    def extract_text(file_obj, file_type):
-        """Extract text from uploaded file based on type"""
+    def extract_text(file_obj, file_type, max_chars=None, max_tokens=None):
+        """
+        Extract text from uploaded file based on type.
+
+        Reading stops once max_chars (default MAX_TEXT_LENGTH) characters or
+        about max_tokens tokens are collected, whichever is smaller.
+        """
         try:
-            if file_type == 'pdf':
-                return TextExtractor._extract_from_pdf(file_obj)
-            elif file_type == 'docx':
-                return TextExtractor._extract_from_docx(file_obj)
-            elif file_type == 'txt':
-                return TextExtractor._extract_from_txt(file_obj)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            budget = TextExtractor._budget(max_chars, max_tokens)
+            chunks = TextExtractor.iter_chunks(file_obj, file_type)
+            return TextExtractor._collect(chunks, budget)
         except Exception as e:
             raise Exception(f"Text extraction failed: {str(e)}")
-    
+
     @staticmethod
-    def _extract_from_pdf(file_obj):
-        """Extract text from PDF using PyMuPDF"""
-        file_obj.seek(0)
-        pdf_bytes = file_obj.read()
-        
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            text = ""
-            for page in doc:
-                text += page.get_text()
-        
-        return TextExtractor._truncate_text(text)
-    
+    def iter_chunks(file_obj, file_type):
+        """Generator of the document's text in reading order, one page or paragraph at a time"""
+        if file_type == 'pdf':
+            return TextExtractor._iter_pdf_chunks(file_obj)
+        elif file_type == 'docx':
+            return TextExtractor._iter_docx_chunks(file_obj)
+        elif file_type == 'txt':
+            return TextExtractor._iter_txt_chunks(file_obj)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
     @staticmethod
-    def _extract_from_docx(file_obj):
-        """Extract text from DOCX using python-docx"""
+    def _budget(max_chars=None, max_tokens=None):
+        budget = max_chars if max_chars is not None else TextExtractor.MAX_TEXT_LENGTH
+        if max_tokens is not None:
+            budget = min(budget, max_tokens * CHARS_PER_TOKEN)
+        return budget
+
+    @staticmethod
+    def _iter_pdf_chunks(file_obj):
+        """Page texts from PDF (PyMuPDF, through the shared page-text store)"""
+        for page in iter_page_texts(file_obj):
+            yield page['text'] + "\n"
+
+    @staticmethod
+    def _iter_docx_chunks(file_obj):
+        """Paragraph texts from DOCX using python-docx"""
         file_obj.seek(0)
         doc = Document(file_obj)
-        
-        text = ""
         for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        return TextExtractor._truncate_text(text)
-    
+            yield paragraph.text + "\n"
+
     @staticmethod
-    def _extract_from_txt(file_obj):
-        """Extract text from TXT file"""
+    def _iter_txt_chunks(file_obj):
+        """Decoded blocks of a TXT file"""
         file_obj.seek(0)
-        text = file_obj.read().decode('utf-8')
-        return TextExtractor._truncate_text(text)
-    
+        # Incremental so a multi-byte character split across blocks decodes correctly
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for block in iter(lambda: file_obj.read(TXT_CHUNK_SIZE), b""):
+            yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
     @staticmethod
-    def _truncate_text(text):
-        """Truncate text if it exceeds safe length"""
-        text = text.strip()
-        if len(text) > TextExtractor.MAX_TEXT_LENGTH:
-            return text[:TextExtractor.MAX_TEXT_LENGTH] + "...[truncated]"
+    def _collect(chunks, budget):
+        """
+        Join chunks once, consuming no more of them than the budget needs.
+
+        Only text up to the last non-whitespace character counts against the
+        budget, matching the strip() that is applied to the result.
+        """
+        parts = []
+        length = 0
+        content_length = 0
+        try:
+            for chunk in chunks:
+                if not parts:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                parts.append(chunk)
+                if chunk.rstrip():
+                    content_length = length + len(chunk.rstrip())
+                length += len(chunk)
+                if content_length > budget:
+                    break
+        finally:
+            # Releases the open document of a PDF that was cut short
+            chunks.close()
+
+        text = "".join(parts).strip()
+        if content_length > budget:
+            return text[:budget] + TRUNCATION_MARKER
         return text
@@ -5,10 +5,15 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema
-from django.core.files.base import ContentFile
-from .models import UploadedDocument
+from django.http import StreamingHttpResponse
 from .serializers import ProcessDocumentSerializer, SummaryResponseSerializer, SettingsActionSerializer
-from .text_extractor import TextExtractor
+from .text_extractor import TextExtractor, TRUNCATION_MARKER
+from .pipeline import max_document_chars
+from .services.chunked_summarizer import summarize_text, stream_summary, DEFAULT_MODEL
+from .summary_cache import get_summary_cache
+from project.sse import sse_event
+from .response_utils import save_summary_text, summary_owner
+from .background import run_in_background
 
 
 @extend_schema(tags=['Document Summarizer'])
@@ -18,7 +23,12 @@ class ProcessDocumentView(APIView):
     
     @extend_schema(
         request=ProcessDocumentSerializer,
-        responses={200: SummaryResponseSerializer}
+        responses={200: SummaryResponseSerializer},
+        description=(
+            'With stream=true the summary is sent as server-sent events while it is generated: '
+            '{"delta": "..."} per piece, then a "done" event with the metadata below (without the '
+            'summary and download fields) and, with auto_save, a "saved" event with the download fields.'
+        )
     )
     def post(self, request):
         serializer = ProcessDocumentSerializer(data=request.data)
@@ -80,9 +90,11 @@ class ProcessDocumentView(APIView):
                 if serializer.validated_data.get('document'):
                     document_file = serializer.validated_data['document']
                     file_extension = document_file.name.lower().split('.')[-1]
-                    extracted_text = TextExtractor.extract_text(document_file, file_extension)
+                    extracted_text = TextExtractor.extract_text(document_file, file_extension, max_chars=max_document_chars())
                 else:
                     extracted_text = serializer.validated_data['text']
+                    if len(extracted_text) > max_document_chars():
+                        extracted_text = extracted_text[:max_document_chars()] + TRUNCATION_MARKER
                 
                 # Build settings for AI prompt
                 settings = {
@@ -98,6 +110,15 @@ class ProcessDocumentView(APIView):
                     'recommendations': serializer.validated_data['recommendations']
                 }
                 
+                if serializer.validated_data['stream']:
+                    response = StreamingHttpResponse(
+                        self._stream_advanced_summary(extracted_text, settings, request),
+                        content_type='text/event-stream'
+                    )
+                    response['Cache-Control'] = 'no-cache'
+                    response['X-Accel-Buffering'] = 'no'
+                    return response
+                
                 # Generate summary using your advanced prompt
                 result = self._generate_advanced_summary(extracted_text, settings, request)
                 return Response(result)
@@ -110,10 +131,134 @@ class ProcessDocumentView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def _generate_advanced_summary(self, document_text, settings, request):
-        import datetime
+        # Same document with the same settings: reuse the earlier summary
+        cache, cache_key, result = self._cached_summary(document_text, settings)
+        cache_hit = result is not None
+        
+        if not cache_hit:
+            # Documents too long for one call are condensed chunk by chunk (concurrently),
+            # then the advanced prompt is run on the combined notes
+            result = summarize_text(
+                document_text,
+                self._chunk_settings(settings),
+                final_prompt=self._final_prompt(settings),
+                model=DEFAULT_MODEL
+            )
+            if cache:
+                cache.set(cache_key, result)
+        summary_text = result['summary']
+        
+        # Save summary if auto_save enabled
+        saved = {'download_url': None, 'filename': None, 'file_size': 0, 'document_id': None}
+        if settings['auto_save']:
+            saved = save_summary_text(summary_text, summary_owner(request), self._base_url(request))
+        
+        return {
+            **self._summary_metadata(document_text, settings, result, cache_hit),
+            'summary': summary_text,
+            **saved
+        }
+    
+    def _stream_advanced_summary(self, document_text, settings, request):
+        """
+        Server-sent events for a summary: "message" events with pieces of the summary
+        ({"delta": ...}) as they are generated, "done" with the summary metadata, and
+        with auto_save a final "saved" event with the download link. Saving runs in
+        the background after the text is sent and finishes even if the client leaves.
+        """
+        # Request-bound values are read now; the events are produced after the view returns
+        user = summary_owner(request) if settings['auto_save'] else None
+        return self._summary_events(document_text, settings, user, self._base_url(request))
+    
+    def _summary_events(self, document_text, settings, user, base_url):
+        cache, cache_key, cached = self._cached_summary(document_text, settings)
+        try:
+            if cached is None:
+                stats = {}
+                parts = []
+                deltas = stream_summary(
+                    document_text,
+                    self._chunk_settings(settings),
+                    final_prompt=self._final_prompt(settings),
+                    model=DEFAULT_MODEL,
+                    stats=stats
+                )
+                try:
+                    for delta in deltas:
+                        parts.append(delta)
+                        yield sse_event({'delta': delta})
+                finally:
+                    deltas.close()
+                result = {'summary': ''.join(parts), 'tokens_used': None, **stats}
+                if cache:
+                    cache.set(cache_key, result)
+            else:
+                result = cached
+                yield sse_event({'delta': result['summary']})
+        except Exception as e:
+            yield sse_event({'error': f'Request failed: {str(e)}'}, event='error')
+            return
+        
+        saving = None
+        if settings['auto_save']:
+            saving = run_in_background(save_summary_text, result['summary'], user, base_url)
+        
+        yield sse_event(self._summary_metadata(document_text, settings, result, cached is not None), event='done')
         
-        # Build advanced prompt template
-        prompt = f"""You are an advanced AI Legal Document Summarizer.
+        if saving is not None:
+            try:
+                yield sse_event(saving.result(), event='saved')
+            except Exception as e:
+                yield sse_event({'error': f'Saving the summary failed: {str(e)}'}, event='error')
+    
+    @staticmethod
+    def _cached_summary(document_text, settings):
+        """(cache, key, cached result or None); cache and key are None when caching is off"""
+        cache = get_summary_cache()
+        if not cache:
+            return None, None, None
+        cache_key = cache.make_key(document_text, settings, DEFAULT_MODEL)
+        return cache, cache_key, cache.get(cache_key)
+    
+    @staticmethod
+    def _summary_metadata(document_text, settings, result, cache_hit):
+        summary_text = result['summary']
+        return {
+            'word_count': len(summary_text.split()),
+            'settings_used': settings,
+            'truncated': document_text.endswith(TRUNCATION_MARKER),
+            'tokens_used': result['tokens_used'] or len(summary_text.split()) * 1.3,  # Estimate when not reported
+            'model': result['model'],
+            'chunks': result['chunks'],
+            'cache_hit': cache_hit
+        }
+    
+    @staticmethod
+    def _base_url(request):
+        protocol = 'https' if request.is_secure() else 'http'
+        return f'{protocol}://{request.get_host()}'
+    
+    def _chunk_settings(self, settings):
+        """Settings for the per-chunk prompts of long documents"""
+        return {**settings, 'inclusions': self._inclusions(settings)}
+    
+    def _final_prompt(self, settings):
+        return lambda text: ("Legal Document Summarizer", self._build_advanced_prompt(text, settings))
+    
+    @staticmethod
+    def _inclusions(settings):
+        """Content types enabled in the settings, for the per-chunk prompts"""
+        labels = {
+            'key_facts': 'key facts',
+            'legal_issues': 'legal issues',
+            'holdings_and_rulings': 'holdings and rulings',
+            'recommendations': 'recommendations'
+        }
+        return [label for key, label in labels.items() if settings.get(key)]
+    
+    def _build_advanced_prompt(self, document_text, settings):
+        """Build advanced prompt template"""
+        return f"""You are an advanced AI Legal Document Summarizer.
 
 Your task is to analyze and summarize a legal document based on the user's selected configuration and output format.
 
@@ -168,59 +313,3 @@ OUTPUT FORMAT
 - Confidence Score (based on {settings['confidence_threshold']}%)  
 - Citation Style: {settings['citation_style']}  
 - Language: {settings['language']}"""
-
-        # Call GPT API
-        from .services.gpt_client import call_gpt_api
-        result = call_gpt_api("Legal Document Summarizer", prompt)
-        summary_text = result['summary']
-        
-        # Save summary if auto_save enabled
-        download_url = None
-        filename = None
-        file_size = 0
-        document_id = None
-        
-        if settings['auto_save']:
-            # Create document record and save summary
-            if request.user.is_authenticated:
-                user = request.user
-            else:
-                from accounts.models import User
-                user, created = User.objects.get_or_create(
-                    email='test@example.com',
-                    defaults={'password': 'testpass123'}
-                )
-            
-            uploaded_doc = UploadedDocument(
-                user=user,
-                file_name=f"summary_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                file_type='txt',
-                file_size=len(summary_text.encode('utf-8'))
-            )
-            
-            # Save summary as file
-            from django.core.files.base import ContentFile
-            uploaded_doc.file_path.save(
-                uploaded_doc.file_name,
-                ContentFile(summary_text.encode('utf-8'))
-            )
-            uploaded_doc.save()
-            
-            protocol = 'https' if request.is_secure() else 'http'
-            download_url = f'{protocol}://{request.get_host()}{uploaded_doc.file_path.url}'
-            filename = uploaded_doc.file_name
-            file_size = uploaded_doc.file_size
-            document_id = uploaded_doc.id
-        
-        return {
-            'summary': summary_text,
-            'word_count': len(summary_text.split()),
-            'settings_used': settings,
-            'truncated': False,
-            'tokens_used': len(summary_text.split()) * 1.3,  # Estimate
-            'model': 'gpt-3.5-turbo',
-            'download_url': download_url,
-            'filename': filename,
-            'file_size': file_size,
-            'document_id': document_id
-        }
@@ -9,7 +9,11 @@ legal_ai_chat_schema = extend_schema(
     operation_id="LegalAIChat",
     description=(
         "Stream AI legal responses based on a text message and optional uploaded document "
-        "(PDF, DOCX, or TXT). Max 5 files, 5 MB each, and 20 pages per PDF."
+        "(PDF, DOCX, or TXT). Max 5 files, 5 MB each, and 20 pages per PDF.\n\n"
+        "With `stream=true` (or `Accept: text/event-stream`) the answer is sent as server-sent events "
+        "while it is generated: `data: {\"delta\": \"...\"}` per piece of text, then `event: done` "
+        "(`data: {\"success\": true}`) or `event: error` (`data: {\"error\": \"...\"}`). "
+        "Otherwise the complete answer is returned as JSON."
     ),
     request={
         "multipart/form-data": {
@@ -24,12 +28,22 @@ legal_ai_chat_schema = extend_schema(
                     "items": {"type": "string", "format": "binary"},
                     "description": "Optional uploaded file(s): PDF, DOCX, or TXT.",
                 },
+                "stream": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Stream the answer as server-sent events (text/event-stream).",
+                },
             },
             "required": ["message"],
         }
     },
     responses={
-        200: OpenApiResponse(description="Streamed AI response text (plain-text stream)."),
+        200: OpenApiResponse(
+            description=(
+                "JSON {\"success\": true, \"response\": \"...\"}, or with stream a text/event-stream "
+                "of delta events followed by a done (or error) event."
+            )
+        ),
         400: OpenApiResponse(description="Validation error (file too large, missing message, etc.)."),
     },
     examples=[
@@ -45,6 +59,12 @@ legal_ai_chat_schema = extend_schema(
             description="Example POST message + PDF",
             value={"message": "Summarize this contract", "file": "<binary>"},
         ),
+        OpenApiExample(
+            "Streaming",
+            summary="Stream the answer as server-sent events",
+            description="Example POST message with stream=true",
+            value={"message": "What is due process under U.S. law?", "stream": True},
+        ),
     ],
     tags=["Legal AI Chat"],
 )
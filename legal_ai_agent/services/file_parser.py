@@ -1,12 +1,18 @@
 import io
-# import fitz  # PyMuPDF
-import pymupdf as fitz
 import docx
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
+from pdf.text_store import open_document, iter_page_texts
+
 
 class FileParser:
-    """Handles PDF, DOCX, and TXT parsing in-memory only."""
+    """
+    Handles PDF, DOCX, and TXT parsing in memory.
+
+    PDF text is also kept in the shared text store (pdf.text_store) only when
+    TEXT_STORE_CHAT_UPLOADS is on; text already stored by other endpoints is reused then.
+    """
 
     MAX_FILE_SIZE_MB = 5
     MAX_PDF_PAGES = 20
@@ -32,13 +38,10 @@ class FileParser:
             return self._parse_txt()
 
     def _parse_pdf(self):
-        text = []
-        with fitz.open(stream=self.file.read(), filetype="pdf") as doc:
-            if len(doc) > self.MAX_PDF_PAGES:
-                raise ValidationError(f"PDF exceeds {self.MAX_PDF_PAGES} pages.")
-            for page in doc:
-                text.append(page.get_text("text"))
-        return "\n".join(text)
+        stored = open_document(self.file, persist=settings.TEXT_STORE_CHAT_UPLOADS)
+        if stored.page_count > self.MAX_PDF_PAGES:
+            raise ValidationError(f"PDF exceeds {self.MAX_PDF_PAGES} pages.")
+        return "\n".join(page["text"] for page in iter_page_texts(self.file, stored))
 
     def _parse_docx(self):
         document = docx.Document(io.BytesIO(self.file.read()))
@@ -1,18 +1,58 @@
-import openai
-from django.conf import settings
+import time
+
+from project.llm import get_openai_client
 
 
 class LegalAIService:
+    MODEL = "gpt-4o-mini"
+
     def __init__(self, api_key=None):
-        self.client = openai.OpenAI(api_key=api_key or settings.OPENAI_API_KEY)
+        # Shared client: its connection pool keeps TLS connections to OpenAI warm between requests
+        self.client = get_openai_client(api_key)
 
     def get_response(self, messages):
         """
-        Return the full GPT response (no streaming)
+        Return the full GPT response once it is complete (see stream_response for streaming)
         """
         response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=self.MODEL,
             messages=messages,
             temperature=0.4,
         )
         return response.choices[0].message.content
+
+    def stream_response(self, messages):
+        """
+        Yield the GPT response text piece by piece as it is generated.
+
+        Closing the generator early (the client went away) closes the upstream
+        HTTP response, so OpenAI stops generating and billing for the rest.
+        Time to first token and total time are logged when the stream ends.
+        """
+        started = time.perf_counter()
+        first_token_ms = None
+        completed = False
+        stream = self.client.chat.completions.create(
+            model=self.MODEL,
+            messages=messages,
+            temperature=0.4,
+            stream=True,
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    yield delta
+            completed = True
+        finally:
+            stream.close()
+            total_ms = (time.perf_counter() - started) * 1000
+            first_token = f"{first_token_ms:.0f} ms" if first_token_ms is not None else "none"
+            print(
+                f"Legal AI chat stream {'completed' if completed else 'stopped early'}: "
+                f"first token {first_token}, total {total_ms:.0f} ms"
+            )
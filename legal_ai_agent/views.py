@@ -1,8 +1,11 @@
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.core.exceptions import ValidationError
 
+from project.sse import EventStreamRenderer, sse_event
+
 from .services.file_parser import FileParser
 from .services.prompt_builder import PromptBuilder
 from .services.legal_ai_service import LegalAIService
@@ -14,13 +17,16 @@ from drf_spectacular.utils import extend_schema
 @legal_ai_chat_schema
 class LegalAIChatAgentView(APIView):
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
 
     def post(self, request):
         """
         Accepts:
           - message: required string
           - file: optional (PDF, DOCX, TXT)
-        Returns: full AI response (no streaming)
+          - stream: optional "true" (or an Accept: text/event-stream header)
+        Returns: full AI response as JSON, or with stream the response as
+        server-sent events while it is generated
         """
         message = request.data.get("message")
         if not message:
@@ -43,8 +49,42 @@ class LegalAIChatAgentView(APIView):
         messages = PromptBuilder(message, combined_text).build()
         ai_client = LegalAIService()
 
+        if self._wants_stream(request):
+            response = StreamingHttpResponse(
+                self._stream_events(ai_client, messages),
+                content_type="text/event-stream"
+            )
+            response["Cache-Control"] = "no-cache"
+            # Don't let nginx buffer the events
+            response["X-Accel-Buffering"] = "no"
+            return response
+
         try:
             ai_response = ai_client.get_response(messages)
             return JsonResponse({"success": True, "response": ai_response})
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
+
+    @staticmethod
+    def _wants_stream(request):
+        if str(request.data.get("stream", "false")).lower() == "true":
+            return True
+        return "text/event-stream" in request.headers.get("Accept", "")
+
+    @staticmethod
+    def _stream_events(ai_client, messages):
+        """
+        Yield SSE events: one "message" event per text delta ({"delta": ...}),
+        then "done" ({"success": true}), or "error" ({"error": ...}) if GPT fails.
+        """
+        deltas = ai_client.stream_response(messages)
+        try:
+            for delta in deltas:
+                yield sse_event({"delta": delta})
+            yield sse_event({"success": True}, event="done")
+        except Exception as e:
+            yield sse_event({"error": str(e)}, event="error")
+        finally:
+            # Runs when the server closes the response after a client disconnect too,
+            # which closes the upstream OpenAI request
+            deltas.close()
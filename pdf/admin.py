@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ProtectedPDF, MergedPDF, CompressedPDF, SplitPDF, PDFImageConversion, WordToPdfConversion, WordToPdf, OrganizedPdf, UnlockPdf
+from .models import ProtectedPDF, MergedPDF, CompressedPDF, SplitPDF, PDFImageConversion, WordToPdfConversion, WordToPdf, OrganizedPdf, UnlockPdf, Job
 # Register your models here.
 
 class ProtectedPDFAdmin(admin.ModelAdmin):
@@ -48,3 +48,9 @@ admin.site.register(OrganizedPdf, OrganizedPdfAdmin)
 class UnlockPdfAdmin(admin.ModelAdmin):
     list_display = ['user', 'id']  
 admin.site.register(UnlockPdf, UnlockPdfAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'operation', 'status', 'progress', 'created_at', 'finished_at']
+    list_filter = ['operation', 'status']
+admin.site.register(Job, JobAdmin)
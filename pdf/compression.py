@@ -0,0 +1,245 @@
+"""
+PDF Compression Module
+Shrinks PDFs by working on the document's objects instead of rasterizing pages.
+
+Embedded images are downsampled to a per-profile target DPI (based on the size
+they are actually displayed at) and re-encoded as JPEG when that makes them
+smaller. Identical streams (images, fonts) are merged, unused objects dropped,
+and objects/xref written as compressed object streams. Text and vector content
+are never touched, so the text layer survives.
+"""
+
+import os
+from io import BytesIO
+
+import pymupdf as fitz
+
+
+# Maps the user-facing compression levels onto engine settings
+COMPRESSION_PROFILES = {
+    'extreme': {
+        'target_dpi': 96,
+        'jpeg_quality': 45,
+        'recompress_jpeg': True,
+        'subset_fonts': True,
+    },
+    'recommended': {
+        'target_dpi': 150,
+        'jpeg_quality': 65,
+        'recompress_jpeg': True,
+        'subset_fonts': True,
+    },
+    'less': {
+        'target_dpi': 220,
+        'jpeg_quality': 85,
+        'recompress_jpeg': False,
+        'subset_fonts': False,
+    },
+}
+
+# Only downsample when the image is noticeably above the target resolution
+DPI_TOLERANCE = 1.2
+# Tiny images (icons, bullets) are not worth decoding
+MIN_IMAGE_BYTES = 4096
+
+
+def save_compact(pdf_document, output, **extra_options):
+    """
+    Write with duplicate/unused object removal and compressed object streams.
+
+    Args:
+        pdf_document: Open PyMuPDF document
+        output: Path or binary file object
+        **extra_options: Further Document.save() options (e.g. encryption)
+
+    Encrypted output is written without object streams: MuPDF corrupts them
+    when it encrypts the file in the same save.
+    """
+    save_options = {
+        'garbage': 4,         # drop unused objects, merge identical objects and streams
+        'deflate': True,
+        'deflate_images': True,
+        'deflate_fonts': True,
+        'clean': False,       # leave page content streams as they are
+        **extra_options,
+    }
+    if save_options.get('encryption', fitz.PDF_ENCRYPT_KEEP) not in (fitz.PDF_ENCRYPT_KEEP, fitz.PDF_ENCRYPT_NONE):
+        pdf_document.save(output, **save_options)
+        return
+    try:
+        pdf_document.save(output, use_objstms=1, **save_options)
+    except TypeError:
+        # Object streams need PyMuPDF 1.24.3+
+        pdf_document.save(output, **save_options)
+
+
+class PDFCompressor:
+    """
+    Object-level PDF compressor.
+    """
+
+    def __init__(self, level='recommended'):
+        """
+        Initialize the compressor.
+
+        Args:
+            level (str): One of 'extreme', 'recommended' or 'less'
+        """
+        if level not in COMPRESSION_PROFILES:
+            raise ValueError("Invalid compression choice")
+        self.level = level
+        self.profile = COMPRESSION_PROFILES[level]
+
+    def compress(self, pdf_path):
+        """
+        Compress a PDF file.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+
+        Returns:
+            tuple: (compressed PDF bytes, stats dict). When the engine cannot make
+                the file smaller the original bytes are returned unchanged.
+        """
+        original_size = os.path.getsize(pdf_path)
+        stats = {
+            'level': self.level,
+            'original_size': original_size,
+            'compressed_size': original_size,
+            'images_recompressed': 0,
+            'images_skipped': 0,
+        }
+
+        with fitz.open(pdf_path) as pdf_document:
+            if pdf_document.needs_pass:
+                raise ValueError("Cannot compress a password-protected PDF.")
+
+            self.compress_document(pdf_document, stats)
+
+            output_buffer = BytesIO()
+            save_compact(pdf_document, output_buffer)
+
+        compressed = output_buffer.getvalue()
+        if len(compressed) >= original_size:
+            with open(pdf_path, 'rb') as f:
+                return f.read(), stats
+
+        stats['compressed_size'] = len(compressed)
+        return compressed, stats
+
+    def compress_document(self, pdf_document, stats):
+        """
+        Recompress images and subset fonts of an open document in place.
+
+        The size reduction only materializes when the document is written with
+        save_compact(), which drops the replaced streams.
+        """
+        self._recompress_images(pdf_document, stats)
+
+        if self.profile['subset_fonts']:
+            try:
+                pdf_document.subset_fonts()
+            except Exception as e:
+                print(f"Font subsetting skipped: {e}")
+
+    def _displayed_sizes(self, pdf_document):
+        """
+        Find the largest size (in points) each image is displayed at across all pages.
+
+        Returns:
+            dict: xref -> (width_pt, height_pt)
+        """
+        sizes = {}
+        for page in pdf_document:
+            for image in page.get_images(full=True):
+                xref = image[0]
+                for rect in page.get_image_rects(xref):
+                    width, height = sizes.get(xref, (0, 0))
+                    sizes[xref] = (max(width, abs(rect.width)), max(height, abs(rect.height)))
+        return sizes
+
+    def _recompress_images(self, pdf_document, stats):
+        """Downsample and re-encode each embedded image once, keeping whichever is smaller."""
+        target_dpi = self.profile['target_dpi']
+        processed_xrefs = set()
+
+        displayed_sizes = self._displayed_sizes(pdf_document)
+
+        for page in pdf_document:
+            for image in page.get_images(full=True):
+                xref, smask, width, height, bpc = image[0], image[1], image[2], image[3], image[4]
+                if xref in processed_xrefs:
+                    continue
+                processed_xrefs.add(xref)
+
+                # Soft masks, stencil masks and 1-bit scans don't survive JPEG well
+                if smask or bpc == 1 or pdf_document.xref_get_key(xref, 'ImageMask')[1] == 'true':
+                    stats['images_skipped'] += 1
+                    continue
+
+                display_width, display_height = displayed_sizes.get(xref, (0, 0))
+                if not display_width or not display_height:
+                    stats['images_skipped'] += 1
+                    continue
+
+                original_stream_size = len(pdf_document.xref_stream_raw(xref) or b'')
+                if original_stream_size < MIN_IMAGE_BYTES:
+                    stats['images_skipped'] += 1
+                    continue
+
+                # Effective resolution of the image where it is shown largest
+                dpi = min(width / (display_width / 72), height / (display_height / 72))
+                needs_downsample = dpi > target_dpi * DPI_TOLERANCE
+                is_jpeg = 'DCTDecode' in pdf_document.xref_get_key(xref, 'Filter')[1]
+
+                if not needs_downsample and not (is_jpeg and self.profile['recompress_jpeg']):
+                    stats['images_skipped'] += 1
+                    continue
+
+                try:
+                    new_stream = self._encode_image(pdf_document, xref, dpi if needs_downsample else None)
+                except Exception as e:
+                    print(f"Skipping image {xref}: {e}")
+                    stats['images_skipped'] += 1
+                    continue
+
+                if new_stream is None or len(new_stream) >= original_stream_size:
+                    stats['images_skipped'] += 1
+                    continue
+
+                page.replace_image(xref, stream=new_stream)
+                stats['images_recompressed'] += 1
+
+    def _encode_image(self, pdf_document, xref, dpi=None):
+        """
+        Decode an image, optionally scale it down to the target DPI, and encode it as JPEG.
+
+        Returns:
+            bytes: JPEG data, or None if the image can't be re-encoded
+        """
+        pixmap = fitz.Pixmap(pdf_document, xref)
+        if pixmap.alpha:
+            return None
+
+        if pixmap.colorspace is None:
+            return None
+        if pixmap.colorspace.n not in (1, 3):
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+
+        if dpi:
+            scale = self.profile['target_dpi'] / dpi
+            new_width = max(1, int(pixmap.width * scale))
+            new_height = max(1, int(pixmap.height * scale))
+            pixmap = fitz.Pixmap(pixmap, new_width, new_height, None)
+
+        return pixmap.tobytes('jpg', jpg_quality=self.profile['jpeg_quality'])
+
+
+def compress_pdf_file(pdf_path, level='recommended'):
+    """
+    Convenience function to compress a PDF file.
+
+    Returns:
+        tuple: (compressed PDF bytes, stats dict)
+    """
+    return PDFCompressor(level).compress(pdf_path)
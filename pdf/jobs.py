@@ -0,0 +1,158 @@
+"""
+Background job engine for heavy PDF operations.
+
+Views enqueue a Job (the upload is stored on the job) and return 202 right away.
+The `run_pdf_worker` management command claims queued jobs and runs them in a
+local process pool, so request latency no longer depends on document size.
+"""
+
+import os
+import traceback
+
+from django.core.files import File
+from django.db import close_old_connections
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+
+
+def enqueue_job(user, operation, input_file, params=None):
+    """Store the uploaded file on a new queued Job and return it."""
+    job = Job(user=user, operation=operation, params=params or {})
+    job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return its id.
+
+    The conditional UPDATE works on every database backend, so several worker
+    processes can poll the same table without handing out a job twice.
+    """
+    queued_ids = Job.objects.filter(status=Job.STATUS_QUEUED).order_by('created_at').values_list('id', flat=True)[:10]
+    for job_id in queued_ids:
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def requeue_stale_jobs():
+    """Put jobs left in 'running' by a worker that died back on the queue."""
+    return Job.objects.filter(status=Job.STATUS_RUNNING).update(status=Job.STATUS_QUEUED, progress=0, started_at=None)
+
+
+def fail_job(job_id, error):
+    """Mark a job failed from outside the worker, e.g. when its process crashed."""
+    return Job.objects.filter(id=job_id, status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_FAILED,
+        error=error,
+        finished_at=timezone.now(),
+    )
+
+
+def run_job(job_id):
+    """Execute a claimed job. Called inside a worker process."""
+    close_old_connections()
+    job = Job.objects.get(id=job_id)
+    handler = JOB_HANDLERS.get(job.operation)
+
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job operation: {job.operation}')
+
+        with job.input_file.open('rb') as stored_file:
+            input_file = File(stored_file, name=os.path.basename(job.input_file.name))
+            result_path, result = handler(job, input_file)
+
+        job.status = Job.STATUS_SUCCEEDED
+        job.progress = 100
+        job.result_path = result_path
+        job.result = result or {}
+    except Exception as e:
+        traceback.print_exc()
+        job.status = Job.STATUS_FAILED
+        job.error = str(e)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'progress', 'result_path', 'result', 'error', 'finished_at'])
+        try:
+            job.input_file.delete(save=False)
+            Job.objects.filter(pk=job.pk).update(input_file='')
+        except OSError as e:
+            print(f"Error deleting job input file: {e}")
+        close_old_connections()
+
+    return job.status
+
+
+# ----------------------------
+# Operation handlers
+# Each returns (result_path, result metadata dict).
+# ----------------------------
+def _run_ocr(job, input_file):
+    from .utils import pdf_to_ocr
+    from .ocr_engine import total_timings
+
+    language = job.params.get('language', 'eng')
+    ocr_mode = job.params.get('ocr_mode')
+    ocr_pdf, report = pdf_to_ocr(
+        input_file, job.user, language,
+        progress_callback=lambda p: job.set_progress(p * 9 // 10),
+        mode=ocr_mode,
+        preprocess=job.params.get('preprocess'),
+        strategy=job.params.get('ocr_strategy')
+    )
+    return reverse('download_ocr_pdf', args=[ocr_pdf.id]), {
+        'ocr_pdf_id': ocr_pdf.id,
+        'language': language,
+        'ocr_mode': ocr_mode,
+        'ocr_strategy': job.params.get('ocr_strategy'),
+        'timings_ms': total_timings(report),
+        'pages': report,
+    }
+
+
+def _run_compress(job, input_file):
+    from .utils import save_compressed_pdf
+
+    compression_quality = job.params.get('compression_quality', 'recommended')
+    compressed_pdf, stats = save_compressed_pdf(input_file, job.user, compression_quality)
+    return reverse('download_compressed_pdf', args=[compressed_pdf.id]), {'compressed_pdf_id': compressed_pdf.id, **stats}
+
+
+def _run_pdf_to_format(job, input_file):
+    from .views import PDFToFormatView
+
+    output_format = job.params['output_format']
+    render_options = job.params.get('render_options')
+    conversion = PDFToFormatView().convert_and_save(input_file, output_format, job.user, render_options)
+    return reverse('download_format_converted', args=[conversion.id]), {
+        'conversion_id': conversion.id,
+        'output_format': output_format,
+    }
+
+
+def _run_format_to_pdf(job, input_file):
+    from .views import FormatToPDFView
+
+    input_format = job.params['input_format']
+    conversion, word_to_pdf = FormatToPDFView().convert_and_save(input_file, input_format, job.user)
+    return reverse('download_converted_pdf', args=[word_to_pdf.id]), {
+        'conversion_id': conversion.id,
+        'input_format': input_format,
+    }
+
+
+JOB_HANDLERS = {
+    'ocr': _run_ocr,
+    'compress': _run_compress,
+    'pdf_to_format': _run_pdf_to_format,
+    'format_to_pdf': _run_format_to_pdf,
+}
@@ -0,0 +1,51 @@
+import time
+
+import pymupdf as fitz
+from django.core.management.base import BaseCommand
+
+from pdf.ocr_backends import tesserocr
+from pdf.ocr_engine import recognize_page, recognize_pages, OCR_BATCH_PAGES
+
+
+def _short_pages(pdf_document, count):
+    """Pages with a few lines of text, where per-call overhead dominates recognition time."""
+    for page_num in range(count):
+        page = pdf_document.new_page()
+        page.insert_text((72, 100), f'Invoice {page_num + 1}', fontsize=20)
+        page.insert_text((72, 130), 'Total due: 1,234.56 EUR', fontsize=12)
+    return list(pdf_document)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-page OCR time of the available OCR backends, page by page and batched.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=16, help='Short pages to recognize (default: 16)')
+        parser.add_argument('--language', default='eng', help='Tesseract language (default: eng)')
+
+    def handle(self, *args, **options):
+        count = max(1, options['pages'])
+        backends = ['pytesseract'] + (['tesserocr'] if tesserocr is not None else [])
+        if tesserocr is None:
+            self.stdout.write('tesserocr is not installed; only timing pytesseract.')
+
+        with fitz.open() as pdf_document:
+            pages = _short_pages(pdf_document, count)
+            for backend in backends:
+                # First call loads the engine; don't count it against either mode
+                recognize_page(pages[0], options['language'], backend=backend)
+
+                started = time.perf_counter()
+                for page in pages:
+                    recognize_page(page, options['language'], backend=backend)
+                per_page = (time.perf_counter() - started) / count
+
+                started = time.perf_counter()
+                for i in range(0, count, OCR_BATCH_PAGES):
+                    recognize_pages(pages[i:i + OCR_BATCH_PAGES], options['language'], backend=backend)
+                per_page_batched = (time.perf_counter() - started) / count
+
+                self.stdout.write(
+                    f'{backend:>12}: {per_page * 1000:8.1f} ms/page single, '
+                    f'{per_page_batched * 1000:8.1f} ms/page in batches of {OCR_BATCH_PAGES}'
+                )
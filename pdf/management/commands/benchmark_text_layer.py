@@ -0,0 +1,85 @@
+import random
+import string
+import time
+from io import BytesIO
+
+import pymupdf as fitz
+from django.core.management.base import BaseCommand
+
+from pdf.text_layer import TextLayerWriter
+
+
+def _synthetic_words(page_rect, count, seed):
+    """Word boxes laid out in lines like OCR output of a dense page."""
+    rng = random.Random(seed)
+    words = []
+    x, y = 20, 30
+    while len(words) < count:
+        text = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+        width = len(text) * 6
+        if x + width > page_rect.width - 20:
+            x, y = 20, y + 10
+        if y + 8 > page_rect.height - 20:
+            x, y = 20, 30
+        words.append({'text': text, 'x0': x, 'y0': y, 'x1': x + width, 'y1': y + 8})
+        x += width + 4
+    return words
+
+
+def _insert_word_by_word(page, words):
+    """The previous approach: one insert_textbox() (or insert_text() fallback) per word."""
+    for word_box in words:
+        rect = fitz.Rect(word_box['x0'], word_box['y0'], word_box['x1'], word_box['y1'])
+        fontsize = rect.height * 0.75
+        rc = page.insert_textbox(
+            rect, word_box['text'] + ' ', fontsize=fontsize, fontname='helv',
+            color=(0, 0, 0), fill=(1, 1, 1), render_mode=3, align=fitz.TEXT_ALIGN_LEFT, overlay=True
+        )
+        if rc < 0:
+            page.insert_text(
+                (rect.x0, rect.y0 + rect.height * 0.85), word_box['text'],
+                fontsize=fontsize, fontname='helv', color=(1, 1, 1), overlay=True
+            )
+    return len(words)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-page time and output size of the OCR text layer writers on synthetic word boxes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=2, help='Pages per run (default: 2)')
+        parser.add_argument('--words', type=int, default=2000, help='Words per page (default: 2000)')
+        parser.add_argument(
+            '--skip-legacy', action='store_true',
+            help='Only time the batched writer (word-by-word insertion takes seconds per dense page)'
+        )
+
+    def handle(self, *args, **options):
+        pages = max(1, options['pages'])
+        words_per_page = max(1, options['words'])
+
+        writers = [('batched', lambda document: TextLayerWriter(document).write_page)]
+        if not options['skip_legacy']:
+            writers.insert(0, ('word-by-word', lambda document: _insert_word_by_word))
+
+        self.stdout.write(f'{pages} page(s) x {words_per_page} words')
+        for name, make_writer in writers:
+            with fitz.open() as pdf_document:
+                for _ in range(pages):
+                    pdf_document.new_page()
+                write_page = make_writer(pdf_document)
+
+                started = time.perf_counter()
+                words_written = 0
+                for page in pdf_document:
+                    words_written += write_page(page, _synthetic_words(page.rect, words_per_page, page.number))
+                elapsed = time.perf_counter() - started
+
+                # Same save options as create_searchable_pdf_with_ocr()
+                output_buffer = BytesIO()
+                pdf_document.save(output_buffer, garbage=4, deflate=True, clean=True)
+
+            self.stdout.write(
+                f'{name:>12}: {elapsed / pages * 1000:9.1f} ms/page, '
+                f'{len(output_buffer.getvalue()) / 1024:7.1f} KB output, {words_written} words'
+            )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Delete stored PDF text that is unused for too long or beyond the document limit.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days', type=int, default=getattr(settings, 'TEXT_STORE_MAX_AGE_DAYS', 30),
+            help='Delete documents not used for this many days, 0 to keep them (default: TEXT_STORE_MAX_AGE_DAYS)'
+        )
+        parser.add_argument(
+            '--max-documents', type=int, default=getattr(settings, 'TEXT_STORE_MAX_DOCUMENTS', 5000),
+            help='Then keep only this many most recently used documents, 0 for no limit (default: TEXT_STORE_MAX_DOCUMENTS)'
+        )
+
+    def handle(self, *args, **options):
+        from pdf.text_store import prune
+
+        deleted = prune(max_age_days=options['max_age_days'], max_documents=options['max_documents'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stored document(s).'))
@@ -0,0 +1,86 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+def _init_worker():
+    # Worker processes are spawned fresh, so Django has to be set up again
+    import django
+    django.setup()
+
+
+def _execute_job(job_id):
+    from pdf.jobs import run_job
+    return run_job(job_id)
+
+
+class Command(BaseCommand):
+    help = 'Run the local worker pool that processes queued background PDF jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'PDF_JOB_WORKERS', 2),
+            help='Number of worker processes (default: PDF_JOB_WORKERS)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'PDF_JOB_POLL_INTERVAL', 1.0),
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--requeue-stale', action='store_true',
+            help="Re-queue jobs left in 'running' by a previous worker that exited (single-worker deployments only)"
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is drained instead of polling forever'
+        )
+
+    def handle(self, *args, **options):
+        from pdf.jobs import claim_next_job, fail_job, requeue_stale_jobs
+
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+
+        if options['requeue_stale']:
+            requeued = requeue_stale_jobs()
+            self.stdout.write(f'Re-queued {requeued} stale job(s).')
+
+        self.stdout.write(self.style.SUCCESS(f'PDF job worker started with {workers} process(es).'))
+
+        in_flight = {}
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            try:
+                while True:
+                    for future in [f for f in in_flight if f.done()]:
+                        job_id = in_flight.pop(future)
+                        try:
+                            self.stdout.write(f'Job {job_id} finished: {future.result()}')
+                        except BrokenProcessPool as e:
+                            fail_job(job_id, f'Worker process died: {e}')
+                            raise
+                        except Exception as e:
+                            fail_job(job_id, str(e))
+                            self.stderr.write(f'Job {job_id} crashed in worker: {e}')
+
+                    claimed = False
+                    while len(in_flight) < workers:
+                        job_id = claim_next_job()
+                        if job_id is None:
+                            break
+                        claimed = True
+                        self.stdout.write(f'Job {job_id} started.')
+                        in_flight[pool.submit(_execute_job, job_id)] = job_id
+
+                    if options['once'] and not in_flight and not claimed:
+                        break
+
+                    close_old_connections()
+                    time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping PDF job worker...')
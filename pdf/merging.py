@@ -0,0 +1,97 @@
+"""
+PDF Merging Module
+Merges many PDFs with memory bounded by the largest single input.
+
+Each upload is spooled to disk and appended to an output file on disk, which
+is reopened and saved incrementally after every input. Only one input is ever
+open at a time, and the merged document is never held in memory.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pymupdf as fitz
+
+
+class PDFMergeError(ValueError):
+    """An input could not be merged (encrypted, damaged, not a PDF)."""
+
+
+def current_rss_bytes():
+    """Resident memory of this process, or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _spool_to_disk(uploaded_file, temp_dir):
+    with tempfile.NamedTemporaryFile(dir=temp_dir, suffix='.pdf', delete=False) as temp_file:
+        if hasattr(uploaded_file, 'chunks'):
+            for chunk in uploaded_file.chunks():
+                temp_file.write(chunk)
+        else:
+            shutil.copyfileobj(uploaded_file, temp_file)
+        return temp_file.name
+
+
+def merge_to_file(pdf_files, output_path, temp_dir=None):
+    """
+    Append PDFs one at a time into output_path.
+
+    Args:
+        pdf_files (list): Uploaded files (or binary file objects) in merge order
+        output_path (str): Where to write the merged PDF
+        temp_dir (str): Directory for spooled inputs
+
+    Returns:
+        dict: files_merged, total_pages, output_size and peak_rss_bytes (sampled
+            after every append; None where it can't be measured)
+    """
+    stats = {
+        'files_merged': 0,
+        'total_pages': 0,
+        'output_size': 0,
+        'peak_rss_bytes': current_rss_bytes(),
+    }
+
+    for index, pdf_file in enumerate(pdf_files):
+        file_name = getattr(pdf_file, 'name', f'file {index + 1}')
+        input_path = _spool_to_disk(pdf_file, temp_dir)
+        try:
+            try:
+                source = fitz.open(input_path, filetype='pdf')
+            except Exception:
+                raise PDFMergeError(f'Error processing PDF "{file_name}": the file could not be opened as a PDF.')
+
+            with source:
+                if source.needs_pass:
+                    raise PDFMergeError(f'PDF file "{file_name}" is encrypted. Please unlock it first.')
+
+                if index == 0:
+                    with fitz.open() as merged:
+                        merged.insert_pdf(source)
+                        merged.save(output_path, garbage=1, deflate=True)
+                else:
+                    # Reopen so only the page tree and the new pages are loaded
+                    with fitz.open(output_path) as merged:
+                        merged.insert_pdf(source)
+                        merged.saveIncr()
+
+                stats['files_merged'] += 1
+                stats['total_pages'] += source.page_count
+        finally:
+            try:
+                os.remove(input_path)
+            except OSError:
+                pass
+
+        rss = current_rss_bytes()
+        if rss is not None:
+            stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'] or 0, rss)
+
+    stats['output_size'] = os.path.getsize(output_path)
+    return stats
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pdf', '0014_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelinePDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operations', models.JSONField(default=list)),
+                ('pipeline_pdf', models.FileField(upload_to='pipeline_pdfs/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
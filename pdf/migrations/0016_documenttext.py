@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf', '0015_pipelinepdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('variant', models.CharField(choices=[('plain', 'Plain text (text layer, OCR for scanned pages)'), ('layout', 'Layout-preserving text with tables')], default='plain', max_length=10)),
+                ('page_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'variant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PageText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('method', models.CharField(choices=[('text', 'Text layer'), ('ocr', 'OCR'), ('layout', 'Layout extraction')], max_length=10)),
+                ('classification', models.CharField(blank=True, max_length=10)),
+                ('language', models.CharField(blank=True, max_length=20)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('passes', models.PositiveSmallIntegerField(default=0)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='pdf.documenttext')),
+            ],
+            options={
+                'ordering': ['page_number'],
+                'unique_together': {('document', 'page_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf', '0016_documenttext'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documenttext',
+            name='last_used_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -92,6 +92,60 @@ class OcrPdf(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+class PipelinePDF(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    operations = models.JSONField(default=list)
+    pipeline_pdf = models.FileField(upload_to='pipeline_pdfs/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Pipeline PDF {self.id}'
+
+
+class DocumentText(models.Model):
+    """Extracted text of one PDF (identified by content hash), shared by every endpoint that reads it."""
+    VARIANT_CHOICES = [
+        ('plain', 'Plain text (text layer, OCR for scanned pages)'),
+        ('layout', 'Layout-preserving text with tables'),
+    ]
+
+    content_hash = models.CharField(max_length=64)
+    variant = models.CharField(max_length=10, choices=VARIANT_CHOICES, default='plain')
+    page_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'variant')
+
+    def __str__(self):
+        return f'{self.variant} text of {self.content_hash[:12]} ({self.page_count} pages)'
+
+
+class PageText(models.Model):
+    METHOD_CHOICES = [
+        ('text', 'Text layer'),
+        ('ocr', 'OCR'),
+        ('layout', 'Layout extraction'),
+    ]
+
+    document = models.ForeignKey(DocumentText, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES)
+    classification = models.CharField(max_length=10, blank=True)
+    language = models.CharField(max_length=20, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    passes = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('document', 'page_number')
+        ordering = ['page_number']
+
+    def __str__(self):
+        return f'Page {self.page_number} of {self.document}'
+
+
 class PDFFormatConversion(models.Model):
     FORMAT_CHOICES = [
         ('word', 'Word Document'),
@@ -108,4 +162,44 @@ class PDFFormatConversion(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f'PDF to {self.output_format} - {self.id}'
\ No newline at end of file
+        return f'PDF to {self.output_format} - {self.id}'
+
+class Job(models.Model):
+    OPERATION_CHOICES = [
+        ('ocr', 'OCR to searchable PDF'),
+        ('compress', 'Compress PDF'),
+        ('pdf_to_format', 'PDF to other format'),
+        ('format_to_pdf', 'Other format to PDF'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    operation = models.CharField(max_length=30, choices=OPERATION_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    input_file = models.FileField(upload_to='jobs/inputs/', blank=True)
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    result_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Job {self.id} - {self.operation} ({self.status})'
+
+    def set_progress(self, progress):
+        """Persist progress (0-100) without touching the rest of the row."""
+        self.progress = max(0, min(100, int(progress)))
+        Job.objects.filter(pk=self.pk).update(progress=self.progress)
@@ -0,0 +1,217 @@
+"""
+OCR Backends Module
+Interchangeable ways of running Tesseract on rendered page images.
+
+'tesserocr' keeps libtesseract loaded in the process: one engine per language
+and configuration, initialized once (language data included) and reused for
+every page that process recognizes. 'pytesseract' starts a tesseract process
+per call and is the fallback when the tesserocr binding isn't installed; its
+batch mode sends several pages through one process as a multi-page TIFF.
+
+Both return image_to_data() results in pytesseract's Output.DICT layout.
+Kept free of Django imports at module level so OCR pool workers can use it.
+"""
+
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # optional: needs libtesseract and its headers to build
+    tesserocr = None
+
+
+OCR_BACKENDS = ('auto', 'tesserocr', 'pytesseract')
+TSV_COLUMNS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text',
+)
+TESSERACT_WINDOWS_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+
+def configure_tesseract():
+    """Point pytesseract at the Windows install when it is present."""
+    if os.path.exists(TESSERACT_WINDOWS_PATH):
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_WINDOWS_PATH
+
+
+def parse_tsv(tsv):
+    """Tesseract TSV output (with or without header row) -> Output.DICT style dict of columns."""
+    data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        cells = row.split('\t', len(TSV_COLUMNS) - 1)
+        if len(cells) < len(TSV_COLUMNS) - 1 or cells[0] == 'level':
+            continue
+        if len(cells) < len(TSV_COLUMNS):
+            cells.append('')
+        for column, cell in zip(TSV_COLUMNS, cells):
+            if column == 'text':
+                data[column].append(cell)
+            elif column == 'conf':
+                data[column].append(float(cell))
+            else:
+                data[column].append(int(cell))
+    return data
+
+
+def split_pages(data):
+    """Split a multi-page Output.DICT by its page_num column, in page order."""
+    pages = {}
+    for i, page_num in enumerate(data['page_num']):
+        page = pages.setdefault(page_num, {column: [] for column in data})
+        for column, values in data.items():
+            page[column].append(values[i])
+    return [pages[page_num] for page_num in sorted(pages)]
+
+
+class PytesseractBackend:
+    """Runs the tesseract executable: one process per call."""
+
+    name = 'pytesseract'
+
+    def __init__(self):
+        configure_tesseract()
+
+    def image_to_data(self, image, language, config):
+        return pytesseract.image_to_data(image, lang=language, config=config, output_type=pytesseract.Output.DICT)
+
+    def image_to_data_batch(self, images, language, config):
+        """
+        Recognize several images with a single tesseract process.
+
+        Returns:
+            list: One Output.DICT per image, in order
+        """
+        if len(images) < 2:
+            return [self.image_to_data(image, language, config) for image in images]
+
+        temp_dir = tempfile.mkdtemp(prefix='ocr_batch_')
+        try:
+            tiff_path = os.path.join(temp_dir, 'pages.tif')
+            images[0].save(tiff_path, format='TIFF', save_all=True, append_images=images[1:])
+            data = pytesseract.image_to_data(tiff_path, lang=language, config=config, output_type=pytesseract.Output.DICT)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        pages = split_pages(data)
+        if len(pages) != len(images):
+            raise RuntimeError(f'Tesseract returned {len(pages)} pages for {len(images)} images')
+        return pages
+
+    def image_to_string(self, image, language, config):
+        return pytesseract.image_to_string(image, lang=language, config=config)
+
+
+class TesserocrBackend:
+    """
+    libtesseract in-process through tesserocr.
+
+    Engines aren't thread-safe, so each thread keeps its own, keyed by
+    language and configuration.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self):
+        if tesserocr is None:
+            raise RuntimeError('tesserocr is not installed')
+        self._local = threading.local()
+
+    @staticmethod
+    def _parse_config(config):
+        """Translate pytesseract-style config ('--oem 3 --psm 6 -c name=value') into engine settings."""
+        options = {'oem': tesserocr.OEM.DEFAULT, 'psm': tesserocr.PSM.AUTO, 'variables': {}}
+        args = shlex.split(config or '')
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg in ('--oem', '--psm') and i + 1 < len(args):
+                options[arg[2:]] = int(args[i + 1])
+                i += 1
+            elif arg == '-c' and i + 1 < len(args) and '=' in args[i + 1]:
+                name, value = args[i + 1].split('=', 1)
+                options['variables'][name] = value
+                i += 1
+            i += 1
+        return options
+
+    def _engine(self, language, config):
+        engines = getattr(self._local, 'engines', None)
+        if engines is None:
+            engines = self._local.engines = {}
+
+        key = (language, config)
+        engine = engines.get(key)
+        if engine is None:
+            options = self._parse_config(config)
+            engine = tesserocr.PyTessBaseAPI(lang=language, oem=options['oem'], psm=options['psm'])
+            for name, value in options['variables'].items():
+                engine.SetVariable(name, value)
+            engines[key] = engine
+        return engine
+
+    def image_to_data(self, image, language, config):
+        engine = self._engine(language, config)
+        engine.SetImage(image)
+        engine.Recognize()
+        return parse_tsv(engine.GetTSVText(0))
+
+    def image_to_data_batch(self, images, language, config):
+        # Already in-process: batching only saves the per-call engine lookup
+        return [self.image_to_data(image, language, config) for image in images]
+
+    def image_to_string(self, image, language, config):
+        engine = self._engine(language, config)
+        engine.SetImage(image)
+        return engine.GetUTF8Text()
+
+
+_BACKEND_CLASSES = {
+    'tesserocr': TesserocrBackend,
+    'pytesseract': PytesseractBackend,
+}
+# One instance per backend per process, so engines outlive individual pages
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def resolve_backend_name(name=None):
+    """
+    Pick the backend to use: the given name, else the OCR_BACKEND setting.
+
+    'auto' prefers tesserocr when it can be imported.
+    """
+    if name is None:
+        try:
+            from django.conf import settings
+            name = getattr(settings, 'OCR_BACKEND', 'auto') if settings.configured else 'auto'
+        except ImportError:
+            name = 'auto'
+    if name not in OCR_BACKENDS:
+        raise ValueError(f'Unknown OCR backend "{name}". Choose one of: {", ".join(OCR_BACKENDS)}.')
+    if name == 'auto':
+        name = 'tesserocr' if tesserocr is not None else 'pytesseract'
+    return name
+
+
+def get_ocr_backend(name=None):
+    """Return this process's backend instance (created on first use)."""
+    name = resolve_backend_name(name)
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                try:
+                    backend = _BACKEND_CLASSES[name]()
+                except RuntimeError as e:
+                    print(f"OCR backend '{name}' unavailable ({e}), falling back to pytesseract")
+                    backend = _backends.get('pytesseract') or PytesseractBackend()
+                    _backends['pytesseract'] = backend
+                _backends[name] = backend
+    return backend
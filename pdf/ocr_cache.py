@@ -0,0 +1,75 @@
+"""
+OCR Cache Module
+Content-addressed cache of per-page Tesseract output.
+
+The key is a hash of the rendered page pixels plus language, zoom and Tesseract
+config, so re-uploads of the same document (under any filename, through any
+endpoint) reuse earlier OCR work. Entries live in a size-bounded LRU directory
+on local disk, shared by every caller in the process (see get_ocr_cache).
+"""
+
+import hashlib
+import json
+import threading
+
+from project.disk_cache import DiskLRUCache
+
+
+# Bump when the stored word format changes so old entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+_caches_lock = threading.Lock()
+_caches = {}
+
+
+class OCRCache:
+    """Stores the words Tesseract found on a rendered page (text, box, confidence, line ids)."""
+
+    def __init__(self, directory, max_bytes):
+        self.store = DiskLRUCache(directory, max_bytes)
+
+    @staticmethod
+    def make_key(pixmap, language, zoom, config, preprocess=()):
+        """Hash the rendered page content together with the OCR settings."""
+        digest = hashlib.sha256()
+        digest.update(
+            f'{CACHE_FORMAT_VERSION}|{pixmap.width}x{pixmap.height}|{pixmap.n}|{language}|{zoom}|{config}|'
+            f'{",".join(preprocess)}|'.encode()
+        )
+        digest.update(pixmap.samples_mv if hasattr(pixmap, 'samples_mv') else pixmap.samples)
+        return digest.hexdigest()
+
+    def get(self, key):
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            self.store.delete(key)
+            return None
+
+    def set(self, key, words):
+        try:
+            self.store.set(key, json.dumps(words, separators=(',', ':')).encode())
+        except OSError as e:
+            print(f"OCR cache write failed: {e}")
+
+
+def get_ocr_cache():
+    """
+    The process-wide cache for the Django settings, or None when it is disabled.
+
+    One instance per (directory, size limit), so the directory is only scanned
+    for its size once per process rather than on every page's first write.
+    """
+    from django.conf import settings
+
+    if not settings.configured or not getattr(settings, 'OCR_CACHE_ENABLED', True):
+        return None
+    key = (settings.OCR_CACHE_DIR, settings.OCR_CACHE_MAX_MB * 1024 * 1024)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = OCRCache(*key)
+    return cache
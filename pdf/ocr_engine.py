@@ -0,0 +1,512 @@
+"""
+OCR Engine Module
+Rasterizes PDF pages and runs Tesseract on them, optionally across a process pool.
+Recognition goes through the backend chosen by OCR_BACKEND (see ocr_backends).
+Zoom is chosen per page and images are preprocessed first (see ocr_preprocessing);
+each stage is timed so callers can report where the time went.
+
+The 'two_pass' strategy runs a fast low-resolution pass first and only spends
+more time where Tesseract wasn't confident: weak lines are re-read from a
+sharper crop, and pages that are weak throughout are re-read whole with
+automatic page segmentation.
+
+Kept free of Django imports so pool workers (spawned processes) can import it cheaply.
+"""
+
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf as fitz
+
+from .ocr_backends import get_ocr_backend, resolve_backend_name
+from .ocr_preprocessing import choose_zoom, preprocess, unrotate_words, default_preprocess_steps, MIN_ZOOM, MAX_ZOOM
+
+
+DEFAULT_ZOOM = 2.0  # Used when the adaptive zoom can't measure the page
+DEFAULT_CONFIG = '--oem 3 --psm 6'
+MIN_WORD_CONFIDENCE = 30
+MIN_PAGES_PER_WORKER = 2  # Below this a pool costs more to start than it saves
+MIN_TEXT_CHARS = 20  # More extracted text than this means the page already has a text layer
+OCR_BATCH_PAGES = 8  # Pages rendered and recognized together per backend call
+OCR_STAGES = ('analyze', 'render', 'preprocess', 'ocr')
+
+# 'single' reads each page once, 'two_pass' re-reads low-confidence lines or pages
+OCR_STRATEGIES = ('single', 'two_pass')
+FAST_PASS_ZOOM_FACTOR = 0.75  # First pass renders below the adaptive zoom
+REFINE_ZOOM_FACTOR = 1.5  # Second pass renders above it
+REFINE_PAGE_CONFIG = '--oem 3 --psm 3'  # Automatic page segmentation
+REFINE_LINE_CONFIG = '--oem 3 --psm 7'  # Treat the crop as a single text line
+LOW_PAGE_CONFIDENCE = 60
+LOW_LINE_CONFIDENCE = 70
+# Re-read the whole page rather than line by line when more lines than this are weak
+MAX_WEAK_LINE_RATIO = 0.5
+LINE_MARGIN_RATIO = 0.25  # Crop margin around a line, relative to its height
+
+# Page classifications
+PAGE_TEXT = 'text'
+PAGE_IMAGE = 'image'
+PAGE_SPARSE = 'sparse'
+PAGE_BLANK = 'blank'
+OCR_PAGE_CLASSES = (PAGE_IMAGE, PAGE_SPARSE)
+
+# 'hybrid' only OCRs pages that need it, 'full' OCRs every page
+OCR_MODES = ('hybrid', 'full')
+
+
+def classify_page(page):
+    """
+    Decide whether a page needs OCR.
+
+    Returns:
+        tuple: (classification, existing_text) where classification is one of
+            'text'   - born-digital page with a usable text layer
+            'image'  - little or no text, but the page shows images (scans)
+            'sparse' - little text and vector content only (e.g. outlined glyphs)
+            'blank'  - nothing to recognize
+    """
+    existing_text = page.get_text().strip()
+    if len(existing_text) > MIN_TEXT_CHARS:
+        return PAGE_TEXT, existing_text
+    if page.get_images():
+        return PAGE_IMAGE, existing_text
+    if existing_text or page.get_drawings():
+        return PAGE_SPARSE, existing_text
+    return PAGE_BLANK, existing_text
+
+
+def page_needs_ocr(classification, mode='hybrid'):
+    """Full mode OCRs everything; hybrid mode only image and sparse pages."""
+    return mode == 'full' or classification in OCR_PAGE_CLASSES
+
+
+def parse_confidence(value):
+    """Tesseract reports confidence as int, float or string depending on version."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return -1.0
+
+
+def _data_to_words(ocr_data):
+    """Keep the non-empty words of an Output.DICT as dicts with text, conf, box and block/par/line numbers."""
+    words = []
+    for i, text in enumerate(ocr_data['text']):
+        if not text.strip():
+            continue
+        words.append({
+            'text': text,
+            'conf': parse_confidence(ocr_data['conf'][i]),
+            'left': ocr_data['left'][i],
+            'top': ocr_data['top'][i],
+            'width': ocr_data['width'][i],
+            'height': ocr_data['height'][i],
+            'block': ocr_data['block_num'][i],
+            'par': ocr_data['par_num'][i],
+            'line': ocr_data['line_num'][i],
+        })
+    return words
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def recognize_page(page, language='eng', zoom=None, config=DEFAULT_CONFIG, cache=None, backend=None, preprocess_steps=None):
+    """
+    Run Tesseract on a page, going through the OCR cache when one is given.
+
+    Args:
+        page: PyMuPDF page object
+        language (str): Language code for OCR
+        zoom (float): Rasterization zoom factor (None picks one from the page)
+        config (str): Tesseract configuration
+        cache: optional OCRCache keyed on the rendered pixels and OCR settings
+        backend (str): OCR backend name (default: OCR_BACKEND setting)
+        preprocess_steps (tuple): Steps from PREPROCESS_STEPS (default: OCR_PREPROCESS setting)
+
+    Returns:
+        list: every non-empty word as a dict with text, conf, its box in image
+            pixels (left, top, width, height) and block/par/line numbers
+    """
+    return recognize_pages([page], language, zoom, config, cache, backend, preprocess_steps)[0]
+
+
+def recognize_pages(pages, language='eng', zoom=None, config=DEFAULT_CONFIG, cache=None, backend=None, preprocess_steps=None):
+    """
+    Run Tesseract on several pages with one batched backend call.
+
+    Returns:
+        list: The recognize_page() word list of each page, in order
+    """
+    results = recognize_pages_with_stats(pages, language, zoom, config, cache, backend, preprocess_steps)
+    return [result['words'] for result in results]
+
+
+def recognize_pages_with_stats(pages, language='eng', zoom=None, config=DEFAULT_CONFIG, cache=None, backend=None,
+                               preprocess_steps=None):
+    """
+    recognize_pages() that also reports how each page was processed.
+
+    zoom is None (chosen per page), one zoom for every page, or a list with
+    one zoom per page. Cached pages are answered from the cache; only the rest are preprocessed
+    and recognized. The backend time of a batch is split evenly over the
+    pages it recognized.
+
+    Returns:
+        list: Per page dicts with words, zoom, skew (degrees the image was
+            levelled by) and timings_ms per stage in OCR_STAGES
+    """
+    if preprocess_steps is None:
+        preprocess_steps = default_preprocess_steps()
+    colorspace = fitz.csGRAY if 'grayscale' in preprocess_steps else fitz.csRGB
+    page_zooms = zoom if isinstance(zoom, (list, tuple)) else [zoom] * len(pages)
+
+    results = []
+    pending = []
+    for page, zoom in zip(pages, page_zooms):
+        timings = dict.fromkeys(OCR_STAGES, 0.0)
+        result = {'words': None, 'zoom': zoom, 'skew': 0.0, 'timings_ms': timings}
+        results.append(result)
+
+        started = time.perf_counter()
+        if zoom is None:
+            result['zoom'] = choose_zoom(page, DEFAULT_ZOOM)
+        timings['analyze'] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(result['zoom'], result['zoom']), colorspace=colorspace)
+        timings['render'] = _elapsed_ms(started)
+
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(pixmap, language, result['zoom'], config, preprocess_steps)
+            result['words'] = cache.get(cache_key)
+            if result['words'] is not None:
+                continue
+
+        started = time.perf_counter()
+        image, result['skew'] = preprocess(pixmap, preprocess_steps)
+        timings['preprocess'] = _elapsed_ms(started)
+        pending.append((result, cache_key, image))
+
+    if pending:
+        started = time.perf_counter()
+        batch = get_ocr_backend(backend).image_to_data_batch([image for _, _, image in pending], language, config)
+        ocr_ms = round(_elapsed_ms(started) / len(pending), 1)
+
+        for (result, cache_key, image), ocr_data in zip(pending, batch):
+            result['timings_ms']['ocr'] = ocr_ms
+            result['words'] = unrotate_words(_data_to_words(ocr_data), result['skew'], image.width, image.height)
+            if cache is not None:
+                cache.set(cache_key, result['words'])
+    return results
+
+
+def word_confidence(words):
+    """Mean confidence of the words Tesseract scored (0 when there are none)."""
+    scores = [word['conf'] for word in words if word['conf'] >= 0]
+    return round(sum(scores) / len(scores), 2) if scores else 0
+
+
+def _lines(words):
+    """Group words by (block, par, line), keeping reading order."""
+    lines = {}
+    for word in words:
+        lines.setdefault((word['block'], word['par'], word['line']), []).append(word)
+    return lines
+
+
+def recognize_pages_two_pass(pages, language='eng', cache=None, backend=None, preprocess_steps=None):
+    """
+    Fast pass over every page, then a second look only where confidence is low.
+
+    Pass one renders at FAST_PASS_ZOOM_FACTOR of the adaptive zoom with
+    DEFAULT_CONFIG. A page whose mean confidence is below LOW_PAGE_CONFIDENCE,
+    or with more than MAX_WEAK_LINE_RATIO of its lines below
+    LOW_LINE_CONFIDENCE, is read again whole at REFINE_ZOOM_FACTOR with
+    REFINE_PAGE_CONFIG. Otherwise only its weak lines are cropped, read again
+    at that zoom as single lines and swapped in when they score higher. The
+    better reading of a page is kept, so a second pass never makes it worse.
+
+    Returns:
+        list: recognize_pages_with_stats() results with confidence, passes
+            (1 or 2), refined (None, 'lines' or 'page'), lines_refined and
+            timings_ms including a 'refine' stage
+    """
+    if preprocess_steps is None:
+        preprocess_steps = default_preprocess_steps()
+
+    base_zooms = []
+    analyze_ms = []
+    for page in pages:
+        started = time.perf_counter()
+        base_zooms.append(choose_zoom(page, DEFAULT_ZOOM))
+        analyze_ms.append(_elapsed_ms(started))
+
+    fast_zooms = [round(max(MIN_ZOOM, zoom * FAST_PASS_ZOOM_FACTOR), 2) for zoom in base_zooms]
+    results = recognize_pages_with_stats(pages, language, fast_zooms, DEFAULT_CONFIG, cache, backend, preprocess_steps)
+
+    weak_pages = []
+    for index, result in enumerate(results):
+        result['timings_ms']['analyze'] = analyze_ms[index]
+        result['timings_ms']['refine'] = 0.0
+        result.update(confidence=word_confidence(result['words']), passes=1, refined=None, lines_refined=0)
+
+        lines = _lines(result['words'])
+        weak_lines = [key for key, words in lines.items() if word_confidence(words) < LOW_LINE_CONFIDENCE]
+        if not weak_lines:
+            continue
+        if result['confidence'] < LOW_PAGE_CONFIDENCE or len(weak_lines) > len(lines) * MAX_WEAK_LINE_RATIO:
+            weak_pages.append(index)
+        else:
+            started = time.perf_counter()
+            refine_zoom = min(MAX_ZOOM, base_zooms[index] * REFINE_ZOOM_FACTOR)
+            lines_refined = _refine_lines(pages[index], result, lines, weak_lines, refine_zoom, language, backend, preprocess_steps)
+            result.update(passes=2, refined='lines', lines_refined=lines_refined)
+            result['confidence'] = word_confidence(result['words'])
+            result['timings_ms']['refine'] = _elapsed_ms(started)
+
+    if weak_pages:
+        started = time.perf_counter()
+        refine_zooms = [min(MAX_ZOOM, base_zooms[index] * REFINE_ZOOM_FACTOR) for index in weak_pages]
+        second = recognize_pages_with_stats(
+            [pages[index] for index in weak_pages], language, refine_zooms, REFINE_PAGE_CONFIG, cache, backend, preprocess_steps
+        )
+        refine_ms = round(_elapsed_ms(started) / len(weak_pages), 1)
+
+        for index, refined in zip(weak_pages, second):
+            result = results[index]
+            result['passes'] = 2
+            result['timings_ms']['refine'] = refine_ms
+            confidence = word_confidence(refined['words'])
+            if confidence > result['confidence']:
+                result.update(words=refined['words'], zoom=refined['zoom'], skew=refined['skew'], confidence=confidence, refined='page')
+    return results
+
+
+def _refine_lines(page, result, lines, weak_lines, refine_zoom, language, backend, preprocess_steps):
+    """Re-read weak lines from sharper crops and swap in the better readings. Returns the number replaced."""
+    zoom = result['zoom']
+    colorspace = fitz.csGRAY if 'grayscale' in preprocess_steps else fitz.csRGB
+    # Crops are too small to measure skew on
+    crop_steps = tuple(step for step in preprocess_steps if step != 'deskew')
+
+    crops = []
+    for key in weak_lines:
+        words = lines[key]
+        # Word boxes are displayed-page pixels at the first-pass zoom; clips are displayed-page points
+        x0 = min(word['left'] for word in words) / zoom
+        y0 = min(word['top'] for word in words) / zoom
+        x1 = max(word['left'] + word['width'] for word in words) / zoom
+        y1 = max(word['top'] + word['height'] for word in words) / zoom
+        margin = (y1 - y0) * LINE_MARGIN_RATIO
+        clip = fitz.Rect(x0 - margin, y0 - margin, x1 + margin, y1 + margin) & page.rect
+        if clip.is_empty:
+            continue
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(refine_zoom, refine_zoom), clip=clip, colorspace=colorspace)
+        image, _ = preprocess(pixmap, crop_steps)
+        crops.append((key, pixmap.x, pixmap.y, image))
+    if not crops:
+        return 0
+
+    batch = get_ocr_backend(backend).image_to_data_batch([image for _, _, _, image in crops], language, REFINE_LINE_CONFIG)
+
+    replacements = {}
+    for (key, origin_x, origin_y, _), ocr_data in zip(crops, batch):
+        new_words = _data_to_words(ocr_data)
+        if not new_words or word_confidence(new_words) <= word_confidence(lines[key]):
+            continue
+        scale = zoom / refine_zoom
+        for word in new_words:
+            # Crop pixels -> first-pass page pixels, keeping the line's place in the reading order
+            word.update(
+                left=int(round((origin_x + word['left']) * scale)),
+                top=int(round((origin_y + word['top']) * scale)),
+                width=int(round(word['width'] * scale)),
+                height=int(round(word['height'] * scale)),
+                block=key[0], par=key[1], line=key[2],
+            )
+        replacements[key] = new_words
+
+    if replacements:
+        merged = []
+        for key, words in lines.items():
+            merged.extend(replacements.get(key, words))
+        result['words'] = merged
+    return len(replacements)
+
+
+def total_timings(page_results):
+    """Add up the per-stage timings_ms of page results (pages without timings are skipped)."""
+    totals = {}
+    for page_result in page_results:
+        for stage, elapsed in page_result.get('timings_ms', {}).items():
+            totals[stage] = round(totals.get(stage, 0) + elapsed, 1)
+    return totals
+
+
+def words_to_text(words):
+    """Rebuild page text from recognized words: lines joined by newlines, blank line between paragraphs."""
+    lines = []
+    current_line = None
+    current_par = None
+    for word in words:
+        par = (word['block'], word['par'])
+        line = par + (word['line'],)
+        if line != current_line:
+            if current_par is not None and par != current_par:
+                lines.append('')
+            lines.append(word['text'])
+            current_line, current_par = line, par
+        else:
+            lines[-1] += ' ' + word['text']
+    return '\n'.join(lines)
+
+
+def _page_words(page, recognized):
+    zoom = recognized['zoom']
+    words = []
+    for word in recognized['words']:
+        if word['conf'] <= MIN_WORD_CONFIDENCE:
+            continue
+
+        x = word['left'] / zoom
+        y = word['top'] / zoom
+        words.append({
+            'text': word['text'],
+            'x0': x,
+            'y0': y,
+            'x1': x + word['width'] / zoom,
+            'y1': y + word['height'] / zoom,
+            'conf': word['conf'],
+        })
+
+    return {
+        'page_number': page.number + 1,
+        'words': words,
+        'zoom': zoom,
+        'skew': recognized['skew'],
+        'confidence': recognized.get('confidence', word_confidence(recognized['words'])),
+        'passes': recognized.get('passes', 1),
+        'timings_ms': recognized['timings_ms'],
+    }
+
+
+def recognize_with_strategy(pages, language='eng', config=DEFAULT_CONFIG, cache=None, backend=None, preprocess_steps=None,
+                            strategy='single'):
+    """recognize_pages_with_stats() for 'single', recognize_pages_two_pass() for 'two_pass'."""
+    if strategy not in OCR_STRATEGIES:
+        raise ValueError(f'Invalid OCR strategy. Choose from: {", ".join(OCR_STRATEGIES)}')
+    if strategy == 'two_pass':
+        return recognize_pages_two_pass(pages, language, cache, backend, preprocess_steps)
+    return recognize_pages_with_stats(pages, language, None, config, cache, backend, preprocess_steps)
+
+
+def ocr_page_words(page, language='eng', zoom=None, config=DEFAULT_CONFIG, cache=None, backend=None, preprocess_steps=None,
+                   strategy='single'):
+    """
+    OCR a single page for the invisible text layer.
+
+    Args:
+        page: PyMuPDF page object
+        language (str): Language code for OCR
+        zoom (float): Rasterization zoom factor (None picks one from the page; 'single' strategy only)
+        config (str): Tesseract configuration
+        cache: optional OCRCache
+        backend (str): OCR backend name (default: OCR_BACKEND setting)
+        preprocess_steps (tuple): Steps from PREPROCESS_STEPS (default: OCR_PREPROCESS setting)
+        strategy (str): One of OCR_STRATEGIES
+
+    Returns:
+        dict: page_number, the confident words with boxes scaled back to PDF
+            coordinates, the zoom and skew used, mean confidence, passes and
+            timings_ms per stage
+    """
+    return ocr_pages_words([page], language, zoom, config, cache, backend, preprocess_steps, strategy)[0]
+
+
+def ocr_pages_words(pages, language='eng', zoom=None, config=DEFAULT_CONFIG, cache=None, backend=None, preprocess_steps=None,
+                    strategy='single'):
+    """ocr_page_words() for several pages, recognized in one batch."""
+    if zoom is not None and strategy == 'single':
+        recognized = recognize_pages_with_stats(pages, language, zoom, config, cache, backend, preprocess_steps)
+    else:
+        recognized = recognize_with_strategy(pages, language, config, cache, backend, preprocess_steps, strategy)
+    return [_page_words(page, result) for page, result in zip(pages, recognized)]
+
+
+def resolve_worker_count(workers, page_count, min_pages_per_worker=MIN_PAGES_PER_WORKER):
+    """Turn a configured worker count (0/None = all cores) into what is worth starting."""
+    cores = os.cpu_count() or 1
+    if not workers or workers <= 0:
+        workers = cores
+    return max(1, min(workers, cores, page_count // min_pages_per_worker))
+
+
+# Each pool worker opens the document once and keeps it (and its OCR engine) for all of its pages
+_worker_document = None
+_worker_cache = None
+_worker_backend = None
+
+
+def _init_page_worker(pdf_path, cache, backend):
+    global _worker_document, _worker_cache, _worker_backend
+    _worker_document = fitz.open(pdf_path)
+    _worker_cache = cache
+    _worker_backend = backend
+    # Load the engine (and its language data) before the first page arrives
+    get_ocr_backend(backend)
+
+
+def _ocr_batch_in_worker(task):
+    page_nums, language, zoom, config, preprocess_steps, strategy = task
+    pages = [_worker_document[page_num] for page_num in page_nums]
+    return ocr_pages_words(pages, language, zoom, config, _worker_cache, _worker_backend, preprocess_steps, strategy)
+
+
+def _batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def ocr_pages(pdf_path, page_numbers, language='eng', zoom=None, config=DEFAULT_CONFIG, workers=1, cache=None,
+              backend=None, preprocess_steps=None, strategy='single'):
+    """
+    OCR the given pages of a PDF, yielding one result per page in page order.
+
+    Pages are recognized in batches of up to OCR_BATCH_PAGES per backend call.
+    With more than one worker the batches are rasterized and recognized in a
+    process pool; results are still yielded in the order of page_numbers so
+    callers can merge them into the document as they arrive. Pages already in
+    the OCR cache are not sent to Tesseract again. strategy is one of
+    OCR_STRATEGIES (see recognize_pages_two_pass()).
+    """
+    if strategy not in OCR_STRATEGIES:
+        raise ValueError(f'Invalid OCR strategy. Choose from: {", ".join(OCR_STRATEGIES)}')
+    page_numbers = list(page_numbers)
+    workers = resolve_worker_count(workers, len(page_numbers))
+    # Resolved here because spawned workers don't have Django settings loaded
+    backend = resolve_backend_name(backend)
+    if preprocess_steps is None:
+        preprocess_steps = default_preprocess_steps()
+
+    if workers == 1:
+        with fitz.open(pdf_path) as pdf_document:
+            for batch in _batches(page_numbers, OCR_BATCH_PAGES):
+                pages = [pdf_document[page_num] for page_num in batch]
+                yield from ocr_pages_words(pages, language, zoom, config, cache, backend, preprocess_steps, strategy)
+        return
+
+    # Smaller batches when there are few pages, so every worker gets some
+    batch_size = max(1, min(OCR_BATCH_PAGES, len(page_numbers) // workers))
+    tasks = [(batch, language, zoom, config, preprocess_steps, strategy) for batch in _batches(page_numbers, batch_size)]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_page_worker,
+        initargs=(pdf_path, cache, backend)
+    ) as pool:
+        for results in pool.map(_ocr_batch_in_worker, tasks):
+            yield from results
@@ -0,0 +1,215 @@
+"""
+OCR Preprocessing Module
+Chooses the rasterization zoom for a page and cleans up the rendered image
+before Tesseract sees it.
+
+Zoom is picked so text lines come out around TARGET_LINE_PX pixels tall,
+estimated from a cheap 72 DPI grayscale render (row ink projection). When no
+text lines can be measured, the resolution of the page's main embedded image
+is used instead, so scans aren't rendered above the detail they contain.
+
+Preprocessing steps (all NumPy, all optional):
+    grayscale - render one channel instead of RGB (a third of the pixels to encode and hand over)
+    binarize  - Otsu threshold to pure black and white
+    deskew    - estimate the text angle from projection profiles and rotate it level
+"""
+
+import math
+
+import numpy as np
+import pymupdf as fitz
+from PIL import Image
+
+
+PREPROCESS_STEPS = ('grayscale', 'binarize', 'deskew')
+DEFAULT_PREPROCESS = ('grayscale',)
+
+MIN_ZOOM = 1.0
+MAX_ZOOM = 5.0  # 360 DPI
+# Tesseract is most accurate with text lines roughly this many pixels tall
+TARGET_LINE_PX = 30
+# Embedded images covering less of the page than this don't set the zoom
+MIN_IMAGE_COVERAGE = 0.5
+MIN_TEXT_LINES = 3
+
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.25
+# Skew is measured on a downsampled copy at most this wide
+SKEW_ANALYSIS_WIDTH = 800
+MIN_SKEW_DEGREES = 0.2  # Smaller angles aren't worth rotating for
+
+
+def parse_preprocess_steps(value):
+    """
+    Normalize a preprocessing option ("grayscale,deskew", a list, or empty) into a tuple of steps.
+
+    Raises:
+        ValueError: on an unknown step
+    """
+    if value is None:
+        return DEFAULT_PREPROCESS
+    if isinstance(value, str):
+        value = [step.strip() for step in value.split(',')]
+    steps = tuple(step for step in PREPROCESS_STEPS if step in value)
+    unknown = set(value) - set(PREPROCESS_STEPS) - {'', 'none'}
+    if unknown:
+        raise ValueError(f'Unknown preprocessing step(s): {", ".join(sorted(unknown))}. Choose from: {", ".join(PREPROCESS_STEPS)}.')
+    return steps
+
+
+def default_preprocess_steps():
+    """The OCR_PREPROCESS setting when Django is configured, else DEFAULT_PREPROCESS."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return parse_preprocess_steps(getattr(settings, 'OCR_PREPROCESS', None))
+    except ImportError:
+        pass
+    return DEFAULT_PREPROCESS
+
+
+def otsu_threshold(gray):
+    """Otsu's threshold for a uint8 grayscale array."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    if not total:
+        return 128
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = total - weight_dark
+    cumulative_mean = np.cumsum(histogram * levels)
+    mean_dark = cumulative_mean / np.maximum(weight_dark, 1)
+    mean_light = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_light, 1)
+    between_class = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between_class))
+
+
+def _gray_array(pixmap):
+    samples = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+    if pixmap.n == 1:
+        return samples[:, :, 0]
+    # ITU-R 601 luma, integer math
+    return ((samples[:, :, 0].astype(np.uint16) * 77 + samples[:, :, 1] * 150 + samples[:, :, 2] * 29) >> 8).astype(np.uint8)
+
+
+def estimate_line_height(page):
+    """
+    Median text line height in points, from the ink rows of a 72 DPI render.
+
+    Returns:
+        float: Line height, or None when fewer than MIN_TEXT_LINES lines are found
+    """
+    gray = _gray_array(page.get_pixmap(colorspace=fitz.csGRAY))
+    ink = gray < otsu_threshold(gray)
+    # A row is part of a text line when more than a sliver of it is inked
+    text_rows = ink.sum(axis=1) > max(2, gray.shape[1] // 200)
+
+    # Lengths of runs of consecutive text rows
+    edges = np.diff(np.concatenate(([0], text_rows.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    heights = ends - starts
+    heights = heights[heights >= 2]
+    if len(heights) < MIN_TEXT_LINES:
+        return None
+    return float(np.median(heights))
+
+
+def source_image_zoom(page):
+    """Zoom matching the resolution of the image covering most of the page, or None."""
+    page_area = abs(page.rect)
+    best_zoom, best_area = None, 0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info['bbox'])
+        area = abs(bbox)
+        if not page_area or area < page_area * MIN_IMAGE_COVERAGE or area <= best_area or not bbox.width:
+            continue
+        best_zoom, best_area = info['width'] / bbox.width, area
+    return best_zoom
+
+
+def choose_zoom(page, fallback_zoom):
+    """
+    Rasterization zoom for OCR: from the measured text line height, else the
+    main image's resolution, else fallback_zoom.
+    """
+    line_height = estimate_line_height(page)
+    if line_height:
+        zoom = TARGET_LINE_PX / line_height
+    else:
+        zoom = source_image_zoom(page) or fallback_zoom
+    return round(min(MAX_ZOOM, max(MIN_ZOOM, zoom)), 2)
+
+
+def estimate_skew(binary):
+    """
+    Text angle in degrees (positive when lines fall to the right), by maximizing
+    the variance of the row projection over candidate shears.
+    """
+    step = max(1, math.ceil(binary.shape[1] / SKEW_ANALYSIS_WIDTH))
+    ys, xs = np.nonzero(binary[::step, ::step])
+    if len(ys) < 100:
+        return 0.0
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + SKEW_STEP_DEGREES / 2, SKEW_STEP_DEGREES):
+        # Row each ink pixel lands on once the angle is undone
+        rows = np.round(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+        profile = np.bincount(rows - rows.min())
+        score = float(np.dot(profile, profile))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def preprocess(pixmap, steps):
+    """
+    Turn a rendered page into the image handed to Tesseract.
+
+    Args:
+        pixmap: Page pixmap (grayscale when 'grayscale' is among the steps)
+        steps (tuple): Preprocessing steps from PREPROCESS_STEPS
+
+    Returns:
+        tuple: (PIL image, skew angle in degrees that the image was rotated by)
+    """
+    if pixmap.n == 1:
+        image = Image.frombytes('L', [pixmap.width, pixmap.height], pixmap.samples)
+    else:
+        image = Image.frombytes('RGB', [pixmap.width, pixmap.height], pixmap.samples)
+    if 'binarize' not in steps and 'deskew' not in steps:
+        return image, 0.0
+
+    gray = _gray_array(pixmap)
+    threshold = otsu_threshold(gray)
+
+    skew = 0.0
+    if 'deskew' in steps:
+        skew = estimate_skew(gray < threshold)
+        if abs(skew) < MIN_SKEW_DEGREES:
+            skew = 0.0
+
+    if 'binarize' in steps:
+        image = Image.fromarray(np.where(gray < threshold, 0, 255).astype(np.uint8), 'L')
+    if skew:
+        # PIL turns counter-clockwise as displayed, which levels lines falling to the right
+        fill = 255 if image.mode == 'L' else (255, 255, 255)
+        image = image.rotate(skew, resample=Image.BILINEAR, fillcolor=fill)
+    return image, skew
+
+
+def unrotate_words(words, skew, width, height):
+    """Move word boxes found on a deskewed image back onto the image as rendered."""
+    if not skew:
+        return words
+    angle = math.radians(skew)
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    center_x, center_y = width / 2, height / 2
+    for word in words:
+        # Undo the counter-clockwise turn (y axis points down) around the image center
+        x = word['left'] + word['width'] / 2 - center_x
+        y = word['top'] + word['height'] / 2 - center_y
+        original_x = x * cos_a - y * sin_a
+        original_y = x * sin_a + y * cos_a
+        word['left'] = int(round(center_x + original_x - word['width'] / 2))
+        word['top'] = int(round(center_y + original_y - word['height'] / 2))
+    return words
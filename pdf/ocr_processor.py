@@ -6,10 +6,12 @@ Automatically processes PDF files and extracts text using OCR technology.
 import os
 import fitz  # PyMuPDF
 import pytesseract
-from PIL import Image
 from io import BytesIO
 import json
 
+from .ocr_engine import classify_page, recognize_with_strategy, word_confidence, OCR_STRATEGIES, PAGE_TEXT, PAGE_BLANK
+from .ocr_cache import get_ocr_cache
+
 
 class PDFOCRProcessor:
     """
@@ -17,15 +19,24 @@ class PDFOCRProcessor:
     Automatically detects existing text and performs OCR on scanned content.
     """
     
-    def __init__(self, tesseract_path=None):
+    def __init__(self, tesseract_path=None, cache=None, strategy=None):
         """
         Initialize the OCR processor.
         
         Args:
             tesseract_path (str): Path to tesseract executable if not in PATH
+            cache: OCRCache to reuse page results (defaults to the configured one)
+            strategy (str): 'single' or 'two_pass' (defaults to the OCR_STRATEGY setting)
         """
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self.cache = cache if cache is not None else get_ocr_cache()
+        if strategy is None:
+            from django.conf import settings
+            strategy = getattr(settings, 'OCR_STRATEGY', 'single') if settings.configured else 'single'
+        if strategy not in OCR_STRATEGIES:
+            raise ValueError(f"Invalid OCR strategy. Choose from: {', '.join(OCR_STRATEGIES)}")
+        self.strategy = strategy
     
     def process_pdf(self, pdf_path, output_format='text', language='eng'):
         """
@@ -47,23 +58,25 @@ class PDFOCRProcessor:
             'total_pages': 0,
             'pages_with_existing_text': 0,
             'pages_requiring_ocr': 0,
+            'pages_reprocessed': 0,
+            'strategy': self.strategy,
             'extracted_text': [],
             'processing_status': 'success',
             'errors': []
         }
         
         try:
-            with fitz.open(pdf_path) as pdf_document:
-                results['total_pages'] = pdf_document.page_count
+            for page_result in self.iter_pages(pdf_path, language):
+                results['extracted_text'].append(page_result)
                 
-                for page_num in range(pdf_document.page_count):
-                    page_result = self._process_page(pdf_document, page_num, language)
-                    results['extracted_text'].append(page_result)
-                    
-                    if page_result['has_existing_text']:
-                        results['pages_with_existing_text'] += 1
-                    else:
-                        results['pages_requiring_ocr'] += 1
+                if page_result['has_existing_text']:
+                    results['pages_with_existing_text'] += 1
+                else:
+                    results['pages_requiring_ocr'] += 1
+                if page_result['passes'] > 1:
+                    results['pages_reprocessed'] += 1
+            
+            results['total_pages'] = len(results['extracted_text'])
                         
         except Exception as e:
             results['processing_status'] = 'error'
@@ -71,7 +84,34 @@ class PDFOCRProcessor:
         
         return self._format_output(results, output_format)
     
-    def _process_page(self, pdf_document, page_num, language='eng'):
+    def iter_pages(self, pdf_path, language='eng'):
+        """
+        Process a PDF page by page, yielding each page result as soon as it is done.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            language (str): Language code for OCR
+            
+        Yields:
+            dict: Page processing results (see _process_page)
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        with fitz.open(pdf_path) as pdf_document:
+            # Pages other endpoints already extracted (or OCR'd) are not processed again
+            stored = self._open_stored_document(pdf_path, pdf_document)
+            try:
+                for page_num in range(pdf_document.page_count):
+                    yield self._process_page(pdf_document, page_num, language, stored)
+                    if stored is not None:
+                        stored.flush_batch()
+            finally:
+                # New page results are written in bulk, also when the caller stops early
+                if stored is not None:
+                    stored.flush()
+    
+    def _process_page(self, pdf_document, page_num, language='eng', stored=None):
         """
         Process a single page of the PDF.
         
@@ -79,38 +119,94 @@ class PDFOCRProcessor:
             pdf_document: PyMuPDF document object
             page_num (int): Page number to process
             language (str): Language code for OCR
+            stored: StoredDocument from the text store, read first and filled on a miss
             
         Returns:
             dict: Page processing results
         """
+        stored_page = stored.get(page_num + 1) if stored is not None else None
+        if stored_page is not None and self._reusable(stored_page, language):
+            return self._stored_page_result(stored_page)
+        
         page = pdf_document[page_num]
         page_result = {
             'page_number': page_num + 1,
             'has_existing_text': False,
             'text': '',
             'ocr_performed': False,
-            'confidence': None
+            'confidence': None,
+            'passes': 0,
+            'classification': None
         }
         
         try:
-            # First, try to extract existing text
-            existing_text = page.get_text().strip()
+            # First, classify the page (shared with the searchable PDF builder)
+            classification, existing_text = classify_page(page)
+            page_result['classification'] = classification
             
-            if existing_text and len(existing_text) > 20:  # Substantial text exists
+            if classification == PAGE_TEXT:  # Substantial text exists
                 page_result['text'] = existing_text
                 page_result['has_existing_text'] = True
+            elif classification == PAGE_BLANK:  # Nothing for Tesseract to find
+                page_result['text'] = existing_text
             else:
                 # Perform OCR on the page
                 ocr_result = self._perform_ocr_on_page(page, language)
                 page_result['text'] = ocr_result['text']
                 page_result['ocr_performed'] = True
                 page_result['confidence'] = ocr_result['confidence']
+                for key in ('passes', 'refined', 'timings_ms'):
+                    if key in ocr_result:
+                        page_result[key] = ocr_result[key]
+                if 'error' in ocr_result:
+                    page_result['error'] = ocr_result['error']
+            
+            if stored is not None and 'error' not in page_result:
+                stored.put(
+                    page_num + 1,
+                    page_result['text'],
+                    'ocr' if page_result['ocr_performed'] else 'text',
+                    classification=classification,
+                    language=language if page_result['ocr_performed'] else '',
+                    confidence=page_result['confidence'],
+                    passes=page_result['passes'],
+                )
                 
         except Exception as e:
             page_result['error'] = str(e)
         
         return page_result
     
+    @staticmethod
+    def _open_stored_document(pdf_path, pdf_document):
+        """The document's entry in the shared text store (None outside Django, e.g. the command line)."""
+        from django.conf import settings
+        
+        if not settings.configured:
+            return None
+        from .text_store import open_document
+        return open_document(pdf_path, pdf_document=pdf_document)
+    
+    @staticmethod
+    def _reusable(stored_page, language):
+        """Text-layer and blank pages are final; scanned pages only once OCR'd in this language."""
+        if stored_page['classification'] in (PAGE_TEXT, PAGE_BLANK):
+            return True
+        return stored_page['method'] == 'ocr' and stored_page['language'] == language
+    
+    @staticmethod
+    def _stored_page_result(stored_page):
+        return {
+            'page_number': stored_page['page_number'],
+            'has_existing_text': stored_page['classification'] == PAGE_TEXT,
+            'text': stored_page['text'],
+            'ocr_performed': stored_page['method'] == 'ocr',
+            'confidence': stored_page['confidence'],
+            'passes': stored_page['passes'],
+            'classification': stored_page['classification'],
+            'from_store': True
+        }
+    
     def _perform_ocr_on_page(self, page, language='eng'):
         """
         Perform OCR on a single PDF page.
@@ -123,36 +219,19 @@ class PDFOCRProcessor:
             dict: OCR results with text and confidence
         """
         try:
-            # Convert page to high-resolution image
-            matrix = fitz.Matrix(2.0, 2.0)  # 2x zoom for better OCR
-            pixmap = page.get_pixmap(matrix=matrix)
-            image = Image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
-            
-            # Perform OCR with confidence data
-            ocr_data = pytesseract.image_to_data(
-                image, 
-                lang=language, 
-                output_type=pytesseract.Output.DICT,
-                config='--oem 3 --psm 6'
-            )
-            
-            # Extract text and calculate average confidence
-            words = []
-            confidences = []
+            # Render at an adaptive zoom and OCR, reusing cached results for identical pages
+            recognized = recognize_with_strategy([page], language, cache=self.cache, strategy=self.strategy)[0]
+            ocr_words = recognized['words']
             
-            for i, word in enumerate(ocr_data['text']):
-                if word.strip():
-                    words.append(word)
-                    conf = ocr_data['conf'][i]
-                    if conf > 0:
-                        confidences.append(conf)
-            
-            text = ' '.join(words)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            # Extract text; confidence is the mean over the words Tesseract scored
+            text = ' '.join(word['text'] for word in ocr_words)
             
             return {
                 'text': text,
-                'confidence': round(avg_confidence, 2)
+                'confidence': recognized.get('confidence', word_confidence(ocr_words)),
+                'passes': recognized.get('passes', 1),
+                'refined': recognized.get('refined'),
+                'timings_ms': recognized['timings_ms']
             }
             
         except Exception as e:
@@ -175,11 +254,7 @@ class PDFOCRProcessor:
         """
         if output_format == 'text':
             # Return plain text
-            all_text = []
-            for page in results['extracted_text']:
-                if page['text'].strip():
-                    all_text.append(f"--- Page {page['page_number']} ---\n{page['text']}")
-            return '\n\n'.join(all_text)
+            return self.format_text(results)
         
         elif output_format == 'json':
             # Return JSON string
@@ -192,6 +267,22 @@ class PDFOCRProcessor:
         else:
             raise ValueError(f"Unsupported output format: {output_format}")
     
+    def format_text(self, results):
+        """
+        Build the plain text output from structured results.
+        
+        Args:
+            results (dict): Structured processing results
+            
+        Returns:
+            str: Page-delimited text content
+        """
+        all_text = []
+        for page in results['extracted_text']:
+            if page['text'].strip():
+                all_text.append(f"--- Page {page['page_number']} ---\n{page['text']}")
+        return '\n\n'.join(all_text)
+    
     def extract_text_only(self, pdf_path, language='eng'):
         """
         Quick method to extract only the text content.
@@ -247,7 +338,7 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python ocr_processor.py <pdf_file_path> [output_format]")
+        print("Usage: python -m pdf.ocr_processor <pdf_file_path> [output_format]")
         sys.exit(1)
     
     pdf_file = sys.argv[1]
@@ -0,0 +1,220 @@
+"""
+PDF Pipeline Module
+Runs an ordered list of operations (unlock, merge, compress, stamp, organize,
+rotate, protect) on a single open PyMuPDF document.
+
+The document is parsed once and written once: no intermediate files are
+serialized, re-parsed or stored between steps.
+"""
+
+import time
+
+import pymupdf as fitz
+
+from .compression import COMPRESSION_PROFILES, PDFCompressor, save_compact
+from .stamping import TextStamp, DEFAULT_FONT_SIZE, DEFAULT_OPACITY
+
+
+PIPELINE_OPERATIONS = ('unlock', 'merge', 'compress', 'stamp', 'organize', 'rotate', 'protect')
+MAX_PIPELINE_STEPS = 20
+
+# Same defaults as ProtectPDFView
+PROTECT_PERMISSIONS = {
+    'allow_printing': (fitz.PDF_PERM_PRINT | fitz.PDF_PERM_PRINT_HQ, True),
+    'allow_copying': (fitz.PDF_PERM_COPY, True),
+    'allow_editing': (fitz.PDF_PERM_MODIFY, False),
+    'allow_comments': (fitz.PDF_PERM_ANNOTATE, True),
+    'allow_form_filling': (fitz.PDF_PERM_FORM, True),
+    'allow_document_assembly': (fitz.PDF_PERM_ASSEMBLE, False),
+}
+
+
+class PipelineError(ValueError):
+    """A step is invalid or cannot be applied to the document."""
+
+
+def _page_list(value, name):
+    if isinstance(value, str):
+        value = value.strip('[]').split(',')
+    try:
+        return [int(page) for page in value]
+    except (TypeError, ValueError):
+        raise PipelineError(f'"{name}" must be a list of page numbers.')
+
+
+def validate_steps(steps, attachments=None):
+    """
+    Check step names and parameters before any work is done.
+
+    Args:
+        steps (list): [{"op": "unlock", "password": "..."}, {"op": "compress", "level": "recommended"}, ...]
+        attachments (dict): Uploaded files that merge steps may reference by field name
+
+    Returns:
+        list: The validated steps
+
+    Raises:
+        PipelineError: on the first invalid step
+    """
+    attachments = attachments or {}
+    if not isinstance(steps, list) or not steps:
+        raise PipelineError('operations must be a non-empty list.')
+    if len(steps) > MAX_PIPELINE_STEPS:
+        raise PipelineError(f'A pipeline can have at most {MAX_PIPELINE_STEPS} operations.')
+
+    for index, step in enumerate(steps, 1):
+        if not isinstance(step, dict) or step.get('op') not in PIPELINE_OPERATIONS:
+            raise PipelineError(f'Operation {index}: "op" must be one of {", ".join(PIPELINE_OPERATIONS)}.')
+        op = step['op']
+
+        if op in ('unlock', 'protect') and not step.get('password'):
+            raise PipelineError(f'Operation {index} ({op}): password is required.')
+        elif op == 'merge':
+            files = step.get('files') or []
+            if not files or any(name not in attachments for name in files):
+                raise PipelineError(f'Operation {index} (merge): "files" must list uploaded file fields.')
+        elif op == 'compress' and step.get('level', 'recommended') not in COMPRESSION_PROFILES:
+            raise PipelineError(f'Operation {index} (compress): invalid compression level.')
+        elif op == 'stamp':
+            try:
+                TextStamp(
+                    step.get('text'),
+                    font_size=step.get('font_size', DEFAULT_FONT_SIZE),
+                    opacity=step.get('opacity', DEFAULT_OPACITY),
+                    rotation=step.get('rotation', 0),
+                    position=step.get('position', 'center'),
+                )
+            except ValueError as e:
+                raise PipelineError(f'Operation {index} (stamp): {e}')
+        elif op == 'organize':
+            if not step.get('order') and not step.get('delete'):
+                raise PipelineError(f'Operation {index} (organize): either order or delete is required.')
+            _page_list(step.get('order') or step.get('delete'), 'order' if step.get('order') else 'delete')
+        elif op == 'rotate':
+            try:
+                degrees = int(step.get('degrees', 90))
+            except (TypeError, ValueError):
+                degrees = None
+            if degrees is None or degrees % 90:
+                raise PipelineError(f'Operation {index} (rotate): degrees must be a multiple of 90.')
+            if step.get('pages'):
+                _page_list(step['pages'], 'pages')
+    return steps
+
+
+class PDFPipeline:
+    """Applies validated steps to one document and saves it once."""
+
+    def __init__(self, steps, attachments=None):
+        self.attachments = attachments or {}
+        self.steps = validate_steps(steps, self.attachments)
+        self.encryption = None
+        self.compress_on_save = False
+
+    def run(self, pdf_path, output_path):
+        """
+        Run every step on the PDF at pdf_path and write the result to output_path.
+
+        Returns:
+            dict: page_count and per-step stats (page count after the step, duration)
+        """
+        step_stats = []
+        with fitz.open(pdf_path) as pdf_document:
+            for step in self.steps:
+                if pdf_document.is_encrypted and step['op'] != 'unlock':
+                    raise PipelineError('PDF file is encrypted. Add an "unlock" operation first.')
+
+                started = time.perf_counter()
+                details = getattr(self, f'_{step["op"]}')(pdf_document, step) or {}
+                step_stats.append({
+                    'op': step['op'],
+                    'page_count': pdf_document.page_count,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                    **details,
+                })
+
+            page_count = pdf_document.page_count
+            self._save(pdf_document, output_path)
+
+        return {'page_count': page_count, 'steps': step_stats}
+
+    def _save(self, pdf_document, output_path):
+        # An unlocked input is written without encryption unless a protect step asked for it
+        encryption = self.encryption or {'encryption': fitz.PDF_ENCRYPT_NONE}
+        if self.compress_on_save:
+            save_compact(pdf_document, output_path, **encryption)
+        else:
+            pdf_document.save(output_path, garbage=3, deflate=True, **encryption)
+
+    def _unlock(self, pdf_document, step):
+        if pdf_document.is_encrypted and not pdf_document.authenticate(step['password']):
+            raise PipelineError('Invalid password')
+
+    def _merge(self, pdf_document, step):
+        for name in step['files']:
+            uploaded_file = self.attachments[name]
+            uploaded_file.seek(0)
+            try:
+                source = fitz.open(stream=uploaded_file.read(), filetype='pdf')
+            except Exception:
+                raise PipelineError(f'Error processing PDF "{uploaded_file.name}": the file could not be opened as a PDF.')
+            with source:
+                if source.needs_pass:
+                    raise PipelineError(f'PDF file "{uploaded_file.name}" is encrypted. Please unlock it first.')
+                pdf_document.insert_pdf(source)
+        return {'files_merged': len(step['files'])}
+
+    def _compress(self, pdf_document, step):
+        stats = {'images_recompressed': 0, 'images_skipped': 0}
+        PDFCompressor(step.get('level', 'recommended')).compress_document(pdf_document, stats)
+        self.compress_on_save = True
+        return {'images_recompressed': stats['images_recompressed']}
+
+    def _stamp(self, pdf_document, step):
+        stamp = TextStamp(
+            str(step['text']),
+            font_size=step.get('font_size', DEFAULT_FONT_SIZE),
+            opacity=step.get('opacity', DEFAULT_OPACITY),
+            rotation=step.get('rotation', 0),
+            position=step.get('position', 'center'),
+        )
+        try:
+            stats = stamp.apply(pdf_document, step.get('pages'))
+        except ValueError as e:
+            raise PipelineError(str(e))
+        return {'pages_stamped': stats['pages_stamped']}
+
+    def _organize(self, pdf_document, step):
+        page_count = pdf_document.page_count
+        if step.get('order'):
+            order = _page_list(step['order'], 'order')
+            if sorted(order) != list(range(1, page_count + 1)):
+                raise PipelineError('Invalid page order. Please enter a valid order.')
+            pdf_document.select([page_number - 1 for page_number in order])
+        else:
+            pages_to_delete = set(_page_list(step['delete'], 'delete'))
+            keep = [page_num for page_num in range(page_count) if page_num + 1 not in pages_to_delete]
+            if not keep:
+                raise PipelineError('Cannot delete every page of the document.')
+            pdf_document.select(keep)
+
+    def _rotate(self, pdf_document, step):
+        degrees = int(step.get('degrees', 90))
+        pages = _page_list(step['pages'], 'pages') if step.get('pages') else range(1, pdf_document.page_count + 1)
+        for page_number in pages:
+            if not 1 <= page_number <= pdf_document.page_count:
+                raise PipelineError(f'Page {page_number} does not exist ({pdf_document.page_count} pages).')
+            page = pdf_document[page_number - 1]
+            page.set_rotation((page.rotation + degrees) % 360)
+
+    def _protect(self, pdf_document, step):
+        permissions = 0
+        for option, (flag, default) in PROTECT_PERMISSIONS.items():
+            if str(step.get(option, default)).lower() == 'true':
+                permissions |= flag
+        self.encryption = {
+            'encryption': fitz.PDF_ENCRYPT_AES_256,
+            'user_pw': step['password'],
+            'owner_pw': step['password'] + '_owner',
+            'permissions': permissions,
+        }
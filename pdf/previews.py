@@ -0,0 +1,186 @@
+"""
+Page Preview Module
+Small on-demand page renders (thumbnails) for the organize, split and sign screens.
+
+A document is uploaded once and stored under the SHA-256 of its bytes. Page
+renders are cached by document hash, page number, width and format. Both
+stores are size-bounded LRU directories on local disk, so a repeat preview is
+a single file read.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+import pymupdf as fitz
+
+from project.disk_cache import DiskLRUCache
+from .rendering import render_page, render_pages
+
+
+THUMBNAIL_FORMATS = {'jpeg': 'image/jpeg', 'png': 'image/png'}
+DEFAULT_THUMBNAIL_WIDTH = 200
+MIN_THUMBNAIL_WIDTH = 32
+MAX_THUMBNAIL_WIDTH = 1024
+MAX_PREFETCH_PAGES = 200
+# Bump when the render settings change so old cached images are ignored
+RENDER_CACHE_VERSION = 1
+
+DOCUMENT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_services_lock = threading.Lock()
+_services = {}
+
+
+class PreviewNotFound(LookupError):
+    """Unknown (or evicted) document, or a page outside it."""
+
+
+class PreviewService:
+    """Stores preview source documents and their cached page renders."""
+
+    def __init__(self, directory, max_source_bytes, max_render_bytes, workers=1):
+        self.sources = DiskLRUCache(os.path.join(directory, 'sources'), max_source_bytes)
+        self.renders = DiskLRUCache(os.path.join(directory, 'renders'), max_render_bytes)
+        self.workers = workers
+
+    @staticmethod
+    def validate_options(width, output_format):
+        if output_format not in THUMBNAIL_FORMATS:
+            raise ValueError(f'output_format must be one of: {", ".join(THUMBNAIL_FORMATS)}.')
+        if not MIN_THUMBNAIL_WIDTH <= width <= MAX_THUMBNAIL_WIDTH:
+            raise ValueError(f'width must be between {MIN_THUMBNAIL_WIDTH} and {MAX_THUMBNAIL_WIDTH}.')
+
+    def add_document(self, uploaded_file):
+        """
+        Store an uploaded PDF under its content hash (re-uploads are free).
+
+        Returns:
+            tuple: (document_id, page_count)
+
+        Raises:
+            ValueError: if the file is not a readable, unencrypted PDF
+        """
+        os.makedirs(self.sources.directory, exist_ok=True)
+        digest = hashlib.sha256()
+        # Spool next to the store so it can be moved in without a copy
+        fd, temp_path = tempfile.mkstemp(dir=self.sources.directory, prefix='.tmp-', suffix='.pdf')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            document_id = digest.hexdigest()
+
+            existing_path = self.sources.path(document_id)
+            if existing_path:
+                with fitz.open(existing_path) as pdf_document:
+                    return document_id, pdf_document.page_count
+
+            try:
+                pdf_document = fitz.open(temp_path, filetype='pdf')
+            except Exception:
+                raise ValueError('The file could not be opened as a PDF.')
+            with pdf_document:
+                if pdf_document.needs_pass:
+                    raise ValueError('PDF file is encrypted. Please unlock it first.')
+                page_count = pdf_document.page_count
+
+            self.sources.set_file(document_id, temp_path)
+            return document_id, page_count
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def document_path(self, document_id):
+        if not DOCUMENT_ID_PATTERN.match(document_id or ''):
+            raise PreviewNotFound('Unknown document.')
+        path = self.sources.path(document_id)
+        if path is None:
+            raise PreviewNotFound('Unknown document. Upload it again to preview its pages.')
+        return path
+
+    @staticmethod
+    def _render_key(document_id, page_number, width, output_format):
+        key = f'{RENDER_CACHE_VERSION}|{document_id}|{page_number}|{width}|{output_format}'
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def thumbnail_etag(self, document_id, page_number, width, output_format):
+        """Stable validator for a render (cache hits touch the file, so its mtime keeps changing)."""
+        return '"' + self._render_key(document_id, page_number, width, output_format)[:32] + '"'
+
+    def thumbnail_path(self, document_id, page_number, width=DEFAULT_THUMBNAIL_WIDTH, output_format='jpeg'):
+        """
+        Return the path of the cached render of a page (1-based), rendering it on a miss.
+
+        Raises:
+            PreviewNotFound: unknown document or page out of range
+        """
+        self.validate_options(width, output_format)
+        key = self._render_key(document_id, page_number, width, output_format)
+        cached_path = self.renders.path(key)
+        if cached_path:
+            return cached_path
+
+        with fitz.open(self.document_path(document_id)) as pdf_document:
+            if not 1 <= page_number <= pdf_document.page_count:
+                raise PreviewNotFound(f'Page {page_number} does not exist ({pdf_document.page_count} pages).')
+            image_data = render_page(pdf_document[page_number - 1], output_format, width=width)
+
+        self.renders.set(key, image_data)
+        return self.renders.path(key)
+
+    def prefetch(self, document_id, first_page, last_page, width=DEFAULT_THUMBNAIL_WIDTH, output_format='jpeg'):
+        """
+        Render every page in [first_page, last_page] that is not cached yet.
+
+        Returns:
+            dict: first_page, last_page (clamped to the document), rendered and cached counts
+        """
+        self.validate_options(width, output_format)
+        source_path = self.document_path(document_id)
+        with fitz.open(source_path) as pdf_document:
+            page_count = pdf_document.page_count
+
+        last_page = min(last_page, page_count, first_page + MAX_PREFETCH_PAGES - 1)
+        if first_page < 1 or first_page > last_page:
+            raise ValueError(f'Invalid page range for a document with {page_count} pages.')
+
+        missing = [
+            page_number for page_number in range(first_page, last_page + 1)
+            if self.renders.path(self._render_key(document_id, page_number, width, output_format)) is None
+        ]
+        if missing:
+            selection = ','.join(str(page_number) for page_number in missing)
+            for page_number, image_data in render_pages(
+                source_path, selection, output_format, workers=self.workers, width=width
+            ):
+                self.renders.set(self._render_key(document_id, page_number, width, output_format), image_data)
+
+        return {
+            'first_page': first_page,
+            'last_page': last_page,
+            'rendered': len(missing),
+            'cached': last_page - first_page + 1 - len(missing),
+        }
+
+
+def get_preview_service():
+    """The process-wide preview service for the Django settings (its stores are scanned once per process)."""
+    from django.conf import settings
+
+    key = (
+        settings.PREVIEW_CACHE_DIR,
+        settings.PREVIEW_SOURCE_MAX_MB * 1024 * 1024,
+        settings.PREVIEW_CACHE_MAX_MB * 1024 * 1024,
+        getattr(settings, 'RENDER_WORKERS', 0),
+    )
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            directory, max_source_bytes, max_render_bytes, workers = key
+            service = _services[key] = PreviewService(directory, max_source_bytes, max_render_bytes, workers=workers)
+    return service
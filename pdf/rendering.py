@@ -0,0 +1,136 @@
+"""
+Rendering Module
+Rasterizes PDF pages to JPEG/PNG, optionally across a process pool.
+
+Images are encoded straight from the PyMuPDF pixmap (no PIL round-trip).
+Kept free of Django imports so pool workers (spawned processes) can import it cheaply.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf as fitz
+
+from .ocr_engine import resolve_worker_count
+
+
+DEFAULT_DPI = 144  # Same as the old 2x zoom matrix
+MIN_DPI = 36
+MAX_DPI = 600
+JPEG_QUALITY = 95
+# Rendering a page is much cheaper than OCR, so a worker needs more pages to pay off
+MIN_PAGES_PER_RENDER_WORKER = 8
+
+
+class PageSelectionError(ValueError):
+    """Malformed page selection, or one that selects no page of the document."""
+
+
+def parse_page_selection(pages, page_count):
+    """
+    Turn a page selection like "1,3-5,8" into sorted, 0-based page numbers.
+
+    Args:
+        pages (str): Selection string; empty/None selects every page
+        page_count (int): Number of pages in the document
+
+    Returns:
+        list: 0-based page numbers
+
+    Raises:
+        PageSelectionError: if the selection is malformed or selects nothing
+    """
+    if not pages or not str(pages).strip():
+        return list(range(page_count))
+
+    selected = set()
+    for part in str(pages).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise PageSelectionError(f'Invalid page selection: "{part}"')
+        if start < 1 or end < start:
+            raise PageSelectionError(f'Invalid page selection: "{part}"')
+        selected.update(range(start - 1, min(end, page_count)))
+
+    if not selected:
+        raise PageSelectionError(f'Page selection "{pages}" is outside the document ({page_count} pages)')
+    return sorted(selected)
+
+
+def render_page(page, output_format='jpeg', dpi=DEFAULT_DPI, max_dimension=None, width=None):
+    """
+    Render one page and encode it.
+
+    Args:
+        page: PyMuPDF page object
+        output_format (str): 'jpeg' or 'png'
+        dpi (int): Target resolution
+        max_dimension (int): Optional cap, in pixels, on the longer image side
+        width (int): Exact image width in pixels; overrides dpi (used for thumbnails)
+
+    Returns:
+        bytes: Encoded image
+    """
+    scale = width / page.rect.width if width else dpi / 72
+    if max_dimension:
+        longest_side = max(page.rect.width, page.rect.height)
+        scale = min(scale, max_dimension / longest_side)
+
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+    if output_format.lower() == 'png':
+        return pixmap.tobytes('png')
+    return pixmap.tobytes('jpg', jpg_quality=JPEG_QUALITY)
+
+
+# Each pool worker opens the document once and keeps it for all of its pages
+_worker_document = None
+
+
+def _init_render_worker(pdf_path):
+    global _worker_document
+    _worker_document = fitz.open(pdf_path)
+
+
+def _render_page_in_worker(task):
+    page_num, output_format, dpi, max_dimension, width = task
+    return page_num + 1, render_page(_worker_document[page_num], output_format, dpi, max_dimension, width)
+
+
+def render_pages(pdf_path, pages=None, output_format='jpeg', dpi=DEFAULT_DPI, max_dimension=None, workers=1, width=None):
+    """
+    Render the selected pages of a PDF, yielding (page_number, image bytes) in page order.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages (str): Page selection like "1,3-5"; all pages when empty
+        output_format (str): 'jpeg' or 'png'
+        dpi (int): Target resolution
+        max_dimension (int): Optional cap on the longer image side in pixels
+        workers (int): Processes to render with (0/None = all cores)
+        width (int): Exact image width in pixels instead of dpi
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        page_numbers = parse_page_selection(pages, pdf_document.page_count)
+        workers = resolve_worker_count(workers, len(page_numbers), MIN_PAGES_PER_RENDER_WORKER)
+
+        if workers == 1:
+            for page_num in page_numbers:
+                yield page_num + 1, render_page(pdf_document[page_num], output_format, dpi, max_dimension, width)
+            return
+
+    tasks = [(page_num, output_format, dpi, max_dimension, width) for page_num in page_numbers]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_render_worker,
+        initargs=(pdf_path,)
+    ) as pool:
+        yield from pool.map(_render_page_in_worker, tasks)
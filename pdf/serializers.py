@@ -2,7 +2,7 @@
 from rest_framework import serializers
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
-from .models import OcrPdf, ProtectedPDF, MergedPDF, CompressedPDF, SplitPDF, PDFImageConversion, StampPdf, WordToPdfConversion, WordToPdf, OrganizedPdf, UnlockPdf, PDFFormatConversion
+from .models import OcrPdf, ProtectedPDF, MergedPDF, CompressedPDF, SplitPDF, PDFImageConversion, StampPdf, WordToPdfConversion, WordToPdf, OrganizedPdf, UnlockPdf, PDFFormatConversion, Job
 
 
 class ProtectPDFRequestSerializer(serializers.Serializer):
@@ -30,6 +30,10 @@ class CompressPDFRequestSerializer(serializers.Serializer):
         choices=[('extreme', 'extreme'), ('recommended', 'recommended'), ('less', 'less')],
         default='recommended'
     )
+    background = serializers.BooleanField(
+        default=False,
+        help_text='Queue as a background job and return 202 with a job id'
+    )
 
 
 class SplitPDFRequestSerializer(serializers.Serializer):
@@ -86,6 +90,12 @@ class SplitPDFRequestSerializer(serializers.Serializer):
         help_text='SIZE MODE: Unit for max_file_size'
     )
     
+    stream = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text='Stream all parts back as one ZIP download instead of saving them'
+    )
+    
     def validate(self, data):
         split_mode = data.get('split_mode', 'range')
         
@@ -124,6 +134,20 @@ class UnlockPDFRequestSerializer(serializers.Serializer):
 class StampPDFRequestSerializer(serializers.Serializer):
     input_pdf = serializers.FileField(required=True)
     text = serializers.CharField(required=True)
+    font_size = serializers.FloatField(required=False, default=36, min_value=4, max_value=400)
+    opacity = serializers.FloatField(required=False, default=0.3, min_value=0.01, max_value=1)
+    rotation = serializers.FloatField(required=False, default=0, help_text='Counter-clockwise angle in degrees, e.g. 45 for a diagonal watermark')
+    position = serializers.ChoiceField(
+        choices=[
+            ('center', 'Center'),
+            ('top-left', 'Top left'), ('top-center', 'Top center'), ('top-right', 'Top right'),
+            ('middle-left', 'Middle left'), ('middle-right', 'Middle right'),
+            ('bottom-left', 'Bottom left'), ('bottom-center', 'Bottom center'), ('bottom-right', 'Bottom right'),
+        ],
+        required=False,
+        default='center'
+    )
+    pages = serializers.CharField(required=False, allow_blank=True, help_text='Pages to stamp, e.g. "1,3-5" (default: all pages)')
 
 
 class OcrPDFRequestSerializer(serializers.Serializer):
@@ -138,6 +162,31 @@ class OcrPDFRequestSerializer(serializers.Serializer):
         default='eng',
         help_text='Language for OCR text recognition'
     )
+    ocr_mode = serializers.ChoiceField(
+        choices=[
+            ('hybrid', 'Only OCR pages without a text layer'),
+            ('full', 'OCR every page'),
+        ],
+        required=False,
+        help_text='Hybrid skips born-digital and blank pages (default: OCR_MODE setting)'
+    )
+    preprocess = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text='Comma separated preprocessing steps: grayscale, binarize, deskew (default: OCR_PREPROCESS setting)'
+    )
+    ocr_strategy = serializers.ChoiceField(
+        choices=[
+            ('single', 'Read each page once'),
+            ('two_pass', 'Fast pass, then re-read low-confidence lines or pages'),
+        ],
+        required=False,
+        help_text='Defaults to the OCR_STRATEGY setting'
+    )
+    background = serializers.BooleanField(
+        default=False,
+        help_text='Queue as a background job and return 202 with a job id'
+    )
 
 
 class PDFToFormatRequestSerializer(serializers.Serializer):
@@ -153,6 +202,64 @@ class PDFToFormatRequestSerializer(serializers.Serializer):
         ],
         required=True
     )
+    dpi = serializers.IntegerField(
+        required=False,
+        default=144,
+        min_value=36,
+        max_value=600,
+        help_text='Resolution for jpeg/png output'
+    )
+    pages = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text='Pages to render for jpeg/png output, e.g. "1,3-5" (default: all pages)'
+    )
+    max_dimension = serializers.IntegerField(
+        required=False,
+        min_value=16,
+        help_text='Cap on the longer side of each image, in pixels'
+    )
+    background = serializers.BooleanField(
+        default=False,
+        help_text='Queue as a background job and return 202 with a job id'
+    )
+
+
+class FormatToPDFRequestSerializer(serializers.Serializer):
+    input_file = serializers.FileField(required=True)
+    input_format = serializers.CharField(
+        required=False,
+        help_text='Input format such as docx, xlsx, csv, pptx, txt, rtf or an image type. Defaults to the file extension.'
+    )
+    background = serializers.BooleanField(
+        default=False,
+        help_text='Queue as a background job and return 202 with a job id'
+    )
+
+
+class PipelinePDFRequestSerializer(serializers.Serializer):
+    input_pdf = serializers.FileField(required=True)
+    operations = serializers.CharField(
+        required=True,
+        help_text=(
+            'JSON list of steps run in order on one document, e.g. '
+            '[{"op": "unlock", "password": "secret"}, {"op": "merge", "files": ["appendix"]}, '
+            '{"op": "compress", "level": "recommended"}, {"op": "stamp", "text": "DRAFT"}]. '
+            'Supported ops: unlock, merge, compress, stamp, organize, rotate, protect. '
+            'Files for merge steps are uploaded as extra fields and referenced by field name.'
+        )
+    )
+
+
+class PreviewPDFRequestSerializer(serializers.Serializer):
+    input_pdf = serializers.FileField(required=True)
+
+
+class PrefetchThumbnailsRequestSerializer(serializers.Serializer):
+    first_page = serializers.IntegerField(min_value=1, default=1)
+    last_page = serializers.IntegerField(min_value=1, required=False, help_text='Defaults to first_page + 19')
+    width = serializers.IntegerField(min_value=32, max_value=1024, default=200)
+    output_format = serializers.ChoiceField(choices=[('jpeg', 'JPEG'), ('png', 'PNG')], default='jpeg')
 
 
 class ProtectedPDFSerializer(serializers.ModelSerializer):
@@ -289,4 +396,19 @@ class PDFFormatConversionSerializer(serializers.ModelSerializer):
         if request and obj.converted_file:
             protocol = 'https' if request.is_secure() else 'http'
             return f'{protocol}://{request.get_host()}{obj.converted_file.url}'
-        return None
\ No newline at end of file
+        return None
+
+
+class JobSerializer(serializers.ModelSerializer):
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'operation', 'status', 'progress', 'result_url', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+
+    def get_result_url(self, obj):
+        request = self.context.get('request')
+        if request and obj.result_path:
+            protocol = 'https' if request.is_secure() else 'http'
+            return f'{protocol}://{request.get_host()}{obj.result_path}'
+        return None
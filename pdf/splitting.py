@@ -0,0 +1,127 @@
+"""
+PDF Splitting Module
+Size-aware splitting that runs in linear time.
+
+Each page's contribution is estimated from the objects it references
+(content streams, fonts, images, ...). Objects already counted for the current
+part are not counted again, so shared resources are charged once per part.
+A real write only happens at part boundaries to confirm the estimate; if the
+part came out too big it backs off and writes again.
+"""
+
+import re
+
+import pymupdf as fitz
+
+
+REFERENCE_PATTERN = re.compile(rb'(\d+) 0 R')
+# Fixed cost of a part's own catalog, page tree, trailer and xref table
+PART_OVERHEAD_BYTES = 1024
+# Per-object cost in the xref table and object header
+OBJECT_OVERHEAD_BYTES = 40
+
+
+class PageSizeEstimator:
+    """Estimates the bytes each page adds to a part, charging shared objects once."""
+
+    def __init__(self, pdf_document):
+        self.pdf_document = pdf_document
+        self._object_info = {}  # xref -> (size, referenced xrefs)
+
+    def _info(self, xref):
+        info = self._object_info.get(xref)
+        if info is not None:
+            return info
+
+        pdf_document = self.pdf_document
+        try:
+            source = pdf_document.xref_object(xref, compressed=True)
+        except Exception:
+            info = (0, ())
+            self._object_info[xref] = info
+            return info
+
+        # Never follow links into other pages or the page tree (/Parent, annotation /P, ...)
+        object_type = pdf_document.xref_get_key(xref, 'Type')[1]
+        if object_type in ('/Page', '/Pages', '/Catalog'):
+            info = (0, ())
+            self._object_info[xref] = info
+            return info
+
+        size = len(source) + OBJECT_OVERHEAD_BYTES
+        if pdf_document.xref_is_stream(xref):
+            length_type, length = pdf_document.xref_get_key(xref, 'Length')
+            if length_type == 'int':
+                size += int(length)
+            else:
+                size += len(pdf_document.xref_stream_raw(xref) or b'')
+
+        children = tuple(int(ref) for ref in REFERENCE_PATTERN.findall(source.encode()))
+        info = (size, children)
+        self._object_info[xref] = info
+        return info
+
+    def page_objects(self, page_number):
+        """Return {xref: size} for the page object and everything it references."""
+        page_xref = self.pdf_document.page_xref(page_number)
+        page_source = self.pdf_document.xref_object(page_xref, compressed=True)
+        page_source = re.sub(r'/Parent \d+ 0 R', '', page_source)
+
+        objects = {page_xref: len(page_source) + OBJECT_OVERHEAD_BYTES}
+        stack = [int(ref) for ref in REFERENCE_PATTERN.findall(page_source.encode())]
+        while stack:
+            xref = stack.pop()
+            if xref in objects or xref == 0:
+                continue
+            size, children = self._info(xref)
+            objects[xref] = size
+            stack.extend(children)
+        return objects
+
+
+def write_page_range(pdf_document, start_page, end_page):
+    """Copy pages start_page..end_page (0-based, inclusive) into a new PDF and return its bytes."""
+    with fitz.open() as part_document:
+        part_document.insert_pdf(pdf_document, from_page=start_page, to_page=end_page)
+        return part_document.tobytes(garbage=3, deflate=True)
+
+
+def iter_size_parts(pdf_document, max_bytes):
+    """
+    Split a document into consecutive page ranges of at most max_bytes each.
+
+    A single page larger than max_bytes becomes a part on its own.
+
+    Yields:
+        tuple: (start_page, end_page, pdf bytes) with 1-based, inclusive page numbers
+    """
+    estimator = PageSizeEstimator(pdf_document)
+    page_count = pdf_document.page_count
+
+    start = 0
+    while start < page_count:
+        # Grow the part page by page on estimates alone
+        seen_objects = set()
+        estimate = PART_OVERHEAD_BYTES
+        end = start
+        while end < page_count:
+            page_objects = estimator.page_objects(end)
+            added = sum(size for xref, size in page_objects.items() if xref not in seen_objects)
+            if end > start and estimate + added > max_bytes:
+                break
+            seen_objects.update(page_objects)
+            estimate += added
+            end += 1
+        end -= 1
+
+        # Confirm with a real write, backing off while the part is still too big.
+        # Pages are dropped in proportion to the overshoot so this stays a few writes.
+        part_bytes = write_page_range(pdf_document, start, end)
+        while len(part_bytes) > max_bytes and end > start:
+            page_total = end - start + 1
+            keep = min(page_total - 1, max(1, int(page_total * max_bytes / len(part_bytes))))
+            end = start + keep - 1
+            part_bytes = write_page_range(pdf_document, start, end)
+
+        yield start + 1, end + 1, part_bytes
+        start = end + 1
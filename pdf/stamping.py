@@ -0,0 +1,217 @@
+"""
+PDF Stamping Module
+Text watermarks drawn once and shared across pages.
+
+One overlay page is built per distinct visible page size and embedded as a
+form XObject with show_pdf_page() the first time a page of that geometry is
+stamped. Every later page with the same geometry reuses that XObject and the
+same invocation content stream by reference. Pages only gain a resource entry
+and two entries in their /Contents array, so stamping a long document costs
+about as much as copying it and the output doesn't grow by a stream per page.
+"""
+
+import math
+import re
+
+import pymupdf as fitz
+
+from .rendering import parse_page_selection
+
+
+STAMP_POSITIONS = (
+    'center',
+    'top-left', 'top-center', 'top-right',
+    'middle-left', 'middle-right',
+    'bottom-left', 'bottom-center', 'bottom-right',
+)
+DEFAULT_FONT_SIZE = 36
+DEFAULT_OPACITY = 0.3
+STAMP_MARGIN = 36
+
+
+class TextStamp:
+    """
+    A text watermark with font size, opacity, rotation and position.
+    """
+
+    def __init__(self, text, font_size=DEFAULT_FONT_SIZE, opacity=DEFAULT_OPACITY, rotation=0, position='center'):
+        """
+        Args:
+            text (str): Stamp text
+            font_size (float): Font size in points
+            opacity (float): 0 (invisible) to 1 (opaque)
+            rotation (float): Counter-clockwise angle in degrees (45 gives a rising diagonal)
+            position (str): One of STAMP_POSITIONS, relative to the page as displayed
+
+        Raises:
+            ValueError: on invalid options
+        """
+        if not text:
+            raise ValueError('No stamp text provided.')
+        try:
+            font_size = float(font_size)
+            opacity = float(opacity)
+            rotation = float(rotation)
+        except (TypeError, ValueError):
+            raise ValueError('font_size, opacity and rotation must be numbers.')
+        if not 4 <= font_size <= 400:
+            raise ValueError('font_size must be between 4 and 400.')
+        if not 0 < opacity <= 1:
+            raise ValueError('opacity must be greater than 0 and at most 1.')
+        if position not in STAMP_POSITIONS:
+            raise ValueError(f'position must be one of: {", ".join(STAMP_POSITIONS)}.')
+
+        self.text = text
+        self.font_size = font_size
+        self.opacity = opacity
+        self.rotation = rotation % 360
+        self.position = position
+        self.font = fitz.Font('helv')
+
+    def apply(self, pdf_document, pages=None):
+        """
+        Stamp pages of an open document in place.
+
+        Args:
+            pdf_document: Open PyMuPDF document
+            pages (str): Page selection like "1,3-5"; all pages when empty
+
+        Returns:
+            dict: pages_stamped and overlays (distinct overlay XObjects used)
+        """
+        page_numbers = parse_page_selection(pages, pdf_document.page_count)
+
+        # Build every overlay before showing any: the overlay document can't grow
+        # once pages of it have been grafted into the target.
+        overlay_document = fitz.open()
+        overlay_pages = {}
+        for page_num in page_numbers:
+            size = self._visible_size(pdf_document[page_num])
+            if size not in overlay_pages:
+                overlay_pages[size] = self._draw_overlay(overlay_document, *size)
+
+        # Page geometry -> (resource name, XObject reference, invocation stream xref)
+        placements = {}
+        self._wrap_xrefs = None
+        for page_num in page_numbers:
+            page = pdf_document[page_num]
+            geometry = (tuple(page.mediabox), tuple(page.cropbox), page.rotation)
+            placement = placements.get(geometry)
+            if placement is None or not self._reuse_placement(pdf_document, page, placement):
+                placements[geometry] = self._show_overlay(page, overlay_document, overlay_pages[self._visible_size(page)])
+
+        overlay_document.close()
+        return {'pages_stamped': len(page_numbers), 'overlays': len(overlay_pages)}
+
+    def _show_overlay(self, page, overlay_document, overlay_page_number):
+        """Embed the overlay on a page and return its placement for reuse (None if it can't be reused)."""
+        # Target rectangle is the unrotated page; rotating the overlay with the
+        # page keeps the stamp upright as the page is displayed
+        page.show_pdf_page(
+            page.rect * page.derotation_matrix,
+            overlay_document,
+            overlay_page_number,
+            rotate=page.rotation,
+            overlay=True,
+        )
+        pdf_document = page.parent
+        invoke_xref = page.get_contents()[-1]
+        match = re.search(rb'/(\S+)\s+Do', pdf_document.xref_stream(invoke_xref) or b'')
+        if not match:
+            return None
+        name = match.group(1).decode()
+        # The name refers to a small wrapper XObject (placement matrix) around the shared overlay
+        kind, reference = pdf_document.xref_get_key(page.xref, f'Resources/XObject/{name}')
+        if kind != 'xref':
+            return None
+        return name, reference, invoke_xref
+
+    def _reuse_placement(self, pdf_document, page, placement):
+        """Point a page at an already embedded overlay; False when the page needs its own."""
+        if placement is None:
+            return False
+        name, reference, invoke_xref = placement
+
+        target = self._xobject_dict(pdf_document, page)
+        if target is None:
+            return False
+        xref, key = target
+        kind, value = pdf_document.xref_get_key(xref, key + name)
+        if kind == 'null':
+            # Usually done once: deduplicated documents share one /Resources object
+            pdf_document.xref_set_key(xref, key + name, reference)
+        elif value != reference:
+            return False
+
+        # Shared "q" / "Q" streams isolate the page's own graphics state from the stamp
+        if self._wrap_xrefs is None:
+            self._wrap_xrefs = tuple(self._new_stream(pdf_document, data) for data in (b'q\n', b'\nQ\n'))
+        open_xref, close_xref = self._wrap_xrefs
+        contents = [open_xref, *page.get_contents(), close_xref, invoke_xref]
+        pdf_document.xref_set_key(page.xref, 'Contents', '[' + ' '.join(f'{xref} 0 R' for xref in contents) + ']')
+        return True
+
+    @staticmethod
+    def _xobject_dict(pdf_document, page):
+        """
+        Locate the page's /XObject resource dictionary as (xref, key prefix).
+
+        xref_set_key() can't write through indirect objects, so follow them here.
+        Returns None for pages inheriting /Resources from the page tree (adding
+        our own would hide the inherited ones).
+        """
+        xref, prefix = page.xref, 'Resources/'
+        kind, value = pdf_document.xref_get_key(xref, 'Resources')
+        if kind == 'xref':
+            xref, prefix = int(value.split()[0]), ''
+        elif kind != 'dict':
+            return None
+
+        kind, value = pdf_document.xref_get_key(xref, prefix + 'XObject')
+        if kind == 'xref':
+            return int(value.split()[0]), ''
+        return xref, prefix + 'XObject/'
+
+    @staticmethod
+    def _new_stream(pdf_document, data):
+        xref = pdf_document.get_new_xref()
+        pdf_document.update_object(xref, '<<>>')
+        pdf_document.update_stream(xref, data)
+        return xref
+
+    @staticmethod
+    def _visible_size(page):
+        return round(page.rect.width, 2), round(page.rect.height, 2)
+
+    def _draw_overlay(self, overlay_document, width, height):
+        """Draw the stamp on a new overlay page of the given size and return its number."""
+        overlay_page = overlay_document.new_page(width=width, height=height)
+
+        text_width = self.font.text_length(self.text, fontsize=self.font_size)
+        ascender = self.font.ascender * self.font_size
+        descender = self.font.descender * self.font_size
+        text_height = ascender - descender
+
+        # Size of the rotated text's bounding box, for placing it against the margins
+        angle = math.radians(self.rotation)
+        box_width = abs(text_width * math.cos(angle)) + abs(text_height * math.sin(angle))
+        box_height = abs(text_width * math.sin(angle)) + abs(text_height * math.cos(angle))
+
+        vertical, _, horizontal = self.position.partition('-') if self.position != 'center' else ('middle', '', 'center')
+        center_x = {
+            'left': STAMP_MARGIN + box_width / 2,
+            'center': width / 2,
+            'right': width - STAMP_MARGIN - box_width / 2,
+        }[horizontal]
+        center_y = {
+            'top': STAMP_MARGIN + box_height / 2,
+            'middle': height / 2,
+            'bottom': height - STAMP_MARGIN - box_height / 2,
+        }[vertical]
+
+        writer = fitz.TextWriter(overlay_page.rect, opacity=self.opacity)
+        baseline = fitz.Point(center_x - text_width / 2, center_y + (ascender + descender) / 2)
+        writer.append(baseline, self.text, font=self.font, fontsize=self.font_size)
+        # Matrix(angle) turns counter-clockwise as the page is displayed
+        writer.write_text(overlay_page, morph=(fitz.Point(center_x, center_y), fitz.Matrix(self.rotation)))
+        return overlay_page.number
@@ -1,3 +1,70 @@
-from django.test import TestCase
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
 
-# Create your tests here.
+import pymupdf as fitz
+from django.test import SimpleTestCase
+
+from .ocr_cache import OCRCache
+from .ocr_engine import ocr_pages
+from .pipeline import PDFPipeline
+
+
+class OCRCachePoolTests(SimpleTestCase):
+    """The OCR cache is handed to spawned pool workers, so it has to survive pickling."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_cache_pickles_for_pool_workers(self):
+        cache = OCRCache(self.directory, 1024 * 1024)
+        words = [{'text': 'Agreement', 'conf': 96.0}]
+        cache.set('ab' * 32, words)
+
+        worker_cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(worker_cache.get('ab' * 32), words)
+        worker_cache.set('cd' * 32, words)
+        self.assertEqual(cache.get('cd' * 32), words)
+
+    @unittest.skipUnless(
+        shutil.which('tesseract') and (os.cpu_count() or 1) > 1, 'needs the tesseract executable and several cores'
+    )
+    def test_ocr_pages_in_pool_with_cache(self):
+        pdf_path = os.path.join(self.directory, 'scan.pdf')
+        with fitz.open() as pdf_document:
+            for number in range(1, 7):
+                page = pdf_document.new_page()
+                page.insert_text((72, 144), f'Page {number} of the agreement', fontsize=24)
+            pdf_document.save(pdf_path)
+
+        cache = OCRCache(os.path.join(self.directory, 'ocr'), 16 * 1024 * 1024)
+        results = list(ocr_pages(pdf_path, range(6), workers=2, cache=cache, backend='pytesseract'))
+
+        self.assertEqual([result['page_number'] for result in results], [1, 2, 3, 4, 5, 6])
+        self.assertTrue(all(result['words'] for result in results))
+        self.assertTrue(os.listdir(cache.store.directory))
+
+
+class PDFPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.pdf_path = os.path.join(self.directory, 'input.pdf')
+        with fitz.open() as pdf_document:
+            for number in range(1, 5):
+                page = pdf_document.new_page()
+                page.insert_text((72, 72), f'Clause {number}. The parties agree to the terms below.')
+            pdf_document.save(self.pdf_path)
+
+    def test_compress_then_protect_writes_a_readable_document(self):
+        output_path = os.path.join(self.directory, 'output.pdf')
+        PDFPipeline([{'op': 'compress'}, {'op': 'protect', 'password': 'new'}]).run(self.pdf_path, output_path)
+
+        with fitz.open(output_path) as output:
+            self.assertTrue(output.needs_pass)
+            self.assertTrue(output.authenticate('new'))
+            self.assertEqual(output.page_count, 4)
+            self.assertIn('Clause 4.', output[3].get_text())
@@ -0,0 +1,114 @@
+"""
+Text Layer Module
+Writes OCR words onto a page as invisible, selectable text.
+
+Each page gets one content stream holding all of its words (text render
+mode 3), drawn with a single non-embedded Helvetica resource that is shared
+by every page of the document. Replaces an insert_textbox()/insert_text() call
+per word, which appended a stream fragment per word and dominated the cost of
+dense pages.
+"""
+
+import pymupdf as fitz
+
+
+FONT_NAME = 'helv'
+# Word boxes are glyph boxes; a slightly smaller font sits better on the line
+FONT_SIZE_RATIO = 0.75
+BASELINE_RATIO = 0.85
+
+
+def _number(value):
+    """Compact PDF number (2 decimals, no trailing zeros)."""
+    formatted = f'{value:.2f}'.rstrip('0').rstrip('.')
+    return '0' if formatted in ('', '-0') else formatted
+
+
+def _pdf_string(text):
+    """Literal PDF string in WinAnsi (cp1252) encoding."""
+    encoded = text.encode('cp1252', errors='replace')
+    return '(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)').decode('latin-1') + ')'
+
+
+class TextLayerWriter:
+    """
+    Adds invisible text layers to the pages of one document.
+    """
+
+    def __init__(self, pdf_document):
+        self.pdf_document = pdf_document
+        self.font = fitz.Font(FONT_NAME)
+        self._advances = {}
+        self._save_state_xref = None
+
+    def _text_width(self, text):
+        """Advance width of text at font size 1."""
+        width = 0
+        for char in text:
+            advance = self._advances.get(char)
+            if advance is None:
+                advance = self._advances[char] = self.font.glyph_advance(ord(char))
+            width += advance
+        return width
+
+    def write_page(self, page, words):
+        """
+        Add words to a page as one invisible text block.
+
+        Args:
+            page: PyMuPDF page object
+            words (list): Dicts with text, x0, y0, x1, y1 in displayed-page points (as from ocr_page_words)
+
+        Returns:
+            int: Number of words written
+        """
+        # Displayed (rotated, y-down) page coordinates -> PDF user space
+        to_pdf = page.derotation_matrix * ~page.transformation_matrix
+        linear = fitz.Matrix(to_pdf.a, to_pdf.b, to_pdf.c, to_pdf.d, 0, 0)
+        right = fitz.Point(1, 0) * linear
+        up = fitz.Point(0, -1) * linear
+
+        operators = []
+        for word_box in words:
+            text = word_box['text'].strip()
+            box_width = word_box['x1'] - word_box['x0']
+            box_height = word_box['y1'] - word_box['y0']
+            if not text or box_width <= 0 or box_height <= 0:
+                continue
+
+            font_size = box_height * FONT_SIZE_RATIO
+            # Stretch or squeeze horizontally so a selection covers exactly the word box
+            text_width = self._text_width(text) * font_size
+            horizontal_scale = box_width / text_width if text_width else 1
+
+            x, y = word_box['x0'], word_box['y0'] + box_height * BASELINE_RATIO
+            text_matrix = (
+                right.x * font_size * horizontal_scale, right.y * font_size * horizontal_scale,
+                up.x * font_size, up.y * font_size,
+                x * to_pdf.a + y * to_pdf.c + to_pdf.e, x * to_pdf.b + y * to_pdf.d + to_pdf.f,
+            )
+            operators.append(f'{" ".join(map(_number, text_matrix))} Tm {_pdf_string(text + " ")} Tj')
+
+        if not operators:
+            return 0
+
+        page.insert_font(fontname=FONT_NAME)
+        # "Q" closes the "q" put in front of the page's own content, so the text is placed in default user space
+        stream = '\n'.join(['Q', 'BT', '3 Tr', f'/{FONT_NAME} 1 Tf', *operators, 'ET', '']).encode('latin-1')
+        self._append_content(page, stream)
+        return len(operators)
+
+    def _append_content(self, page, stream):
+        pdf_document = self.pdf_document
+        if self._save_state_xref is None:
+            self._save_state_xref = self._new_stream(b'q\n')
+
+        xref = self._new_stream(stream)
+        contents = [self._save_state_xref, *page.get_contents(), xref]
+        pdf_document.xref_set_key(page.xref, 'Contents', '[' + ' '.join(f'{item} 0 R' for item in contents) + ']')
+
+    def _new_stream(self, data):
+        xref = self.pdf_document.get_new_xref()
+        self.pdf_document.update_object(xref, '<<>>')
+        self.pdf_document.update_stream(xref, data)
+        return xref
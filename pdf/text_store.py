@@ -0,0 +1,308 @@
+"""
+Text Store Module
+Per-page text of PDFs, keyed by a SHA-256 of the file content and kept in the
+database (DocumentText / PageText).
+
+Every endpoint that needs a PDF's text (summarizer, legal chat, extract_text,
+PDF to text) reads it from here first and fills missing pages on a miss, so a
+document is parsed once no matter which endpoint sees it first or under which
+filename. Pages are stored as they are extracted; a reader that stops early
+leaves the pages it did extract for the next one.
+
+'plain' text is the page's text layer. Scanned pages are stored with their
+classification so the OCR processor knows to recognize them, after which the
+OCR text replaces the empty text layer for everyone.
+
+Documents not used for TEXT_STORE_MAX_AGE_DAYS, and the least recently used
+ones beyond TEXT_STORE_MAX_DOCUMENTS, are deleted by prune(): when a new
+document is stored (at most every PRUNE_INTERVAL seconds per process) and by
+the prune_text_store management command.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+import pymupdf as fitz
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import DocumentText, PageText
+from .ocr_engine import classify_page
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Stored pages are read from the database in windows of this many pages, so a
+# reader that stops after the first pages doesn't load the whole document
+PAGE_LOAD_BATCH = 50
+# Pages put() are written with one bulk upsert per this many pages (and when a reader finishes)
+PAGE_WRITE_BATCH = 200
+PAGE_FIELDS = ('text', 'method', 'classification', 'language', 'confidence', 'passes')
+# Minimum seconds between the prune() runs triggered by storing new documents
+PRUNE_INTERVAL = 600
+
+_prune_lock = threading.Lock()
+_last_prune = None
+
+
+def content_hash(source):
+    """
+    SHA-256 of a PDF given as a path, bytes or (uploaded) file object.
+
+    File objects are read from the start and rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, str):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    else:
+        source.seek(0)
+        chunks = source.chunks() if hasattr(source, 'chunks') else iter(lambda: source.read(HASH_CHUNK_SIZE), b'')
+        for chunk in chunks:
+            digest.update(chunk)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def open_pdf(source):
+    """Open a path, bytes or file object with PyMuPDF."""
+    if isinstance(source, str):
+        return fitz.open(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype='pdf')
+    if hasattr(source, 'temporary_file_path'):
+        return fitz.open(source.temporary_file_path())
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return fitz.open(stream=data, filetype='pdf')
+
+
+def _page_dict(page_text):
+    return {
+        'page_number': page_text.page_number,
+        'text': page_text.text,
+        'method': page_text.method,
+        'classification': page_text.classification,
+        'language': page_text.language,
+        'confidence': page_text.confidence,
+        'passes': page_text.passes,
+    }
+
+
+class StoredDocument:
+    """
+    The stored pages of one document variant.
+
+    Without a database row (store disabled) pages are only kept in memory, so
+    callers don't need a separate code path. With one, stored pages are loaded
+    on first access, PAGE_LOAD_BATCH pages at a time, and put() only updates
+    memory: flush() writes the new pages in one bulk upsert.
+    """
+
+    def __init__(self, content_hash, variant, page_count, record=None):
+        self.content_hash = content_hash
+        self.variant = variant
+        self.page_count = page_count
+        self.record = record
+        self.pages = {}
+        self._loaded_through = 0 if record is not None else page_count
+        self._unsaved = {}
+
+    @property
+    def complete(self):
+        if self.record is not None and self._loaded_through < self.page_count:
+            self.flush()
+            return self.record.pages.count() >= self.page_count
+        return len(self.pages) >= self.page_count
+
+    def _load_through(self, page_number):
+        """Read stored pages from the database up to at least page_number."""
+        end = min(self.page_count, max(page_number, self._loaded_through + PAGE_LOAD_BATCH))
+        window = self.record.pages.filter(page_number__gt=self._loaded_through, page_number__lte=end)
+        for page in window:
+            # Pages put() in the meantime are newer than their stored rows
+            self.pages.setdefault(page.page_number, _page_dict(page))
+        self._loaded_through = end
+
+    def get(self, page_number):
+        """Stored page dict (1-based page number), or None."""
+        if self.record is not None and page_number > self._loaded_through:
+            self._load_through(page_number)
+        return self.pages.get(page_number)
+
+    def put(self, page_number, text, method, classification='', language='', confidence=None, passes=0):
+        """Store (or replace) one page and return its dict."""
+        page = {
+            'page_number': page_number,
+            'text': text,
+            'method': method,
+            'classification': classification,
+            'language': language,
+            'confidence': confidence,
+            'passes': passes,
+        }
+        self.pages[page_number] = page
+        if self.record is not None:
+            self._unsaved[page_number] = page
+        return page
+
+    def flush(self):
+        """Write the pages put() since the last flush, inserting or replacing their rows."""
+        if not self._unsaved:
+            return
+        PageText.objects.bulk_create(
+            [PageText(document=self.record, **page) for page in self._unsaved.values()],
+            batch_size=PAGE_WRITE_BATCH,
+            update_conflicts=True,
+            unique_fields=['document', 'page_number'],
+            update_fields=list(PAGE_FIELDS),
+        )
+        self._unsaved = {}
+
+    def flush_batch(self):
+        """flush() once PAGE_WRITE_BATCH pages are waiting, for callers filling many pages."""
+        if len(self._unsaved) >= PAGE_WRITE_BATCH:
+            self.flush()
+
+
+def store_enabled():
+    return getattr(settings, 'TEXT_STORE_ENABLED', True)
+
+
+def prune(max_age_days=None, max_documents=None):
+    """
+    Delete stored documents (and their pages) that are too old or too many.
+
+    Args:
+        max_age_days (int): Delete documents not used for this many days (default TEXT_STORE_MAX_AGE_DAYS, 0 to keep)
+        max_documents (int): Then keep only this many, most recently used first
+            (default TEXT_STORE_MAX_DOCUMENTS, 0 for no limit)
+
+    Returns:
+        int: Number of documents deleted
+    """
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'TEXT_STORE_MAX_AGE_DAYS', 30)
+    if max_documents is None:
+        max_documents = getattr(settings, 'TEXT_STORE_MAX_DOCUMENTS', 5000)
+
+    deleted = 0
+    if max_age_days:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        deleted += _delete_documents(DocumentText.objects.filter(last_used_at__lt=cutoff))
+    if max_documents:
+        recent_first = DocumentText.objects.order_by('-last_used_at', '-id')
+        excess_ids = list(recent_first.values_list('id', flat=True)[max_documents:])
+        if excess_ids:
+            deleted += _delete_documents(DocumentText.objects.filter(id__in=excess_ids))
+    return deleted
+
+
+def _delete_documents(queryset):
+    _, per_model = queryset.delete()
+    return per_model.get(DocumentText._meta.label, 0)
+
+
+def _prune_if_due():
+    global _last_prune
+    with _prune_lock:
+        if _last_prune is not None and time.monotonic() - _last_prune < PRUNE_INTERVAL:
+            return
+        _last_prune = time.monotonic()
+    try:
+        prune()
+    except Exception as e:
+        print(f"Text store prune failed: {e}")
+
+
+def open_document(source, variant='plain', pdf_document=None, persist=True):
+    """
+    Load the stored pages of a PDF, creating the document record on first sight.
+
+    Args:
+        source: Path, bytes or file object with the PDF
+        variant (str): 'plain' or 'layout'
+        pdf_document: Already open PyMuPDF document of the same file (saves opening it for the page count)
+        persist (bool): False keeps the pages in memory only, without reading or writing the database
+
+    Returns:
+        StoredDocument
+    """
+    digest = content_hash(source)
+    if not persist or not store_enabled():
+        return StoredDocument(digest, variant, _page_count(source, pdf_document))
+
+    record = DocumentText.objects.filter(content_hash=digest, variant=variant).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                record = DocumentText.objects.create(
+                    content_hash=digest, variant=variant, page_count=_page_count(source, pdf_document)
+                )
+        except IntegrityError:
+            # Another request stored it first
+            record = DocumentText.objects.get(content_hash=digest, variant=variant)
+        else:
+            _prune_if_due()
+    else:
+        # Bumps last_used_at
+        record.save(update_fields=['last_used_at'])
+    return StoredDocument(digest, variant, record.page_count, record)
+
+
+def _page_count(source, pdf_document=None):
+    if pdf_document is not None:
+        return pdf_document.page_count
+    with open_pdf(source) as opened:
+        return opened.page_count
+
+
+def extract_plain_page(stored, page):
+    """Store a page's text layer (with its classification) and return the page dict."""
+    classification, text = classify_page(page)
+    return stored.put(page.number + 1, text, 'text', classification=classification)
+
+
+def iter_page_texts(source, stored=None):
+    """
+    Yield the 'plain' page dicts of a PDF in page order, extracting and storing missing pages.
+
+    Pages are only opened and parsed when some page is missing, and only the
+    missing pages are. New pages are written PAGE_WRITE_BATCH at a time;
+    stopping the iteration early writes what was extracted so far.
+
+    Args:
+        source: Path, bytes or file object with the PDF
+        stored: StoredDocument from open_document(), when the caller already has it
+
+    Yields:
+        dict: page_number, text, method ('text' or 'ocr'), classification, language, confidence, passes
+    """
+    if stored is None:
+        stored = open_document(source)
+
+    pdf_document = None
+    try:
+        for page_number in range(1, stored.page_count + 1):
+            page = stored.get(page_number)
+            if page is None:
+                if pdf_document is None:
+                    pdf_document = open_pdf(source)
+                page = extract_plain_page(stored, pdf_document[page_number - 1])
+                stored.flush_batch()
+            yield page
+    finally:
+        if pdf_document is not None:
+            pdf_document.close()
+        stored.flush()
+
+
+def get_page_texts(source):
+    """All 'plain' page dicts of a PDF (see iter_page_texts)."""
+    return list(iter_page_texts(source))
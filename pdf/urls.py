@@ -50,6 +50,18 @@ urlpatterns = [
     #Other formats to PDF
     path('format_to_pdf/', FormatToPDFView.as_view(), name='format_to_pdf'),
     path('download_converted_pdf/<int:pdf_id>/', DownloadConvertedPDFView.as_view(), name='download_converted_pdf'),
+
+    #Background jobs
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='pdf_job_status'),
+
+    #Operation pipelines
+    path('pipeline/', PipelinePDFView.as_view(), name='pdf_pipeline'),
+    path('download_pipeline_pdf/<int:pdf_id>/', DownloadPipelinePDFView.as_view(), name='download_pipeline_pdf'),
+
+    #Page previews
+    path('preview_pdf/', PreviewPDFView.as_view(), name='preview_pdf'),
+    path('<slug:document_id>/pages/<int:page_number>/thumbnail/', PageThumbnailView.as_view(), name='page_thumbnail'),
+    path('<slug:document_id>/pages/prefetch/', PrefetchThumbnailsView.as_view(), name='prefetch_thumbnails'),
     
 
 
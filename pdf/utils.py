@@ -5,23 +5,32 @@ import PyPDF2
 import tempfile
 from PIL import Image
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib import colors
-import pytesseract
 # import pdfkit
 # from docx import Document
 # from fpdf import FPDF
 import concurrent.futures
 from docx2pdf import convert
 from PyPDF2 import PdfReader, PdfWriter
+from django.core.files import File
 from django.core.files.base import ContentFile
-from zipfile import ZipFile
 from django.contrib.sites.shortcuts import get_current_site
 from rest_framework.reverse import reverse
-from .models import OcrPdf, ProtectedPDF,MergedPDF, CompressedPDF, SplitPDF, OrganizedPdf, StampPdf, UnlockPdf
+from .ocr_engine import ocr_pages, classify_page, page_needs_ocr, recognize_page, words_to_text, DEFAULT_CONFIG
+from .ocr_backends import get_ocr_backend
+from .ocr_preprocessing import parse_preprocess_steps
+from .ocr_cache import get_ocr_cache
+from .compression import compress_pdf_file
+from .zip_stream import spool_zip
+from .merging import merge_to_file
+from .rendering import render_pages, DEFAULT_DPI
+from .pipeline import PDFPipeline
+from .stamping import TextStamp
+from .text_layer import TextLayerWriter
+from .text_store import iter_page_texts
+from .models import OcrPdf, ProtectedPDF,MergedPDF, CompressedPDF, SplitPDF, OrganizedPdf, StampPdf, UnlockPdf, PipelinePDF
 
 import math
+import time
 
 from django.conf import settings
 
@@ -57,167 +66,170 @@ def protect_pdf(request, input_file, password, user):
     return protected_file, full_url
 
 
-def merge_pdf(request, user, pdf_list):
-    pdf_writer = PdfWriter()
-
-    for pdf_file in pdf_list:
-        pdf_reader = PdfReader(pdf_file)
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            pdf_writer.add_page(page)
+def save_merged_pdf(pdf_list, user, filename='merged_output.pdf'):
+    """
+    Merge PDFs on disk one input at a time and stream the result into a MergedPDF.
 
-    buffer = BytesIO()
-    pdf_writer.write(buffer)
+    Returns:
+        tuple: (MergedPDF instance, merge stats)
+    """
+    fd, output_path = tempfile.mkstemp(dir=TEMP_PATH, suffix='.pdf')
+    os.close(fd)
+    try:
+        stats = merge_to_file(pdf_list, output_path, temp_dir=TEMP_PATH)
 
-    # Handle case where user is None by creating a temporary user or skipping save
-    if user:
         merged_pdf = MergedPDF(user=user)
-        merged_pdf.merged_file.save('merged_output.pdf', ContentFile(buffer.getvalue()))
+        with open(output_path, 'rb') as merged_file:
+            merged_pdf.merged_file.save(filename, File(merged_file))
         merged_pdf.save()
-    else:
-        # For testing without user, create a mock object
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
+    finally:
         try:
-            test_user = User.objects.get(email='test@example.com')
-        except User.DoesNotExist:
-            test_user = User.objects.create_user(email='test@example.com', password='testpass')
-        
-        merged_pdf = MergedPDF(user=test_user)
-        merged_pdf.merged_file.save('merged_output.pdf', ContentFile(buffer.getvalue()))
-        merged_pdf.save()
+            os.remove(output_path)
+        except OSError:
+            pass
 
-    current_site = get_current_site(request)
-    base_url = f'http://{current_site.domain}'
-    full_url = f'{base_url}{merged_pdf.merged_file.url}'
+    return merged_pdf, stats
 
-    return merged_pdf, full_url
 
+def run_pdf_pipeline(input_pdf, user, operations, attachments=None, filename='pipeline_output.pdf'):
+    """
+    Run a chain of operations on one open document and store only the final PDF.
 
-def compress_pdf(request, user, input_pdf, compression_quality):
-    try:
-        # Save the uploaded PDF file to a temporary location
+    Returns:
+        tuple: (PipelinePDF instance, pipeline stats)
 
-        # temp_file_path = os.path.join(temp_path, input_pdf.name)
-        temp_file_path = os.path.join(TEMP_PATH, input_pdf.name)
+    Raises:
+        PipelineError: if an operation is invalid or cannot be applied
+    """
+    pipeline = PDFPipeline(operations, attachments)
 
-        with open(temp_file_path, 'wb') as temp_file:
-            for chunk in input_pdf.chunks():
-                temp_file.write(chunk)
+    with tempfile.NamedTemporaryFile(dir=TEMP_PATH, suffix='.pdf', delete=False) as temp_file:
+        for chunk in input_pdf.chunks():
+            temp_file.write(chunk)
+        input_path = temp_file.name
+    fd, output_path = tempfile.mkstemp(dir=TEMP_PATH, suffix='.pdf')
+    os.close(fd)
 
-        # Create a PDF document object using PyMuPDF
-        pdf_document = fitz.open(temp_file_path)
-        pdf_writer = fitz.open()
-        print(pdf_writer, 'pdf_writer')
+    try:
+        stats = pipeline.run(input_path, output_path)
+        stats['output_size'] = os.path.getsize(output_path)
 
-        for page_number in range(pdf_document.page_count):
-            page = pdf_document[page_number]
+        pipeline_pdf = PipelinePDF(user=user, operations=[step['op'] for step in operations])
+        with open(output_path, 'rb') as output_file:
+            pipeline_pdf.pipeline_pdf.save(filename, File(output_file))
+        pipeline_pdf.save()
+    finally:
+        for path in (input_path, output_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
+    return pipeline_pdf, stats
 
-            # Convert the page to a Pixmap
-            pixmap = page.get_pixmap()
 
-            # Convert the Pixmap to a PIL Image
-            pil_image = Image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
+def merge_pdf(request, user, pdf_list):
+    # Handle case where user is None by creating a temporary user or skipping save
+    if not user:
+        # For testing without user, create a mock object
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        try:
+            user = User.objects.get(email='test@example.com')
+        except User.DoesNotExist:
+            user = User.objects.create_user(email='test@example.com', password='testpass')
 
-            # Compress the PIL Image
-            quality = get_compression_quality(compression_quality)
-            compressed_image_stream = BytesIO()
-            pil_image.save(compressed_image_stream, format="JPEG", quality=quality)
+    merged_pdf, _ = save_merged_pdf(pdf_list, user)
 
-            # Create a new PDF document with the compressed image
-            compressed_pdf_page = pdf_writer.new_page(width=pixmap.width, height=pixmap.height)
-            compressed_pdf_page.insert_image(compressed_pdf_page.rect, stream=compressed_image_stream.getvalue())
+    current_site = get_current_site(request)
+    base_url = f'http://{current_site.domain}'
+    full_url = f'{base_url}{merged_pdf.merged_file.url}'
 
-        # Save the compressed PDF
-        buffer = BytesIO()
-        # pdf_writer.write(buffer)
-        pdf_writer.save(buffer)
+    return merged_pdf, full_url
 
-        # Create a new CompressedPDF model instance
-        compressed_pdf = CompressedPDF(user=user, compression_quality=compression_quality)
-        compressed_pdf.compressed_file.save('compressed_output.pdf', ContentFile(buffer.getvalue()))
-        compressed_pdf.save()
 
-        # Clean up the temporary file
-        try:
-            os.remove(temp_file_path)
-        except OSError as e:
-            print(f"Error deleting temporary file: {e}")
+def compress_pdf(request, user, input_pdf, compression_quality):
+    try:
+        compressed_pdf, _ = save_compressed_pdf(input_pdf, user, compression_quality)
 
         current_site = get_current_site(request)
         base_url = f'http://{current_site.domain}'
         full_url = f'{base_url}{compressed_pdf.compressed_file.url}'
 
-
-
         return compressed_pdf, full_url
 
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         return None
 
-def stamp_pdf_with_text(input_pdf, stamp_text, user):
-    try:
-        temp_file_path = os.path.join(TEMP_PATH, input_pdf.name)
+def save_compressed_pdf(input_pdf, user, compression_quality='recommended'):
+    """
+    Compress an uploaded PDF with the object-level engine and store it as a CompressedPDF.
 
-        with open(temp_file_path, 'wb') as temp_file:
-            for chunk in input_pdf.chunks():
-                temp_file.write(chunk)
+    Returns:
+        tuple: (CompressedPDF instance, compression stats)
+    """
+    with tempfile.NamedTemporaryFile(dir=TEMP_PATH, suffix='.pdf', delete=False) as temp_file:
+        for chunk in input_pdf.chunks():
+            temp_file.write(chunk)
+        temp_file_path = temp_file.name
 
-        pdf_reader = PdfReader(temp_file_path)
-        pdf_writer = PdfWriter()
+    try:
+        compressed_bytes, stats = compress_pdf_file(temp_file_path, compression_quality)
+    finally:
+        try:
+            os.remove(temp_file_path)
+        except OSError as e:
+            print(f"Error deleting temporary file: {e}")
 
-        watermark_buffer = BytesIO()
+    compressed_pdf = CompressedPDF(user=user, compression_quality=compression_quality)
+    compressed_pdf.compressed_file.save(
+        f'compressed_{compression_quality}.pdf',
+        ContentFile(compressed_bytes)
+    )
+    compressed_pdf.save()
+    return compressed_pdf, stats
 
-        canvas = Canvas(watermark_buffer, pagesize=letter)
-        canvas.setFillColor(colors.Color(0, 0, 0, alpha=0.3))
-        canvas.setFont("Helvetica", 36)
 
-        text_width = canvas.stringWidth(stamp_text, "Helvetica", 36)
-        text_height = 36
+def stamp_pdf_with_text(input_pdf, stamp_text, user, pages=None, **stamp_options):
+    """
+    Stamp text on the selected pages and store the result as a StampPdf.
 
-        center_x = letter[0] / 2 - (text_width / 2)
-        center_y = letter[1] / 2 - (text_height / 2)
+    Args:
+        stamp_options: font_size, opacity, rotation and position (see TextStamp)
 
-        # Rotate the canvas and draw the rotated text
-        # canvas.rotate(30)  # Rotate by 30 degrees clockwise
-        canvas.drawString(center_x, center_y, stamp_text)
-        canvas.save()
+    Raises:
+        ValueError: on invalid stamp options or page selection
+    """
+    stamp = TextStamp(stamp_text, **stamp_options)
 
-        for page_number in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_number]
-            watermark_pdf = PdfReader(BytesIO(watermark_buffer.getvalue()))
-            watermark_page = watermark_pdf.pages[0]
-            page.merge_page(watermark_page)
-            pdf_writer.add_page(page)
+    with tempfile.NamedTemporaryFile(dir=TEMP_PATH, suffix='.pdf', delete=False) as temp_file:
+        for chunk in input_pdf.chunks():
+            temp_file.write(chunk)
+        input_path = temp_file.name
+    fd, output_path = tempfile.mkstemp(dir=TEMP_PATH, suffix='.pdf')
+    os.close(fd)
 
-        output_buffer = BytesIO()
-        pdf_writer.write(output_buffer)
+    try:
+        with fitz.open(input_path) as pdf_document:
+            if pdf_document.needs_pass:
+                raise ValueError('PDF file is encrypted. Please unlock it first.')
+            stats = stamp.apply(pdf_document, pages)
+            pdf_document.save(output_path, garbage=1, deflate=True)
+        print(f"Stamped {stats['pages_stamped']} pages using {stats['overlays']} shared overlay(s)")
 
         stamped_pdf_instance = StampPdf(user=user)
-        stamped_pdf_instance.pdf.save('stamped_output.pdf', ContentFile(output_buffer.getvalue()))
+        with open(output_path, 'rb') as output_file:
+            stamped_pdf_instance.pdf.save('stamped_output.pdf', File(output_file))
         stamped_pdf_instance.save()
+    finally:
+        for path in (input_path, output_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
-        return stamped_pdf_instance
-
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        return None
-
-
-def get_compression_quality(choice):
-    # Define compression quality based on user choice
-    if choice == 'extreme':
-        return 100   # Less quality, high compression
-    elif choice == 'recommended':
-        return 50   # Good quality, good compression
-    elif choice == 'less':
-        return 10   # High quality, less compression
-    else:
-        raise ValueError("Invalid compression choice")
-
-
+    return stamped_pdf_instance
 
 
 def split_pdf(request, input_pdf, start_page, end_page, user):
@@ -248,41 +260,36 @@ def split_pdf(request, input_pdf, start_page, end_page, user):
 
 #convert pdf to images
 
-def convert_pdf_to_image(input_pdf, output_format='jpeg'):
-    temp_file_path = os.path.join(TEMP_PATH, input_pdf.name)
-    with open(temp_file_path, 'wb') as temp_file:
+def convert_pdf_to_image(input_pdf, output_format='jpeg', dpi=DEFAULT_DPI, pages=None, max_dimension=None, workers=None):
+    """
+    Render the selected pages and yield (page_number, encoded image bytes) in page order.
+
+    Pages are spread over RENDER_WORKERS processes (unless ``workers`` is given).
+    """
+    if workers is None:
+        workers = getattr(settings, 'RENDER_WORKERS', 0)
+
+    with tempfile.NamedTemporaryFile(dir=TEMP_PATH, suffix='.pdf', delete=False) as temp_file:
         for chunk in input_pdf.chunks():
             temp_file.write(chunk)
+        temp_file_path = temp_file.name
 
-    with fitz.open(temp_file_path) as pdf_document:
-        image_data_list = []
-        for page_number in range(pdf_document.page_count):
-            page = pdf_document[page_number]
-            # Get pixmap with higher resolution
-            pixmap = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            # Convert to PIL Image
-            pil_image = Image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
-            # Convert to requested format
-            img_buffer = BytesIO()
-            if output_format.lower() == 'png':
-                pil_image.save(img_buffer, format='PNG')
-            else:
-                pil_image.save(img_buffer, format='JPEG', quality=95)
-            image_data_list.append(img_buffer.getvalue())
-
-    os.remove(temp_file_path)
-    return image_data_list
+    try:
+        yield from render_pages(temp_file_path, pages, output_format, dpi, max_dimension, workers)
+    finally:
+        os.remove(temp_file_path)
 
 
-def create_zip_file(images, user, output_format='jpeg'):
-    zip_buffer = BytesIO()
-    with ZipFile(zip_buffer, 'w') as zip_file:
-        ext = 'png' if output_format.lower() == 'png' else 'jpg'
-        for i, image_data in enumerate(images):
-            zip_file.writestr(f'page_{i + 1}.{ext}', image_data)
+def create_zip_file(images, output_format='jpeg'):
+    """
+    Zip (page_number, image bytes) pairs as they are produced.
 
-    zip_buffer.seek(0)
-    return None, zip_buffer.getvalue()
+    Returns:
+        File: spooled ZIP archive (a temporary file, removed when closed)
+    """
+    ext = 'png' if output_format.lower() == 'png' else 'jpg'
+    entries = ((f'page_{page_number}.{ext}', image_data) for page_number, image_data in images)
+    return File(spool_zip(entries, temp_dir=TEMP_PATH), name=f'pages_{ext}.zip')
 
 
 
@@ -491,8 +498,8 @@ def unlock_pdf(input_pdf, password, user):
         raise ValueError("Failed to unlock the PDF. Incorrect password.")
 
 
-def pdf_to_ocr(input_pdf, user, language='eng'):
-    """Process PDF with OCR and return searchable PDF with extracted text"""
+def pdf_to_ocr(input_pdf, user, language='eng', progress_callback=None, mode=None, preprocess=None, strategy=None):
+    """Process PDF with OCR and return the saved searchable PDF with its per-page OCR report"""
     try:
         temp_file_path = os.path.join(TEMP_PATH, input_pdf.name)
         
@@ -501,7 +508,10 @@ def pdf_to_ocr(input_pdf, user, language='eng'):
                 temp_file.write(chunk)
         
         # Create searchable PDF with invisible text layer
-        searchable_pdf_buffer = create_searchable_pdf_with_ocr(temp_file_path, language)
+        searchable_pdf_buffer, report = create_searchable_pdf_with_ocr(
+            temp_file_path, language, progress_callback=progress_callback, mode=mode, preprocess=preprocess,
+            strategy=strategy
+        )
         
         # Save to database
         pdf = OcrPdf(user=user, language=language)
@@ -514,7 +524,7 @@ def pdf_to_ocr(input_pdf, user, language='eng'):
         except OSError:
             pass
             
-        return pdf, None
+        return pdf, report
         
     except Exception as e:
         print(f"OCR Error: {str(e)}")
@@ -535,115 +545,87 @@ def extract_text_from_pdf(pdf_path):
 def perform_ocr_on_page(page, language='eng'):
     """Perform OCR on a single PDF page"""
     try:
-        # Convert page to image
-        pixmap = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # Higher resolution
-        image = Image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
-        
-        # Perform OCR
-        text = pytesseract.image_to_string(image, lang=language)
-        return text.strip()
+        # Shares rendering settings and cached results with the searchable PDF builder
+        words = recognize_page(page, language, cache=get_ocr_cache())
+        return words_to_text(words).strip()
     except Exception as e:
         print(f"OCR failed for page: {str(e)}")
         return ""
-def create_searchable_pdf_with_ocr(original_pdf_path, language='eng'):
-    """Create searchable PDF using PyMuPDF and Tesseract - properly aligned for text selection"""
-    from io import BytesIO
-    import fitz
-    import pytesseract
-    from PIL import Image
-    import os
-    
-    # Set Tesseract path
-    tesseract_exe = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-    if os.path.exists(tesseract_exe):
-        pytesseract.pytesseract.tesseract_cmd = tesseract_exe
-    
+
+
+def create_searchable_pdf_with_ocr(original_pdf_path, language='eng', progress_callback=None, workers=None, mode=None,
+                                   preprocess=None, strategy=None):
+    """
+    Create searchable PDF using PyMuPDF and Tesseract - properly aligned for text selection.
+
+    In 'hybrid' mode pages are classified first and only image/sparse pages are
+    OCR'd; born-digital and blank pages are left untouched. 'full' OCRs every page.
+    ``mode`` defaults to the OCR_MODE setting.
+    OCR runs in a process pool (OCR_WORKERS processes unless ``workers`` is given)
+    and the recognized words are merged back in page order. Each OCR'd page
+    reports the zoom it was rendered at and the time spent per stage.
+    ``preprocess`` lists preprocessing steps (default: OCR_PREPROCESS) and
+    ``strategy`` is 'single' or 'two_pass' (default: OCR_STRATEGY); OCR'd
+    pages also report their mean word confidence and number of passes.
+
+    If OCR fails the original PDF is returned instead, and the pages that were
+    to be OCR'd are reported with ocr_performed False and an 'error'.
+
+    Returns:
+        tuple: (BytesIO with the searchable PDF, list of per-page decisions)
+    """
+    if workers is None:
+        workers = getattr(settings, 'OCR_WORKERS', 2)
+    if mode is None:
+        mode = getattr(settings, 'OCR_MODE', 'full')
+    if strategy is None:
+        strategy = getattr(settings, 'OCR_STRATEGY', 'single')
+
+    report = []
     try:
-        print(f"Starting OCR processing for: {original_pdf_path}")
+        print(f"Starting OCR processing for: {original_pdf_path} (mode: {mode})")
         
         # Open PDF
         pdf_doc = fitz.open(original_pdf_path)
+        # Invisible words go in as one text block per page with a shared font
+        text_layer = TextLayerWriter(pdf_doc)
         
-        # Process each page
-        for page_num in range(pdf_doc.page_count):
+        # Classify pages so only the ones without a usable text layer are OCR'd
+        for page in pdf_doc:
+            classification, _ = classify_page(page)
+            report.append({
+                'page_number': page.number + 1,
+                'classification': classification,
+                'ocr_performed': page_needs_ocr(classification, mode),
+                'words_added': 0,
+            })
+        ocr_page_numbers = [entry['page_number'] - 1 for entry in report if entry['ocr_performed']]
+        print(f"OCR needed on {len(ocr_page_numbers)}/{pdf_doc.page_count} pages")
+        
+        # Pages come back in order, so each one is merged as soon as it is ready
+        page_results = ocr_pages(
+            original_pdf_path, ocr_page_numbers, language, workers=workers, cache=get_ocr_cache(),
+            preprocess_steps=parse_preprocess_steps(preprocess) if preprocess is not None else None,
+            strategy=strategy
+        )
+        for done, page_result in enumerate(page_results, start=1):
+            page_num = page_result['page_number'] - 1
             page = pdf_doc[page_num]
+            started = time.perf_counter()
+            report[page_num]['words_added'] = text_layer.write_page(page, page_result['words'])
+            page_result['timings_ms']['text_layer'] = round((time.perf_counter() - started) * 1000, 1)
+            report[page_num]['zoom'] = page_result['zoom']
+            report[page_num]['skew'] = page_result['skew']
+            report[page_num]['confidence'] = page_result['confidence']
+            report[page_num]['passes'] = page_result['passes']
+            report[page_num]['timings_ms'] = page_result['timings_ms']
             
-            # Get the DPI/scale we're using
-            zoom = 2.0  # Higher resolution for better OCR
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Convert page to image
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # Get OCR data with bounding boxes for each word
-            ocr_data = pytesseract.image_to_data(
-                img, 
-                lang=language, 
-                output_type=pytesseract.Output.DICT,
-                config='--oem 3 --psm 6'
-            )
-            
-            # Add invisible text layer word by word
-            n_boxes = len(ocr_data['text'])
-            for i in range(n_boxes):
-                word = ocr_data['text'][i]
-                conf = int(ocr_data['conf'][i]) if str(ocr_data['conf'][i]).isdigit() else 0
-                
-                # Only add words with reasonable confidence
-                if conf > 30 and word.strip():
-                    # Get coordinates from Tesseract (in image coordinates)
-                    x = ocr_data['left'][i]
-                    y = ocr_data['top'][i]
-                    w = ocr_data['width'][i]
-                    h = ocr_data['height'][i]
-                    
-                    # Scale back to PDF coordinates
-                    pdf_x = x / zoom
-                    pdf_y = y / zoom
-                    pdf_w = w / zoom
-                    pdf_h = h / zoom
-                    
-                    # Create rectangle for the word
-                    rect = fitz.Rect(pdf_x, pdf_y, pdf_x + pdf_w, pdf_y + pdf_h)
-                    
-                    # Calculate appropriate font size (slightly smaller than box height)
-                    fontsize = pdf_h * 0.75
-                    
-                    try:
-                        # Insert invisible text using textbox (best method)
-                        rc = page.insert_textbox(
-                            rect,
-                            word + " ",  # Add space after word
-                            fontsize=fontsize,
-                            fontname="helv",  # Helvetica font
-                            color=(0, 0, 0),  # Black text
-                            fill=(1, 1, 1),   # White fill (invisible background)
-                            render_mode=3,    # Invisible text mode
-                            align=fitz.TEXT_ALIGN_LEFT,
-                            overlay=True
-                        )
-                        
-                        # If textbox fails, try fallback method
-                        if rc < 0:
-                            raise Exception("Textbox insertion failed")
-                            
-                    except Exception as e:
-                        # Fallback method: direct text insertion
-                        try:
-                            page.insert_text(
-                                (pdf_x, pdf_y + pdf_h * 0.85),
-                                word,
-                                fontsize=fontsize,
-                                fontname="helv",
-                                color=(1, 1, 1),  # White (invisible)
-                                overlay=True
-                            )
-                        except:
-                            print(f"Failed to insert word '{word}' on page {page_num + 1}")
-                            continue
-            
-            print(f"Processed page {page_num + 1}/{pdf_doc.page_count}")
+            print(f"Processed page {page_num + 1} ({done}/{len(ocr_page_numbers)} OCR pages)")
+            if progress_callback:
+                progress_callback(done * 100 // len(ocr_page_numbers))
+        
+        if progress_callback and not ocr_page_numbers:
+            progress_callback(100)
         
         # Save to buffer
         output_buffer = BytesIO()
@@ -652,15 +634,19 @@ def create_searchable_pdf_with_ocr(original_pdf_path, language='eng'):
         output_buffer.seek(0)
         
         print("OCR processing completed successfully")
-        return output_buffer
+        return output_buffer, report
         
     except Exception as e:
         print(f"OCR failed: {str(e)}")
         import traceback
         traceback.print_exc()
         print("Returning original PDF")
+        # None of the selected pages made it into the returned file
+        for entry in report:
+            if entry['ocr_performed']:
+                entry.update({'ocr_performed': False, 'words_added': 0, 'error': f'OCR failed: {str(e)}'})
         with open(original_pdf_path, 'rb') as f:
-            return BytesIO(f.read())
+            return BytesIO(f.read()), report
 
 def create_searchable_pdf(original_pdf_path, extracted_texts, ocr_results=None):
     """Create a searchable PDF with extracted text and processing metadata"""
@@ -733,15 +719,12 @@ def create_searchable_pdf(original_pdf_path, extracted_texts, ocr_results=None):
     return buffer
 
 def get_pdf_text_content(pdf_path):
-    """Get all text content from PDF as plain text"""
+    """Get all text content from PDF as plain text (read through the shared page-text store)"""
     all_text = []
     
-    with fitz.open(pdf_path) as pdf_document:
-        for page_num in range(pdf_document.page_count):
-            page = pdf_document[page_num]
-            text = page.get_text()
-            if text.strip():
-                all_text.append(f"--- Page {page_num + 1} ---\n{text}")
+    for page in iter_page_texts(pdf_path):
+        if page['text'].strip():
+            all_text.append(f"--- Page {page['page_number']} ---\n{page['text']}")
     
     return "\n\n".join(all_text)
 
@@ -757,9 +740,8 @@ def convert_pdf_page_to_image(pdf_document, page_num):
 def perform_ocr_on_image(image, language='eng'):
     """Perform OCR on image and return extracted text"""
     try:
-        # Use pytesseract with better configuration
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, lang=language, config=custom_config)
+        # Same engine and configuration as page OCR (OCR_BACKEND setting)
+        text = get_ocr_backend().image_to_string(image, language, DEFAULT_CONFIG)
         return text.strip()
     except Exception as e:
         print(f"OCR failed: {str(e)}")
@@ -1,4 +1,5 @@
 import os
+from itertools import chain
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -6,12 +7,26 @@ from rest_framework import status
 from PyPDF2 import PdfReader, PdfWriter
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import FileResponse
+from django.http import Http404, StreamingHttpResponse
+from django.conf import settings
+from django.urls import reverse
+from project.file_serving import serve_field_file, serve_file
 from django.contrib.auth.hashers import make_password
-from .models import OcrPdf, ProtectedPDF, WordToPdfConversion, WordToPdf, OrganizedPdf, MergedPDF, CompressedPDF, SplitPDF, UnlockPdf, PDFFormatConversion, StampPdf
+from .models import OcrPdf, ProtectedPDF, WordToPdfConversion, WordToPdf, OrganizedPdf, MergedPDF, CompressedPDF, SplitPDF, UnlockPdf, PDFFormatConversion, StampPdf, Job, PipelinePDF
+from django.core.files import File
 from django.core.files.base import ContentFile
-from .utils import convert_pdf_to_image, create_zip_file, stamp_pdf_with_text, pdf_to_ocr
-from .serializers import OcrPdfSerializer, ProtectedPDFSerializer, MergedPDFSerializer, CompressedPDFSerializer, SplitPDFSerializer, StampPdfSerializer, WordToPdfConversionSerializer, OrganizedPdfSerializer, UnlockPdfSerializer, ProtectPDFRequestSerializer, MergePDFRequestSerializer, CompressPDFRequestSerializer, SplitPDFRequestSerializer, WordToPdfRequestSerializer, OrganizePDFRequestSerializer, UnlockPDFRequestSerializer, StampPDFRequestSerializer, OcrPDFRequestSerializer, PDFToFormatRequestSerializer, PDFFormatConversionSerializer
+from .utils import convert_pdf_to_image, create_zip_file, stamp_pdf_with_text, pdf_to_ocr, save_compressed_pdf, save_merged_pdf, run_pdf_pipeline
+from .jobs import enqueue_job
+from .ocr_engine import OCR_MODES, OCR_STRATEGIES, total_timings
+from .ocr_preprocessing import parse_preprocess_steps
+from .compression import COMPRESSION_PROFILES
+from .zip_stream import iter_zip_stream, spool_zip
+from .splitting import iter_size_parts
+from .merging import PDFMergeError
+from .pipeline import PipelineError
+from .previews import get_preview_service, PreviewService, PreviewNotFound, THUMBNAIL_FORMATS, DEFAULT_THUMBNAIL_WIDTH
+from .rendering import PageSelectionError
+from .serializers import OcrPdfSerializer, ProtectedPDFSerializer, MergedPDFSerializer, CompressedPDFSerializer, SplitPDFSerializer, StampPdfSerializer, WordToPdfConversionSerializer, OrganizedPdfSerializer, UnlockPdfSerializer, ProtectPDFRequestSerializer, MergePDFRequestSerializer, CompressPDFRequestSerializer, SplitPDFRequestSerializer, WordToPdfRequestSerializer, OrganizePDFRequestSerializer, UnlockPDFRequestSerializer, StampPDFRequestSerializer, OcrPDFRequestSerializer, PDFToFormatRequestSerializer, PDFFormatConversionSerializer, FormatToPDFRequestSerializer, JobSerializer, PipelinePDFRequestSerializer, PreviewPDFRequestSerializer, PrefetchThumbnailsRequestSerializer
 from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiExample
 from rest_framework import serializers as drf_serializers
 
@@ -140,9 +155,9 @@ class DownloadProtectedPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             protected_pdf = ProtectedPDF.objects.get(id=pdf_id)
-            return FileResponse(
-                protected_pdf.protected_file.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                protected_pdf.protected_file,
                 filename=f'protected_{protected_pdf.id}.pdf'
             )
         except ProtectedPDF.DoesNotExist:
@@ -178,6 +193,15 @@ class MergePDFView(APIView):
                         'merged_file': drf_serializers.URLField(),
                     }
                 ),
+                'merge_stats': inline_serializer(
+                    name='MergePDFStats',
+                    fields={
+                        'files_merged': drf_serializers.IntegerField(),
+                        'total_pages': drf_serializers.IntegerField(),
+                        'output_size': drf_serializers.IntegerField(),
+                        'peak_rss_bytes': drf_serializers.IntegerField(allow_null=True),
+                    }
+                ),
             }
         ),
         examples=[
@@ -190,6 +214,12 @@ class MergePDFView(APIView):
                         'user': 5,
                         'created_at': '2024-01-01T00:00:00Z',
                         'merged_file': 'http://localhost:8000/media/merged/output.pdf'
+                    },
+                    'merge_stats': {
+                        'files_merged': 2,
+                        'total_pages': 48,
+                        'output_size': 3145728,
+                        'peak_rss_bytes': 157286400
                     }
                 }
             )
@@ -204,32 +234,8 @@ class MergePDFView(APIView):
         try:
             user = request.user
             
-            # Merge PDFs
-            writer = PdfWriter()
-            for pdf_file in pdf_files:
-                try:
-                    reader = PdfReader(pdf_file)
-                    # Handle encrypted PDFs
-                    if reader.is_encrypted:
-                        return Response({'error': f'PDF file "{pdf_file.name}" is encrypted. Please unlock it first.'}, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    for page in reader.pages:
-                        writer.add_page(page)
-                except Exception as pdf_error:
-                    return Response({'error': f'Error processing PDF "{pdf_file.name}": {str(pdf_error)}'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Save merged PDF
-            from io import BytesIO
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            
-            merged_pdf = MergedPDF(user=user)
-            merged_pdf.merged_file.save(
-                f'merged_{len(pdf_files)}_files.pdf',
-                ContentFile(buffer.getvalue())
-            )
-            merged_pdf.save()
+            # Merge PDFs one at a time on disk and stream the result to storage
+            merged_pdf, stats = save_merged_pdf(pdf_files, user, f'merged_{len(pdf_files)}_files.pdf')
             
             # Get full URL
             protocol = 'https' if request.is_secure() else 'http'
@@ -243,9 +249,12 @@ class MergePDFView(APIView):
                     'created_at': merged_pdf.created_at.isoformat(),
                     'merged_file': file_url
                 },
+                'merge_stats': stats,
             }
             return Response(response_data)
 
+        except PDFMergeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -257,9 +266,9 @@ class DownloadMergedPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             merged_pdf = MergedPDF.objects.get(id=pdf_id)
-            return FileResponse(
-                merged_pdf.merged_file.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                merged_pdf.merged_file,
                 filename=f'merged_{merged_pdf.id}.pdf'
             )
         except MergedPDF.DoesNotExist:
@@ -293,6 +302,9 @@ class CompressPDFView(APIView):
                         'compressed_file': drf_serializers.URLField(),
                     }
                 ),
+                'original_size': drf_serializers.IntegerField(),
+                'compressed_size': drf_serializers.IntegerField(),
+                'images_recompressed': drf_serializers.IntegerField(),
             }
         ),
         examples=[
@@ -305,7 +317,10 @@ class CompressPDFView(APIView):
                         'user': 5,
                         'created_at': '2024-01-01T00:00:00Z',
                         'compressed_file': 'http://localhost:8000/media/compressed/output.pdf'
-                    }
+                    },
+                    'original_size': 5242880,
+                    'compressed_size': 1310720,
+                    'images_recompressed': 12
                 }
             )
         ]
@@ -317,6 +332,9 @@ class CompressPDFView(APIView):
         if not input_pdf:
             return Response({'error': 'No input PDF file provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if compression_quality not in COMPRESSION_PROFILES:
+            return Response({'error': f'Invalid compression_quality. Choose from: {", ".join(COMPRESSION_PROFILES)}'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             # Create user if not authenticated
             if request.user.is_authenticated:
@@ -328,25 +346,11 @@ class CompressPDFView(APIView):
                     defaults={'password': make_password('testpass123')}
                 )
             
-            # Compress PDF (simple copy for now)
-            reader = PdfReader(input_pdf)
-            writer = PdfWriter()
-            
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            # Save compressed PDF
-            from io import BytesIO
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            
-            compressed_pdf = CompressedPDF(user=user)
-            compressed_pdf.compressed_file.save(
-                f'compressed_{compression_quality}.pdf',
-                ContentFile(buffer.getvalue())
-            )
-            compressed_pdf.save()
+            if _run_in_background(request):
+                job = enqueue_job(user, 'compress', input_pdf, {'compression_quality': compression_quality})
+                return _job_accepted_response(request, job)
+
+            compressed_pdf, stats = save_compressed_pdf(input_pdf, user, compression_quality)
             
             # Get full URL
             protocol = 'https' if request.is_secure() else 'http'
@@ -360,9 +364,14 @@ class CompressPDFView(APIView):
                     'created_at': compressed_pdf.created_at.isoformat(),
                     'compressed_file': file_url
                 },
+                'original_size': stats['original_size'],
+                'compressed_size': stats['compressed_size'],
+                'images_recompressed': stats['images_recompressed'],
             }
             return Response(response_data)
 
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -374,9 +383,9 @@ class DownloadCompressedPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             compressed_pdf = CompressedPDF.objects.get(id=pdf_id)
-            return FileResponse(
-                compressed_pdf.compressed_file.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                compressed_pdf.compressed_file,
                 filename=f'compressed_{compressed_pdf.id}.pdf'
             )
         except CompressedPDF.DoesNotExist:
@@ -448,6 +457,7 @@ class SplitPDFView(APIView):
         extract_mode = request.data.get('extract_mode', 'all')
         pages_to_extract = request.data.get('pages_to_extract', '')
         max_file_size = request.data.get('max_file_size', '')
+        size_unit = request.data.get('size_unit', 'KB')
         merge_ranges = request.data.get('merge_ranges', 'false') == 'true'
         merge_extracted = request.data.get('merge_extracted', 'false') == 'true'
 
@@ -463,44 +473,50 @@ class SplitPDFView(APIView):
         except Exception as e:
             return Response({'error': f'Invalid ranges JSON format: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
-        saved_files = []
+        if ranges:
+            try:
+                inside_document = self._page_ranges(ranges, len(reader.pages))
+            except (AttributeError, TypeError, ValueError):
+                return Response({'error': 'Each range needs whole-number "from" and "to" pages.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not inside_document:
+                return Response(
+                    {'error': f'None of the ranges are inside the document ({len(reader.pages)} pages).'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        stream = str(request.data.get('stream', 'false')).lower() == 'true'
+
+        # --- Split by mode (each helper yields the parts as they are built) ---
+        if split_mode == "range":
+            parts = self._split_by_range(reader, ranges, range_mode, merge_ranges)
+        elif split_mode == "pages":
+            parts = self._split_by_pages(reader, extract_mode, pages_to_extract, merge_extracted)
+        elif split_mode == "size":
+            parts = self._split_by_size(input_pdf, max_file_size, size_unit)
+        else:
+            return Response({'error': 'Invalid split mode'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if stream:
+            # Send each part to the client as soon as it is split; nothing is stored
+            response = StreamingHttpResponse(
+                iter_zip_stream((part['filename'], part['content']) for part in parts),
+                content_type='application/zip'
+            )
+            response['Content-Disposition'] = 'attachment; filename="split_pages.zip"'
+            return response
 
         try:
-            # --- Split by mode ---
-            if split_mode == "range":
-                saved_files = self._split_by_range(reader, user, ranges, range_mode, merge_ranges, request)
-            elif split_mode == "pages":
-                saved_files = self._split_by_pages(reader, user, extract_mode, pages_to_extract, merge_extracted, request)
-            elif split_mode == "size":
-                saved_files = self._split_by_size(reader, user, max_file_size, request)
-            else:
-                return Response({'error': 'Invalid split mode'}, status=status.HTTP_400_BAD_REQUEST)
+            parts = iter(parts)
+            first_part = next(parts, None)
+            second_part = next(parts, None) if first_part else None
 
             # Return format expected by frontend with dynamic message
-            if not saved_files:
+            if not first_part:
                 return Response({'error': 'No files created'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            files_count = len(saved_files)
-            
-            # If multiple files, create ZIP
-            if files_count > 1:
-                zip_file = self._create_zip_from_files(saved_files, user, request)
-                message = f"PDF split completed. {files_count} PDFs created and zipped."
-                
-                response_data = {
-                    'message': message,
-                    'split_pdf': {
-                        'id': zip_file['id'],
-                        'user': zip_file['user'],
-                        'created_at': zip_file['created_at'],
-                        'split_pdf': zip_file['split_pdf']
-                    },
-                    'total_files_created': files_count,
-                    'is_zip': True
-                }
-            else:
+            if second_part is None:
                 # Single file, return as normal
-                first_file = saved_files[0]
+                first_file = self._save_part(first_part, user, request)
                 message = f"PDF split completed. 1 PDF created."
                 
                 response_data = {
@@ -511,9 +527,36 @@ class SplitPDFView(APIView):
                         'created_at': first_file['created_at'],
                         'split_pdf': first_file['split_pdf']
                     },
-                    'total_files_created': files_count,
+                    'total_files_created': 1,
                     'is_zip': False
                 }
+                return Response(response_data, status=status.HTTP_200_OK)
+            
+            # Multiple files: save each part and add it to the ZIP as it is produced
+            saved_files = []
+
+            def save_parts():
+                for part in chain([first_part, second_part], parts):
+                    saved_files.append(self._save_part(part, user, request))
+                    yield part['filename'], part['content']
+
+            with spool_zip(save_parts(), temp_dir=settings.TEMP_PATH) as zip_temp:
+                zip_file = self._save_zip(zip_temp, len(saved_files), user, request)
+            
+            files_count = len(saved_files)
+            message = f"PDF split completed. {files_count} PDFs created and zipped."
+            
+            response_data = {
+                'message': message,
+                'split_pdf': {
+                    'id': zip_file['id'],
+                    'user': zip_file['user'],
+                    'created_at': zip_file['created_at'],
+                    'split_pdf': zip_file['split_pdf']
+                },
+                'total_files_created': files_count,
+                'is_zip': True
+            }
             
             return Response(response_data, status=status.HTTP_200_OK)
 
@@ -522,170 +565,124 @@ class SplitPDFView(APIView):
 
     # ----------------------------
     # Split Helper Methods
+    # Each is a generator of parts: {'filename', 'content', 'start_page', 'end_page'}
     # ----------------------------
-    def _split_by_range(self, reader, user, ranges, range_mode, merge_ranges, request):
-        files = []
+    def _build_part(self, writer, filename, start_page, end_page):
+        buffer = BytesIO()
+        writer.write(buffer)
+        return {
+            'filename': filename,
+            'content': buffer.getvalue(),
+            'start_page': start_page,
+            'end_page': end_page,
+        }
+
+    def _save_part(self, part, user, request):
         protocol = 'https' if request.is_secure() else 'http'
+        split_pdf = SplitPDF(user=user, start_page=part['start_page'], end_page=part['end_page'])
+        split_pdf.split_pdf.save(part['filename'], ContentFile(part['content']))
+        split_pdf.save()
+        return {
+            'id': split_pdf.id,
+            'user': user.id,
+            'created_at': split_pdf.created_at.isoformat(),
+            'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
+        }
+
+    def _split_by_range(self, reader, ranges, range_mode, merge_ranges):
+        total_pages = len(reader.pages)
         
         print(f"DEBUG _split_by_range: ranges={ranges}, range_mode={range_mode}, merge_ranges={merge_ranges}")
 
         if not ranges:
             print(f"DEBUG: No ranges provided, returning empty list")
-            return []
+            return
+
+        page_ranges = self._page_ranges(ranges, total_pages)
+        if not page_ranges:
+            return
 
         if merge_ranges:
             # Merge all ranges into a single file
             writer = PdfWriter()
-            for r in ranges:
-                start, end = int(r.get('from', 1)), int(r.get('to', len(reader.pages)))
-                for i in range(start - 1, min(end, len(reader.pages))):
+            for start, end in page_ranges:
+                for i in range(start - 1, end):
                     writer.add_page(reader.pages[i])
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            split_pdf = SplitPDF(user=user, start_page=1, end_page=len(reader.pages))
-            split_pdf.split_pdf.save(f'split_merged.pdf', ContentFile(buffer.getvalue()))
-            split_pdf.save()
-            files.append({
-                'id': split_pdf.id,
-                'user': user.id,
-                'created_at': split_pdf.created_at.isoformat(),
-                'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-            })
-            return files
+            first_page = min(start for start, _ in page_ranges)
+            last_page = max(end for _, end in page_ranges)
+            yield self._build_part(writer, 'split_merged.pdf', first_page, last_page)
+            return
 
         # Create individual files per range
-        for idx, r in enumerate(ranges, start=1):
-            start, end = int(r.get('from', 1)), int(r.get('to', len(reader.pages)))
+        for idx, (start, end) in enumerate(page_ranges, start=1):
             writer = PdfWriter()
-            for i in range(start - 1, min(end, len(reader.pages))):
+            for i in range(start - 1, end):
                 writer.add_page(reader.pages[i])
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            split_pdf = SplitPDF(user=user, start_page=start, end_page=end)
-            split_pdf.split_pdf.save(f'split_part_{idx}.pdf', ContentFile(buffer.getvalue()))
-            split_pdf.save()
-            files.append({
-                'id': split_pdf.id,
-                'user': user.id,
-                'created_at': split_pdf.created_at.isoformat(),
-                'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-            })
-        return files
-
-    def _split_by_pages(self, reader, user, extract_mode, pages_to_extract, merge_extracted, request):
-        files = []
-        protocol = 'https' if request.is_secure() else 'http'
+            yield self._build_part(writer, f'split_part_{idx}.pdf', start, end)
+
+    @staticmethod
+    def _page_ranges(ranges, total_pages):
+        """(start, end) of each {'from', 'to'} range, limited to the document's pages; ranges outside it are dropped."""
+        page_ranges = []
+        for page_range in ranges:
+            start = max(1, int(page_range.get('from', 1)))
+            end = min(int(page_range.get('to', total_pages)), total_pages)
+            if start <= end:
+                page_ranges.append((start, end))
+        return page_ranges
+
+    def _split_by_pages(self, reader, extract_mode, pages_to_extract, merge_extracted):
         total_pages = len(reader.pages)
 
         if extract_mode == "all":
             for i in range(total_pages):
                 writer = PdfWriter()
                 writer.add_page(reader.pages[i])
-                buffer = BytesIO()
-                writer.write(buffer)
-                buffer.seek(0)
-                split_pdf = SplitPDF(user=user, start_page=i+1, end_page=i+1)
-                split_pdf.split_pdf.save(f'page_{i + 1}.pdf', ContentFile(buffer.getvalue()))
-                split_pdf.save()
-                files.append({
-                    'id': split_pdf.id,
-                    'user': user.id,
-                    'created_at': split_pdf.created_at.isoformat(),
-                    'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-                })
-            return files
+                yield self._build_part(writer, f'page_{i + 1}.pdf', i + 1, i + 1)
+            return
 
         # If specific pages provided (e.g., "1,6,8")
         pages = self._parse_pages(pages_to_extract, total_pages)
         if not pages:
-            return files
+            return
             
         if merge_extracted:
             # Merge selected pages into one PDF
             writer = PdfWriter()
             for p in pages:
                 writer.add_page(reader.pages[p - 1])
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            split_pdf = SplitPDF(user=user, start_page=min(pages), end_page=max(pages))
-            split_pdf.split_pdf.save('extracted_pages.pdf', ContentFile(buffer.getvalue()))
-            split_pdf.save()
-            return [{
-                'id': split_pdf.id,
-                'user': user.id,
-                'created_at': split_pdf.created_at.isoformat(),
-                'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-            }]
+            yield self._build_part(writer, 'extracted_pages.pdf', min(pages), max(pages))
         else:
             # Create separate PDF for each selected page
             for p in pages:
                 writer = PdfWriter()
                 writer.add_page(reader.pages[p - 1])
-                buffer = BytesIO()
-                writer.write(buffer)
-                buffer.seek(0)
-                split_pdf = SplitPDF(user=user, start_page=p, end_page=p)
-                split_pdf.split_pdf.save(f'page_{p}.pdf', ContentFile(buffer.getvalue()))
-                split_pdf.save()
-                files.append({
-                    'id': split_pdf.id,
-                    'user': user.id,
-                    'created_at': split_pdf.created_at.isoformat(),
-                    'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-                })
-            return files
+                yield self._build_part(writer, f'page_{p}.pdf', p, p)
+
+    def _split_by_size(self, input_pdf, max_file_size, size_unit):
+        import fitz
 
-    def _split_by_size(self, reader, user, max_file_size, request):
-        files = []
-        protocol = 'https' if request.is_secure() else 'http'
         try:
-            max_size_kb = float(max_file_size or 500)
+            max_size = float(max_file_size or 500)
         except ValueError:
-            max_size_kb = 500
+            max_size = 500
+        max_bytes = int(max_size * (1024 * 1024 if size_unit == 'MB' else 1024))
 
-        writer = PdfWriter()
-        part = 1
-        buffer = BytesIO()
-
-        for page in reader.pages:
-            writer.add_page(page)
-            temp_buffer = BytesIO()
-            writer.write(temp_buffer)
-            if temp_buffer.tell() / 1024 > max_size_kb:
-                # save current writer and start new
-                writer.remove_page(-1)
-                buffer = BytesIO()
-                writer.write(buffer)
-                buffer.seek(0)
-                split_pdf = SplitPDF(user=user, start_page=1, end_page=1)  # Will be updated with actual pages
-                split_pdf.split_pdf.save(f'size_part_{part}.pdf', ContentFile(buffer.getvalue()))
-                split_pdf.save()
-                files.append({
-                    'id': split_pdf.id,
-                    'user': user.id,
-                    'created_at': split_pdf.created_at.isoformat(),
-                    'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-                })
-                part += 1
-                writer = PdfWriter()
-                writer.add_page(page)
-        # Save the last one
-        buffer = BytesIO()
-        writer.write(buffer)
-        buffer.seek(0)
-        split_pdf = SplitPDF(user=user, start_page=1, end_page=1)  # Will be updated with actual pages
-        split_pdf.split_pdf.save(f'size_part_{part}.pdf', ContentFile(buffer.getvalue()))
-        split_pdf.save()
-        files.append({
-            'id': split_pdf.id,
-            'user': user.id,
-            'created_at': split_pdf.created_at.isoformat(),
-            'split_pdf': f'{protocol}://{request.get_host()}{split_pdf.split_pdf.url}'
-        })
-        return files
+        # Estimates page sizes from their objects and only writes at part boundaries
+        if hasattr(input_pdf, 'temporary_file_path'):
+            pdf_document = fitz.open(input_pdf.temporary_file_path())
+        else:
+            input_pdf.seek(0)
+            pdf_document = fitz.open(stream=input_pdf.read(), filetype='pdf')
+
+        with pdf_document:
+            for part, (start_page, end_page, content) in enumerate(iter_size_parts(pdf_document, max_bytes), start=1):
+                yield {
+                    'filename': f'size_part_{part}.pdf',
+                    'content': content,
+                    'start_page': start_page,
+                    'end_page': end_page,
+                }
 
     def _parse_pages(self, pages_str, total_pages):
         pages = set()
@@ -705,36 +702,10 @@ class SplitPDFView(APIView):
                     pages.add(p)
         return sorted(pages)
     
-    def _create_zip_from_files(self, saved_files, user, request):
-        import zipfile
-        from io import BytesIO
-        
-        zip_buffer = BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for i, file_data in enumerate(saved_files, 1):
-                # Get the actual file from database
-                try:
-                    split_pdf = SplitPDF.objects.get(id=file_data['id'])
-                    if split_pdf.split_pdf and split_pdf.split_pdf.name:
-                        # Read file content
-                        split_pdf.split_pdf.seek(0)
-                        file_content = split_pdf.split_pdf.read()
-                        
-                        # Add to ZIP with descriptive name
-                        filename = f"page_{i}.pdf"
-                        zip_file.writestr(filename, file_content)
-                except Exception as e:
-                    continue
-        
-        zip_buffer.seek(0)
-        
-        # Save ZIP as a new SplitPDF entry
-        zip_split_pdf = SplitPDF(user=user, start_page=1, end_page=len(saved_files))
-        zip_split_pdf.split_pdf.save(
-            'split_pages.zip',
-            ContentFile(zip_buffer.getvalue())
-        )
+    def _save_zip(self, zip_temp, files_count, user, request):
+        # Save ZIP as a new SplitPDF entry, streamed from the spooled archive
+        zip_split_pdf = SplitPDF(user=user, start_page=1, end_page=files_count)
+        zip_split_pdf.split_pdf.save('split_pages.zip', File(zip_temp))
         zip_split_pdf.save()
         
         protocol = 'https' if request.is_secure() else 'http'
@@ -869,9 +840,9 @@ class DownloadSplitPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             split_pdf = SplitPDF.objects.get(id=pdf_id)
-            return FileResponse(
-                split_pdf.split_pdf.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                split_pdf.split_pdf,
                 filename=f'split_{split_pdf.id}.pdf'
             )
         except SplitPDF.DoesNotExist:
@@ -1003,9 +974,9 @@ class DownloadOrganizedPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             organized_pdf = OrganizedPdf.objects.get(id=pdf_id)
-            return FileResponse(
-                organized_pdf.organize_pdf.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                organized_pdf.organize_pdf,
                 filename=f'organized_{organized_pdf.id}.pdf'
             )
         except OrganizedPdf.DoesNotExist:
@@ -1152,12 +1123,12 @@ class DownloadUnlockedPDFView(APIView):
                 return Response({'error': 'PDF file not found'}, status=404)
             
             try:
-                return FileResponse(
-                    unlocked_pdf.unlock_pdf.open('rb'),
-                    as_attachment=True,
+                return serve_field_file(
+                    request,
+                    unlocked_pdf.unlock_pdf,
                     filename=f'unlocked_{unlocked_pdf.id}.pdf'
                 )
-            except FileNotFoundError:
+            except (FileNotFoundError, Http404):
                 return Response({'error': 'PDF file not found on disk'}, status=404)
             except Exception as e:
                 return Response({'error': f'Error accessing file: {str(e)}'}, status=500)
@@ -1222,11 +1193,20 @@ class StampPDFView(APIView):
         if not text:
             return Response({'error': 'No stamp text provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        stamp_options = {
+            'font_size': request.data.get('font_size') or 36,
+            'opacity': request.data.get('opacity') or 0.3,
+            'rotation': request.data.get('rotation') or 0,
+            'position': request.data.get('position') or 'center',
+        }
+
         try:
-            new_file = stamp_pdf_with_text(input_pdf, text, request.user)
+            new_file = stamp_pdf_with_text(input_pdf, text, request.user, request.data.get('pages') or None, **stamp_options)
 
             serializer = StampPdfSerializer(new_file, context={'request': request})
             return Response({'message': 'PDF pages stamped successfully.', 'data': serializer.data})
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1301,9 +1281,9 @@ class DownloadOcrPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             ocr_pdf = OcrPdf.objects.get(id=pdf_id)
-            return FileResponse(
-                ocr_pdf.pdf.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                ocr_pdf.pdf,
                 filename=f'ocr_{ocr_pdf.id}.pdf'
             )
         except OcrPdf.DoesNotExist:
@@ -1332,8 +1312,12 @@ class OcrPDFView(APIView):
                         'pdf': drf_serializers.URLField(),
                     }
                 ),
-                'extracted_text_preview': drf_serializers.CharField(),
-                'total_pages_processed': drf_serializers.IntegerField(),
+                'ocr_mode': drf_serializers.CharField(),
+                'ocr_strategy': drf_serializers.CharField(),
+                'total_pages': drf_serializers.IntegerField(),
+                'pages_ocr_performed': drf_serializers.IntegerField(),
+                'timings_ms': drf_serializers.DictField(child=drf_serializers.FloatField()),
+                'pages': drf_serializers.ListField(child=drf_serializers.DictField()),
             }
         ),
         examples=[
@@ -1348,8 +1332,19 @@ class OcrPDFView(APIView):
                         'created_at': '2024-01-01T00:00:00Z',
                         'pdf': 'http://localhost:8000/media/ocr/output.pdf'
                     },
-                    'extracted_text_preview': 'Sample extracted text from the PDF...',
-                    'total_pages_processed': 5
+                    'ocr_mode': 'hybrid',
+                    'ocr_strategy': 'single',
+                    'total_pages': 2,
+                    'pages_ocr_performed': 1,
+                    'timings_ms': {'analyze': 6.1, 'render': 38.4, 'preprocess': 0.9, 'ocr': 912.5, 'text_layer': 3.2},
+                    'pages': [
+                        {'page_number': 1, 'classification': 'text', 'ocr_performed': False, 'words_added': 0},
+                        {
+                            'page_number': 2, 'classification': 'image', 'ocr_performed': True, 'words_added': 312,
+                            'zoom': 3.0, 'skew': 0.0, 'confidence': 91.4, 'passes': 1,
+                            'timings_ms': {'analyze': 6.1, 'render': 38.4, 'preprocess': 0.9, 'ocr': 912.5, 'text_layer': 3.2}
+                        }
+                    ]
                 }
             ),
             OpenApiExample(
@@ -1363,8 +1358,18 @@ class OcrPDFView(APIView):
                         'created_at': '2024-01-01T00:00:00Z',
                         'pdf': 'http://localhost:8000/media/ocr/output.pdf'
                     },
-                    'extracted_text_preview': 'Texto extraído de muestra del PDF...',
-                    'total_pages_processed': 3
+                    'ocr_mode': 'full',
+                    'ocr_strategy': 'two_pass',
+                    'total_pages': 1,
+                    'pages_ocr_performed': 1,
+                    'timings_ms': {'analyze': 5.8, 'render': 52.0, 'preprocess': 61.7, 'ocr': 1204.3, 'text_layer': 2.1},
+                    'pages': [
+                        {
+                            'page_number': 1, 'classification': 'image', 'ocr_performed': True, 'words_added': 187,
+                            'zoom': 3.13, 'skew': -1.25, 'confidence': 78.6, 'passes': 2,
+                            'timings_ms': {'analyze': 5.8, 'render': 52.0, 'preprocess': 61.7, 'ocr': 1204.3, 'text_layer': 2.1}
+                        }
+                    ]
                 }
             )
         ]
@@ -1372,21 +1377,50 @@ class OcrPDFView(APIView):
     def post(self, request, format=None):
         input_pdf = request.FILES.get('input_pdf', None)
         language = request.data.get('language', 'eng')
+        ocr_mode = request.data.get('ocr_mode', getattr(settings, 'OCR_MODE', 'full'))
+        preprocess = request.data.get('preprocess')
+        ocr_strategy = request.data.get('ocr_strategy', getattr(settings, 'OCR_STRATEGY', 'single'))
 
         if not input_pdf:
             return Response({'error': 'No input PDF file.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if ocr_mode not in OCR_MODES:
+            return Response({'error': f'Invalid ocr_mode. Choose from: {", ".join(OCR_MODES)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if ocr_strategy not in OCR_STRATEGIES:
+            return Response({'error': f'Invalid ocr_strategy. Choose from: {", ".join(OCR_STRATEGIES)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if preprocess is not None:
+            try:
+                parse_preprocess_steps(preprocess)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             user = request.user
+
+            if _run_in_background(request):
+                job = enqueue_job(user, 'ocr', input_pdf, {
+                    'language': language, 'ocr_mode': ocr_mode, 'preprocess': preprocess, 'ocr_strategy': ocr_strategy
+                })
+                return _job_accepted_response(request, job)
             
             # Process PDF with OCR and save to database
-            ocr_pdf, _ = pdf_to_ocr(input_pdf, user, language)
+            ocr_pdf, report = pdf_to_ocr(input_pdf, user, language, mode=ocr_mode, preprocess=preprocess, strategy=ocr_strategy)
             
             serializer = OcrPdfSerializer(ocr_pdf, context={'request': request})
             
+            ocr_failed = any('error' in page for page in report)
             response_data = {
-                'message': 'OCR processing completed successfully.',
-                'data': serializer.data
+                'message': 'OCR failed; the original PDF was saved without a text layer.' if ocr_failed
+                else 'OCR processing completed successfully.',
+                'data': serializer.data,
+                'ocr_mode': ocr_mode,
+                'ocr_strategy': ocr_strategy,
+                'total_pages': len(report),
+                'pages_ocr_performed': sum(1 for page in report if page['ocr_performed']),
+                'timings_ms': total_timings(report),
+                'pages': report
             }
             
             return Response(response_data)
@@ -1408,6 +1442,15 @@ class ExtractTextView(APIView):
                 'language': drf_serializers.ChoiceField(
                     choices=[('eng', 'English'), ('spa', 'Spanish'), ('fra', 'French'), ('deu', 'German')],
                     default='eng'
+                ),
+                'stream': drf_serializers.BooleanField(
+                    default=False,
+                    help_text='Stream one JSON line per page (application/x-ndjson) followed by a summary line'
+                ),
+                'ocr_strategy': drf_serializers.ChoiceField(
+                    choices=[('single', 'Read each page once'), ('two_pass', 'Fast pass, then re-read low-confidence lines/pages')],
+                    required=False,
+                    help_text='Defaults to the OCR_STRATEGY setting'
                 )
             }
         ),
@@ -1418,16 +1461,22 @@ class ExtractTextView(APIView):
                 'extracted_text': drf_serializers.CharField(),
                 'total_pages': drf_serializers.IntegerField(),
                 'has_existing_text': drf_serializers.BooleanField(),
+                'pages_reprocessed': drf_serializers.IntegerField(),
+                'pages': drf_serializers.ListField(child=drf_serializers.DictField()),
             }
         )
     )
     def post(self, request, format=None):
         input_pdf = request.FILES.get('input_pdf', None)
         language = request.data.get('language', 'eng')
+        ocr_strategy = request.data.get('ocr_strategy', getattr(settings, 'OCR_STRATEGY', 'single'))
 
         if not input_pdf:
             return Response({'error': 'No input PDF file provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if ocr_strategy not in OCR_STRATEGIES:
+            return Response({'error': f'Invalid ocr_strategy. Choose from: {", ".join(OCR_STRATEGIES)}'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             import tempfile
             from .ocr_processor import PDFOCRProcessor
@@ -1438,12 +1487,19 @@ class ExtractTextView(APIView):
                     temp_file.write(chunk)
                 temp_path = temp_file.name
             
-            # Extract text using OCR processor
-            processor = PDFOCRProcessor()
-            full_text = processor.extract_text_only(temp_path, language)
+            processor = PDFOCRProcessor(strategy=ocr_strategy)
+            
+            if str(request.data.get('stream', 'false')).lower() == 'true':
+                response = StreamingHttpResponse(
+                    self._stream_pages(processor, temp_path, language),
+                    content_type='application/x-ndjson'
+                )
+                response['Cache-Control'] = 'no-cache'
+                return response
             
-            # Get detailed results for metadata
+            # One structured pass gives both the text and the metadata
             ocr_results = processor.process_pdf(temp_path, output_format='structured', language=language)
+            full_text = processor.format_text(ocr_results)
             
             # Clean up
             os.remove(temp_path)
@@ -1454,12 +1510,48 @@ class ExtractTextView(APIView):
                 'total_pages': ocr_results['total_pages'],
                 'has_existing_text': ocr_results['pages_with_existing_text'] > 0,
                 'pages_with_existing_text': ocr_results['pages_with_existing_text'],
-                'pages_requiring_ocr': ocr_results['pages_requiring_ocr']
+                'pages_requiring_ocr': ocr_results['pages_requiring_ocr'],
+                'pages_reprocessed': ocr_results['pages_reprocessed'],
+                # Per-page OCR quality: mean word confidence and how many passes it took
+                'pages': [
+                    {key: page[key] for key in ('page_number', 'ocr_performed', 'confidence', 'passes')}
+                    for page in ocr_results['extracted_text']
+                ]
             })
             
         except Exception as e:
             return Response({'error': f'Text extraction failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _stream_pages(self, processor, temp_path, language):
+        """Yield one NDJSON line per page as it finishes, then a summary line."""
+        summary = {
+            'type': 'summary',
+            'total_pages': 0,
+            'pages_with_existing_text': 0,
+            'pages_requiring_ocr': 0,
+            'processing_status': 'success',
+            'errors': []
+        }
+        try:
+            for page_result in processor.iter_pages(temp_path, language):
+                summary['total_pages'] += 1
+                if page_result['has_existing_text']:
+                    summary['pages_with_existing_text'] += 1
+                else:
+                    summary['pages_requiring_ocr'] += 1
+                yield json.dumps({'type': 'page', **page_result}) + '\n'
+        except Exception as e:
+            summary['processing_status'] = 'error'
+            summary['errors'].append(str(e))
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        
+        summary['has_existing_text'] = summary['pages_with_existing_text'] > 0
+        yield json.dumps(summary) + '\n'
+
 
 @extend_schema(tags=['PDF Operations'])
 class PDFToFormatView(APIView):
@@ -1467,6 +1559,8 @@ class PDFToFormatView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     serializer_class = PDFToFormatRequestSerializer
 
+    SUPPORTED_FORMATS = ['text', 'jpeg', 'png', 'word', 'excel', 'powerpoint']
+
     @extend_schema(
         request=PDFToFormatRequestSerializer,
         responses=inline_serializer(
@@ -1496,35 +1590,25 @@ class PDFToFormatView(APIView):
         if not output_format:
             return Response({'error': 'Output format is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if output_format not in self.SUPPORTED_FORMATS:
+            return Response({'error': 'Unsupported output format.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            render_options = self._get_render_options(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             user = request.user
+
+            if _run_in_background(request):
+                job = enqueue_job(user, 'pdf_to_format', input_pdf, {
+                    'output_format': output_format,
+                    'render_options': render_options,
+                })
+                return _job_accepted_response(request, job)
             
-            # Convert based on format
-            if output_format == 'text':
-                converted_content = self._convert_to_text(input_pdf)
-                file_extension = 'txt'
-            elif output_format in ['jpeg', 'png']:
-                converted_content = self._convert_to_images(input_pdf, output_format)
-                file_extension = 'zip'
-            elif output_format == 'word':
-                converted_content = self._convert_to_word(input_pdf)
-                file_extension = 'docx'
-            elif output_format == 'excel':
-                converted_content = self._convert_to_excel(input_pdf)
-                file_extension = 'xlsx'
-            elif output_format == 'powerpoint':
-                converted_content = self._convert_to_powerpoint(input_pdf)
-                file_extension = 'pptx'
-            else:
-                return Response({'error': 'Unsupported output format.'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Save conversion
-            conversion = PDFFormatConversion(user=user, output_format=output_format)
-            conversion.converted_file.save(
-                f'converted_{output_format}.{file_extension}',
-                ContentFile(converted_content)
-            )
-            conversion.save()
+            conversion = self.convert_and_save(input_pdf, output_format, user, render_options)
             
             # Use download endpoint instead of direct media URL
             protocol = 'https' if request.is_secure() else 'http'
@@ -1542,9 +1626,61 @@ class PDFToFormatView(APIView):
             }
             return Response(response_data)
             
+        except PageSelectionError as e:
+            # Page selection outside the document
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'Conversion failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _get_render_options(self, request):
+        """Read dpi / pages / max_dimension for image output, raising ValueError on bad values."""
+        from .rendering import DEFAULT_DPI, MIN_DPI, MAX_DPI, parse_page_selection
+
+        try:
+            dpi = int(request.data.get('dpi') or DEFAULT_DPI)
+            max_dimension = int(request.data.get('max_dimension') or 0) or None
+        except (TypeError, ValueError):
+            raise ValueError('dpi and max_dimension must be whole numbers.')
+        if not MIN_DPI <= dpi <= MAX_DPI:
+            raise ValueError(f'dpi must be between {MIN_DPI} and {MAX_DPI}.')
+        if max_dimension is not None and max_dimension < 16:
+            raise ValueError('max_dimension must be at least 16 pixels.')
+
+        pages = (request.data.get('pages') or '').strip() or None
+        if pages:
+            # Syntax check only; the page count is checked when rendering
+            parse_page_selection(pages, 10 ** 9)
+
+        return {'dpi': dpi, 'pages': pages, 'max_dimension': max_dimension}
     
+    def convert(self, pdf_file, output_format, render_options=None):
+        """Convert a PDF into output_format, returning (content bytes, file extension)."""
+        if output_format == 'text':
+            return self._convert_to_text(pdf_file), 'txt'
+        elif output_format in ['jpeg', 'png']:
+            return self._convert_to_images(pdf_file, output_format, render_options), 'zip'
+        elif output_format == 'word':
+            return self._convert_to_word(pdf_file), 'docx'
+        elif output_format == 'excel':
+            return self._convert_to_excel(pdf_file), 'xlsx'
+        elif output_format == 'powerpoint':
+            return self._convert_to_powerpoint(pdf_file), 'pptx'
+        raise ValueError(f'Unsupported output format: {output_format}')
+
+    def convert_and_save(self, pdf_file, output_format, user, render_options=None):
+        """Run the conversion and store the result as a PDFFormatConversion."""
+        converted_content, file_extension = self.convert(pdf_file, output_format, render_options)
+        if not isinstance(converted_content, File):
+            converted_content = ContentFile(converted_content)
+
+        conversion = PDFFormatConversion(user=user, output_format=output_format)
+        try:
+            conversion.converted_file.save(f'converted_{output_format}.{file_extension}', converted_content)
+        finally:
+            converted_content.close()
+        conversion.save()
+        return conversion
+
     def _convert_to_text(self, pdf_file):
         try:
             import tempfile
@@ -1559,52 +1695,65 @@ class PDFToFormatView(APIView):
     def _convert_to_text_advanced(self, pdf_file):
         import tempfile
         import pdfplumber
+        from .text_store import open_document
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            pdf_file.seek(0)
-            for chunk in pdf_file.chunks():
-                temp_file.write(chunk)
-            temp_path = temp_file.name
-        
-        text_parts = []
-        with pdfplumber.open(temp_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text(layout=True)
-                if page_text and page_text.strip():
-                    text_parts.append(f"--- Page {page_num} ---\n{page_text.strip()}\n")
-                
-                tables = page.extract_tables()
-                for i, table in enumerate(tables):
-                    text_parts.append(f"\n--- Table {i+1} on Page {page_num} ---\n")
-                    for row in table:
-                        if row:
-                            text_parts.append('\t'.join([str(cell) if cell else '' for cell in row]))
-                    text_parts.append('\n')
+        # Layout text with tables is stored per page as its own variant of the document's text
+        stored = open_document(pdf_file, variant='layout')
+        if not stored.complete:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+                pdf_file.seek(0)
+                for chunk in pdf_file.chunks():
+                    temp_file.write(chunk)
+                temp_path = temp_file.name
+            
+            try:
+                with pdfplumber.open(temp_path) as pdf:
+                    for page_num, page in enumerate(pdf.pages, 1):
+                        if stored.get(page_num) is None:
+                            stored.put(page_num, self._layout_page_text(page, page_num), 'layout')
+            finally:
+                stored.flush()
+                os.remove(temp_path)
         
-        os.remove(temp_path)
+        # pdfplumber can see fewer pages than PyMuPDF counted; those stay missing
+        text_parts = [(stored.get(page_num) or {}).get('text') for page_num in range(1, stored.page_count + 1)]
+        text_parts = [part for part in text_parts if part]
         final_text = '\n'.join(text_parts) if text_parts else 'No text content found in PDF'
         return final_text.encode('utf-8')
     
+    @staticmethod
+    def _layout_page_text(page, page_num):
+        """Layout-preserving text of a pdfplumber page followed by its tables."""
+        text_parts = []
+        page_text = page.extract_text(layout=True)
+        if page_text and page_text.strip():
+            text_parts.append(f"--- Page {page_num} ---\n{page_text.strip()}\n")
+        
+        tables = page.extract_tables()
+        for i, table in enumerate(tables):
+            text_parts.append(f"\n--- Table {i+1} on Page {page_num} ---\n")
+            for row in table:
+                if row:
+                    text_parts.append('\t'.join([str(cell) if cell else '' for cell in row]))
+            text_parts.append('\n')
+        return '\n'.join(text_parts)
+    
     def _convert_to_text_basic(self, pdf_file):
-        from PyPDF2 import PdfReader
-        pdf_file.seek(0)
-        reader = PdfReader(pdf_file)
+        # Plain page text from the shared store (PyMuPDF), as read by the other text endpoints
+        from .text_store import iter_page_texts
         
         text_parts = []
-        for page_num, page in enumerate(reader.pages, 1):
-            page_text = page.extract_text()
-            if page_text.strip():
-                text_parts.append(f"--- Page {page_num} ---\n{page_text.strip()}\n")
+        for page in iter_page_texts(pdf_file):
+            if page['text'].strip():
+                text_parts.append(f"--- Page {page['page_number']} ---\n{page['text'].strip()}\n")
         
         final_text = '\n'.join(text_parts) if text_parts else 'No text content found in PDF'
         return final_text.encode('utf-8')
     
-    def _convert_to_images(self, pdf_file, format_type):
-        # Reuse existing PDF to image logic
-        from .utils import convert_pdf_to_image, create_zip_file
-        images = convert_pdf_to_image(pdf_file, format_type)
-        _, zip_content = create_zip_file(images, None, format_type)
-        return zip_content
+    def _convert_to_images(self, pdf_file, format_type, render_options=None):
+        # Only the selected pages are rendered (in parallel); they are zipped as they arrive
+        images = convert_pdf_to_image(pdf_file, format_type, **(render_options or {}))
+        return create_zip_file(images, format_type)
     
     def _convert_to_word(self, pdf_file):
         try:
@@ -2142,10 +2291,12 @@ class PDFToFormatView(APIView):
 class FormatToPDFView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
-    serializer_class = WordToPdfRequestSerializer
+    serializer_class = FormatToPDFRequestSerializer
+
+    SUPPORTED_FORMATS = ['doc', 'docx', 'xls', 'xlsx', 'csv', 'ppt', 'pptx', 'txt', 'rtf', 'jpg', 'jpeg', 'png', 'gif', 'bmp']
 
     @extend_schema(
-        request=WordToPdfRequestSerializer,
+        request=FormatToPDFRequestSerializer,
         responses=inline_serializer(
             name='FormatToPDFResponse',
             fields={
@@ -2174,39 +2325,17 @@ class FormatToPDFView(APIView):
             file_ext = input_file.name.split('.')[-1].lower()
             input_format = file_ext
 
+        if input_format not in self.SUPPORTED_FORMATS:
+            return Response({'error': f'Unsupported input format: {input_format}'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             user = request.user
+
+            if _run_in_background(request):
+                job = enqueue_job(user, 'format_to_pdf', input_file, {'input_format': input_format})
+                return _job_accepted_response(request, job)
             
-            if input_format in ['doc', 'docx']:
-                pdf_content = self._convert_word_to_pdf(input_file)
-            elif input_format in ['xls', 'xlsx']:
-                pdf_content = self._convert_excel_to_pdf(input_file)
-            elif input_format == 'csv':
-                pdf_content = self._convert_csv_to_pdf(input_file)
-            elif input_format in ['ppt', 'pptx']:
-                pdf_content = self._convert_powerpoint_to_pdf(input_file)
-            elif input_format == 'txt':
-                pdf_content = self._convert_text_to_pdf(input_file)
-            elif input_format == 'rtf':
-                pdf_content = self._convert_rtf_to_pdf(input_file)
-            elif input_format in ['jpg', 'jpeg', 'png', 'gif', 'bmp']:
-                pdf_content = self._convert_image_to_pdf(input_file)
-            else:
-                return Response({'error': f'Unsupported input format: {input_format}'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Use existing WordToPdfConversion model
-            conversion_instance = WordToPdfConversion(user=user)
-            conversion_instance.save()
-            
-            word_to_pdf_instance = WordToPdf()
-            word_to_pdf_instance.word_to_pdf.save(
-                f'{input_format}_to_pdf.pdf',
-                ContentFile(pdf_content)
-            )
-            word_to_pdf_instance.save()
-            
-            conversion_instance.word_to_pdfs.add(word_to_pdf_instance)
-            conversion_instance.save()
+            conversion_instance, word_to_pdf_instance = self.convert_and_save(input_file, input_format, user)
             
             # Use download endpoint instead of direct media URL
             protocol = 'https' if request.is_secure() else 'http'
@@ -2227,6 +2356,43 @@ class FormatToPDFView(APIView):
         except Exception as e:
             return Response({'error': f'Conversion failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def convert(self, file, input_format):
+        """Convert an uploaded document of input_format into PDF bytes."""
+        if input_format in ['doc', 'docx']:
+            return self._convert_word_to_pdf(file)
+        elif input_format in ['xls', 'xlsx']:
+            return self._convert_excel_to_pdf(file)
+        elif input_format == 'csv':
+            return self._convert_csv_to_pdf(file)
+        elif input_format in ['ppt', 'pptx']:
+            return self._convert_powerpoint_to_pdf(file)
+        elif input_format == 'txt':
+            return self._convert_text_to_pdf(file)
+        elif input_format == 'rtf':
+            return self._convert_rtf_to_pdf(file)
+        elif input_format in ['jpg', 'jpeg', 'png', 'gif', 'bmp']:
+            return self._convert_image_to_pdf(file)
+        raise ValueError(f'Unsupported input format: {input_format}')
+
+    def convert_and_save(self, file, input_format, user):
+        """Run the conversion and store it using the WordToPdfConversion models."""
+        pdf_content = self.convert(file, input_format)
+
+        # Use existing WordToPdfConversion model
+        conversion_instance = WordToPdfConversion(user=user)
+        conversion_instance.save()
+
+        word_to_pdf_instance = WordToPdf()
+        word_to_pdf_instance.word_to_pdf.save(
+            f'{input_format}_to_pdf.pdf',
+            ContentFile(pdf_content)
+        )
+        word_to_pdf_instance.save()
+
+        conversion_instance.word_to_pdfs.add(word_to_pdf_instance)
+        conversion_instance.save()
+        return conversion_instance, word_to_pdf_instance
+
     def _convert_word_to_pdf(self, file):
         from docx import Document
         from reportlab.pdfgen import canvas
@@ -2437,9 +2603,9 @@ class DownloadConvertedPDFView(APIView):
     def get(self, request, pdf_id, format=None):
         try:
             word_to_pdf = WordToPdf.objects.get(id=pdf_id)
-            return FileResponse(
-                word_to_pdf.word_to_pdf.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                word_to_pdf.word_to_pdf,
                 filename=f'converted_{word_to_pdf.id}.pdf'
             )
         except WordToPdf.DoesNotExist:
@@ -2452,10 +2618,294 @@ class DownloadFormatConvertedView(APIView):
     def get(self, request, conversion_id, format=None):
         try:
             conversion = PDFFormatConversion.objects.get(id=conversion_id)
-            return FileResponse(
-                conversion.converted_file.open('rb'),
-                as_attachment=True,
+            return serve_field_file(
+                request,
+                conversion.converted_file,
                 filename=f'converted_{conversion.output_format}_{conversion.id}.{conversion.converted_file.name.split(".")[-1]}'
             )
         except PDFFormatConversion.DoesNotExist:
             return Response({'error': 'Converted file not found'}, status=404)
+
+
+def _run_in_background(request):
+    """Whether the caller asked for the operation to be queued as a background job."""
+    default = 'true' if getattr(settings, 'PDF_JOBS_ASYNC_BY_DEFAULT', False) else 'false'
+    return str(request.data.get('background', default)).lower() == 'true'
+
+
+def _job_accepted_response(request, job):
+    protocol = 'https' if request.is_secure() else 'http'
+    status_url = f'{protocol}://{request.get_host()}{reverse("pdf_job_status", args=[job.id])}'
+    return Response({
+        'message': 'Job queued for background processing.',
+        'job': {
+            'id': job.id,
+            'operation': job.operation,
+            'status': job.status,
+            'progress': job.progress,
+            'status_url': status_url,
+            'created_at': job.created_at.isoformat(),
+        }
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema(tags=['PDF Operations'])
+class JobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses=JobSerializer)
+    def get(self, request, job_id, format=None):
+        try:
+            # Other users' jobs (and their result URLs) look the same as missing ones
+            job = Job.objects.get(id=job_id, user=request.user)
+        except Job.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=404)
+
+        serializer = JobSerializer(job, context={'request': request})
+        return Response(serializer.data)
+
+
+@extend_schema(tags=['PDF Operations'])
+class PipelinePDFView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+    serializer_class = PipelinePDFRequestSerializer
+
+    @extend_schema(
+        request=PipelinePDFRequestSerializer,
+        responses=inline_serializer(
+            name='PipelinePDFResponse',
+            fields={
+                'message': drf_serializers.CharField(),
+                'pipeline_data': inline_serializer(
+                    name='PipelinePDFData',
+                    fields={
+                        'id': drf_serializers.IntegerField(),
+                        'user': drf_serializers.IntegerField(),
+                        'operations': drf_serializers.ListField(child=drf_serializers.CharField()),
+                        'page_count': drf_serializers.IntegerField(),
+                        'output_size': drf_serializers.IntegerField(),
+                        'steps': drf_serializers.ListField(child=drf_serializers.DictField()),
+                        'pipeline_pdf': drf_serializers.URLField(),
+                        'created_at': drf_serializers.DateTimeField(),
+                    }
+                ),
+            }
+        ),
+        examples=[
+            OpenApiExample(
+                'Pipeline PDF Example',
+                value={
+                    'message': 'PDF pipeline completed.',
+                    'pipeline_data': {
+                        'id': 1,
+                        'user': 5,
+                        'operations': ['unlock', 'merge', 'compress', 'stamp'],
+                        'page_count': 14,
+                        'output_size': 482113,
+                        'steps': [
+                            {'op': 'unlock', 'page_count': 10, 'duration_ms': 0.4},
+                            {'op': 'merge', 'page_count': 14, 'duration_ms': 12.8, 'files_merged': 1},
+                            {'op': 'compress', 'page_count': 14, 'duration_ms': 240.1, 'images_recompressed': 6},
+                            {'op': 'stamp', 'page_count': 14, 'duration_ms': 9.3},
+                        ],
+                        'pipeline_pdf': 'http://localhost:8000/pdf/download_pipeline_pdf/1/',
+                        'created_at': '2024-01-01T00:00:00Z'
+                    }
+                }
+            )
+        ]
+    )
+    def post(self, request, format=None):
+        input_pdf = request.FILES.get('input_pdf')
+        operations = request.data.get('operations')
+
+        if not input_pdf:
+            return Response({'error': 'No input PDF file provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not operations:
+            return Response({'error': 'No operations provided.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if isinstance(operations, str):
+                operations = json.loads(operations)
+        except ValueError:
+            return Response({'error': 'operations must be a JSON list.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Every other uploaded field can be referenced by a merge step
+        attachments = {name: uploaded for name, uploaded in request.FILES.items() if name != 'input_pdf'}
+
+        try:
+            pipeline_pdf, stats = run_pdf_pipeline(input_pdf, request.user, operations, attachments)
+        except PipelineError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        protocol = 'https' if request.is_secure() else 'http'
+        download_url = f'{protocol}://{request.get_host()}/pdf/download_pipeline_pdf/{pipeline_pdf.id}/'
+
+        return Response({
+            'message': 'PDF pipeline completed.',
+            'pipeline_data': {
+                'id': pipeline_pdf.id,
+                'user': request.user.id,
+                'operations': pipeline_pdf.operations,
+                'page_count': stats['page_count'],
+                'output_size': stats['output_size'],
+                'steps': stats['steps'],
+                'pipeline_pdf': download_url,
+                'created_at': pipeline_pdf.created_at.isoformat()
+            }
+        })
+
+
+@extend_schema(tags=['PDF Operations'])
+class DownloadPipelinePDFView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, pdf_id, format=None):
+        try:
+            pipeline_pdf = PipelinePDF.objects.get(id=pdf_id)
+            return serve_field_file(
+                request,
+                pipeline_pdf.pipeline_pdf,
+                filename=f'pipeline_{pipeline_pdf.id}.pdf'
+            )
+        except PipelinePDF.DoesNotExist:
+            return Response({'error': 'Pipeline PDF not found'}, status=404)
+
+
+def _thumbnail_url(request, document_id, page_number):
+    protocol = 'https' if request.is_secure() else 'http'
+    return f'{protocol}://{request.get_host()}/pdf/{document_id}/pages/{page_number}/thumbnail/'
+
+
+def _thumbnail_options(params):
+    """Read width/format from request params, raising ValueError on bad values."""
+    try:
+        width = int(params.get('width') or DEFAULT_THUMBNAIL_WIDTH)
+    except (TypeError, ValueError):
+        raise ValueError('width must be a whole number.')
+    # Not "format": DRF reserves that query parameter for content negotiation
+    output_format = str(params.get('output_format') or 'jpeg').lower()
+    PreviewService.validate_options(width, output_format)
+    return width, output_format
+
+
+@extend_schema(tags=['PDF Operations'])
+class PreviewPDFView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+    serializer_class = PreviewPDFRequestSerializer
+
+    @extend_schema(
+        request=PreviewPDFRequestSerializer,
+        responses=inline_serializer(
+            name='PreviewPDFResponse',
+            fields={
+                'document_id': drf_serializers.CharField(),
+                'page_count': drf_serializers.IntegerField(),
+                'thumbnail_url': drf_serializers.URLField(),
+            }
+        ),
+        examples=[
+            OpenApiExample(
+                'Preview PDF Example',
+                value={
+                    'document_id': '9f2c...e1',
+                    'page_count': 12,
+                    'thumbnail_url': 'http://localhost:8000/pdf/9f2c...e1/pages/{page}/thumbnail/'
+                }
+            )
+        ]
+    )
+    def post(self, request, format=None):
+        input_pdf = request.FILES.get('input_pdf')
+        if not input_pdf:
+            return Response({'error': 'No input PDF file provided.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            document_id, page_count = get_preview_service().add_document(input_pdf)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'document_id': document_id,
+            'page_count': page_count,
+            'thumbnail_url': _thumbnail_url(request, document_id, '{page}'),
+        })
+
+
+@extend_schema(tags=['PDF Operations'])
+class PageThumbnailView(APIView):
+    # Documents are addressed by content hash, so the id itself is the capability (like the download links)
+    permission_classes = [AllowAny]
+
+    def get(self, request, document_id, page_number, format=None):
+        try:
+            width, output_format = _thumbnail_options(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        preview_service = get_preview_service()
+        try:
+            image_path = preview_service.thumbnail_path(document_id, page_number, width, output_format)
+        except PreviewNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        response = serve_file(
+            request,
+            image_path,
+            content_type=THUMBNAIL_FORMATS[output_format],
+            etag=preview_service.thumbnail_etag(document_id, page_number, width, output_format),
+        )
+        # Same URL always means the same image
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+
+@extend_schema(tags=['PDF Operations'])
+class PrefetchThumbnailsView(APIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PrefetchThumbnailsRequestSerializer
+
+    @extend_schema(
+        request=PrefetchThumbnailsRequestSerializer,
+        responses=inline_serializer(
+            name='PrefetchThumbnailsResponse',
+            fields={
+                'document_id': drf_serializers.CharField(),
+                'first_page': drf_serializers.IntegerField(),
+                'last_page': drf_serializers.IntegerField(),
+                'rendered': drf_serializers.IntegerField(),
+                'cached': drf_serializers.IntegerField(),
+                'thumbnails': drf_serializers.ListField(child=drf_serializers.URLField()),
+            }
+        )
+    )
+    def post(self, request, document_id, format=None):
+        try:
+            width, output_format = _thumbnail_options(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            first_page = int(request.data.get('first_page') or 1)
+            last_page = int(request.data.get('last_page') or first_page + 19)
+        except (TypeError, ValueError):
+            return Response({'error': 'first_page and last_page must be whole numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = get_preview_service().prefetch(document_id, first_page, last_page, width, output_format)
+        except PreviewNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        query = f'?width={width}&output_format={output_format}'
+        result['document_id'] = document_id
+        result['thumbnails'] = [
+            _thumbnail_url(request, document_id, page_number) + query
+            for page_number in range(result['first_page'], result['last_page'] + 1)
+        ]
+        return Response(result)
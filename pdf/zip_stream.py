@@ -0,0 +1,92 @@
+"""
+Streaming ZIP Module
+Builds ZIP archives one entry at a time, so memory stays bounded by a single entry.
+
+Entries are (arcname, content) pairs where content is bytes or a readable
+file object. Archives can be spooled to a temporary file (to hand to Django
+storage) or yielded as chunks for a StreamingHttpResponse while the entries
+are still being produced.
+"""
+
+import shutil
+import tempfile
+from zipfile import ZipFile, ZIP_DEFLATED
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects bytes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _write_entry(zip_file, arcname, content):
+    with zip_file.open(arcname, 'w', force_zip64=True) as dest:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            dest.write(content)
+        else:
+            shutil.copyfileobj(content, dest, COPY_CHUNK_SIZE)
+
+
+def write_zip(entries, fileobj, compression=ZIP_DEFLATED):
+    """
+    Write entries into fileobj as a ZIP archive.
+
+    Returns:
+        int: Number of entries written
+    """
+    count = 0
+    with ZipFile(fileobj, 'w', compression) as zip_file:
+        for arcname, content in entries:
+            _write_entry(zip_file, arcname, content)
+            count += 1
+    return count
+
+
+def spool_zip(entries, temp_dir=None, compression=ZIP_DEFLATED):
+    """
+    Write entries into an anonymous temporary file.
+
+    Returns:
+        file: Temporary file positioned at the start of the archive (deleted on close)
+    """
+    zip_temp = tempfile.TemporaryFile(dir=temp_dir, suffix='.zip')
+    try:
+        write_zip(entries, zip_temp, compression)
+    except Exception:
+        zip_temp.close()
+        raise
+    zip_temp.seek(0)
+    return zip_temp
+
+
+def iter_zip_stream(entries, compression=ZIP_DEFLATED):
+    """
+    Yield a ZIP archive as byte chunks, one chunk per entry plus the central directory.
+
+    The archive is written with data descriptors (no seeking), so each entry
+    can be sent to the client as soon as it has been produced.
+    """
+    sink = _ChunkSink()
+    with ZipFile(sink, 'w', compression) as zip_file:
+        for arcname, content in entries:
+            _write_entry(zip_file, arcname, content)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
@@ -0,0 +1,142 @@
+"""
+Size-bounded LRU cache on local disk.
+
+Entries are plain files named after their key (sharded by the first two
+characters). Reads touch the file's mtime so eviction can drop the least
+recently used entries first. Writes go through a temp file and os.replace, so
+concurrent processes never see a half-written entry. One instance can be
+shared by the threads of a process; the size estimate is then kept once.
+
+Kept free of Django imports so it can be used from pool worker processes.
+"""
+
+import os
+import tempfile
+import threading
+
+
+class DiskLRUCache:
+    """Bytes-in, bytes-out cache directory with LRU eviction past max_bytes."""
+
+    # Evict down to this fraction of max_bytes so we don't rescan on every write
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._approx_size = None
+        self._size_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Pickled into pool worker processes; a lock can't be, and each process keeps its own estimate
+        state = self.__dict__.copy()
+        del state['_size_lock']
+        state['_approx_size'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._size_lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def set(self, key, data):
+        """Store bytes under key, evicting old entries if the cache grew too big."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        self._account(len(data))
+
+    def path(self, key):
+        """Return the path of the cached file for key (marking it used), or None on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def set_file(self, key, source_path):
+        """Move an existing file into the cache under key (source must be on the same filesystem)."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(source_path)
+        os.replace(source_path, path)
+        self._account(size)
+        return path
+
+    def _account(self, added_bytes):
+        with self._size_lock:
+            if self._approx_size is None:
+                self._approx_size = self._scan_size()
+            else:
+                self._approx_size += added_bytes
+            if self._approx_size > self.max_bytes:
+                self.evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _entries(self):
+        """Yield (mtime, size, path) for every cached file."""
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.tmp-'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache is under its limit."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.EVICT_TO_RATIO
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._approx_size = total
+        return total
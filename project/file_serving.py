@@ -0,0 +1,196 @@
+"""
+File serving helpers shared by the media view and the download endpoints.
+
+- Files are streamed (FileResponse), never read into memory.
+- ETag / Last-Modified with conditional GET (304 / 412).
+- Single byte ranges (206 Partial Content, 416 when unsatisfiable), as
+  requested by PDF viewers and mobile clients.
+- Optional offload to the front server with X-Accel-Redirect (nginx) or
+  X-Sendfile (Apache/lighttpd), configured with MEDIA_SERVE_OFFLOAD.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class _RangeFile:
+    """Read-only view of `length` bytes of an open file starting at `start`."""
+
+    def __init__(self, fileobj, start, length):
+        self.fileobj = fileobj
+        self.remaining = length
+        fileobj.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+
+def _etag(stat_result):
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _parse_range(range_header, size):
+    """
+    Parse a single-range Range header.
+
+    Returns:
+        tuple: (start, end) inclusive, None to serve the whole file, or False if unsatisfiable
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        # Multiple ranges or other units: serving the full body is allowed
+        return None
+
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+    if start == '':
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def _offload_response(path, content_type):
+    """Hand the file to the front server, or None if offloading does not apply."""
+    mode = getattr(settings, 'MEDIA_SERVE_OFFLOAD', '')
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+
+    if mode == 'x-accel-redirect':
+        media_root = os.path.realpath(settings.MEDIA_ROOT)
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([media_root, real_path]) != media_root:
+            return None
+        relative_path = os.path.relpath(real_path, media_root).replace(os.sep, '/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(relative_path)
+        return response
+
+    return None
+
+
+def serve_file(request, path, filename=None, as_attachment=False, content_type=None, etag=None):
+    """
+    Serve a file from the local filesystem with conditional GET and Range support.
+
+    Pass etag when the caller has a better validator than mtime and size
+    (e.g. content-addressed files whose mtime is touched on every read).
+
+    Raises:
+        Http404: if the file does not exist
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise Http404("File not found")
+    if not os.path.isfile(path):
+        raise Http404("File not found")
+
+    etag = etag or _etag(stat_result)
+    mtime = stat_result.st_mtime
+    size = stat_result.st_size
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if not_modified is not None:
+        return not_modified
+
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(filename or path)
+        content_type = content_type or 'application/octet-stream'
+
+    response = _offload_response(path, content_type)
+    if response is not None:
+        # The front server handles Range itself
+        if filename or as_attachment:
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename or os.path.basename(path))}"
+    else:
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and _if_range_matches(request, etag, mtime):
+            byte_range = _parse_range(range_header, size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(
+                _RangeFile(open(path, 'rb'), start, length),
+                status=206,
+                content_type=content_type,
+                as_attachment=as_attachment,
+                filename=filename or os.path.basename(path),
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        else:
+            # Full body: FileResponse lets the WSGI server use sendfile() where available
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type,
+                as_attachment=as_attachment,
+                filename=filename or os.path.basename(path),
+            )
+        response.block_size = STREAM_BLOCK_SIZE
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    return response
+
+
+def serve_field_file(request, field_file, filename=None, as_attachment=True):
+    """
+    Serve a model FileField value.
+
+    Files on local storage get the full treatment (Range, conditional GET,
+    offload); other storage backends fall back to a plain streamed response.
+    """
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        return FileResponse(field_file.open('rb'), as_attachment=as_attachment, filename=filename)
+    return serve_file(request, path, filename=filename, as_attachment=as_attachment)
@@ -0,0 +1,97 @@
+"""
+Shared OpenAI clients.
+
+Every LLM call in the project goes through these clients instead of building
+its own. Each client owns one pooled httpx transport with keep-alive, so
+requests reuse warm TLS connections instead of doing a new handshake per
+call, and connect/read timeouts and pool size are configured in one place
+(OPENAI_* settings).
+
+Sync clients are shared by every thread of the process (httpx clients are
+thread-safe). Async clients are kept per event loop, because an httpx
+AsyncClient's connections belong to the loop that opened them.
+"""
+
+import asyncio
+import threading
+import weakref
+
+import httpx
+import openai
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _timeout():
+    return httpx.Timeout(
+        getattr(settings, 'OPENAI_READ_TIMEOUT', 60.0),
+        connect=getattr(settings, 'OPENAI_CONNECT_TIMEOUT', 5.0),
+    )
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=getattr(settings, 'OPENAI_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=getattr(settings, 'OPENAI_MAX_KEEPALIVE_CONNECTIONS', 10),
+        keepalive_expiry=getattr(settings, 'OPENAI_KEEPALIVE_EXPIRY', 60.0),
+    )
+
+
+def _client_options(api_key):
+    return {
+        'api_key': api_key or settings.OPENAI_API_KEY,
+        'timeout': _timeout(),
+        'max_retries': getattr(settings, 'OPENAI_MAX_RETRIES', 2),
+    }
+
+
+def get_openai_client(api_key=None):
+    """
+    The process-wide openai.OpenAI client (one per API key).
+
+    Args:
+        api_key (str): Overrides the OPENAI_API_KEY setting
+
+    Returns:
+        openai.OpenAI
+    """
+    options = _client_options(api_key)
+    with _lock:
+        client = _clients.get(options['api_key'])
+        if client is None:
+            client = openai.OpenAI(
+                http_client=openai.DefaultHttpxClient(limits=_limits(), timeout=options['timeout']),
+                **options
+            )
+            _clients[options['api_key']] = client
+    return client
+
+
+def get_async_openai_client(api_key=None):
+    """
+    The openai.AsyncOpenAI client for the running event loop (one per API key).
+
+    Must be called from inside a coroutine.
+
+    Args:
+        api_key (str): Overrides the OPENAI_API_KEY setting
+
+    Returns:
+        openai.AsyncOpenAI
+    """
+    loop = asyncio.get_running_loop()
+    options = _client_options(api_key)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(options['api_key'])
+        if client is None:
+            client = openai.AsyncOpenAI(
+                http_client=openai.DefaultAsyncHttpxClient(limits=_limits(), timeout=options['timeout']),
+                **options
+            )
+            clients[options['api_key']] = client
+    return client
@@ -1,43 +1,35 @@
 from django.http import HttpResponse, Http404
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils._os import safe_join
 from django.views import View
-import os
-import mimetypes
+
+from .file_serving import serve_file
+
+
+def add_cors_headers(response):
+    response['Access-Control-Allow-Origin'] = '*'
+    response['Access-Control-Allow-Methods'] = 'GET, HEAD, OPTIONS'
+    response['Access-Control-Allow-Headers'] = '*'
+    # Let browser PDF viewers read range/caching headers cross-origin
+    response['Access-Control-Expose-Headers'] = 'Accept-Ranges, Content-Range, Content-Length, ETag, Last-Modified'
+    return response
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class MediaView(View):
     def get(self, request, path):
-        # Add CORS headers
-        response = HttpResponse()
-        response['Access-Control-Allow-Origin'] = '*'
-        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-        response['Access-Control-Allow-Headers'] = '*'
-        
-        # Serve the file
-        file_path = os.path.join(settings.MEDIA_ROOT, path)
-        
-        if not os.path.exists(file_path):
+        # Serve the file (streamed, with Range and conditional GET support)
+        try:
+            file_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
             raise Http404("File not found")
-        
-        # Get content type
-        content_type, _ = mimetypes.guess_type(file_path)
-        if content_type is None:
-            content_type = 'application/octet-stream'
-        
-        # Read and return file
-        with open(file_path, 'rb') as f:
-            response = HttpResponse(f.read(), content_type=content_type)
-            response['Access-Control-Allow-Origin'] = '*'
-            response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-            response['Access-Control-Allow-Headers'] = '*'
-            return response
-    
+
+        response = serve_file(request, file_path)
+        return add_cors_headers(response)
+
     def options(self, request, path):
         # Handle preflight requests
-        response = HttpResponse()
-        response['Access-Control-Allow-Origin'] = '*'
-        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-        response['Access-Control-Allow-Headers'] = '*'
-        return response
\ No newline at end of file
+        return add_cors_headers(HttpResponse())
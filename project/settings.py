@@ -264,6 +264,11 @@ STATICFILES_DIRS = (
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Let the front server send media/download files: '' (Django streams them),
+# 'x-accel-redirect' (nginx, internal location at MEDIA_ACCEL_REDIRECT_PREFIX) or 'x-sendfile'
+MEDIA_SERVE_OFFLOAD = config("MEDIA_SERVE_OFFLOAD", default="")
+MEDIA_ACCEL_REDIRECT_PREFIX = config("MEDIA_ACCEL_REDIRECT_PREFIX", default="/protected-media/")
+
 # Make Django respect the proxy headers
 USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -393,6 +398,13 @@ PAYPAL_CLIENT_SECRET = config('PAYPAL_CLIENT_SECRET', default='')
 PAYPAL_WEBHOOK_ID = config('PAYPAL_WEBHOOK_ID', default='')
 # Open API settings
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
+# Shared OpenAI clients (project/llm.py): pooled keep-alive connections and timeouts in seconds
+OPENAI_CONNECT_TIMEOUT = config("OPENAI_CONNECT_TIMEOUT", default=5.0, cast=float)
+OPENAI_READ_TIMEOUT = config("OPENAI_READ_TIMEOUT", default=60.0, cast=float)
+OPENAI_MAX_CONNECTIONS = config("OPENAI_MAX_CONNECTIONS", default=20, cast=int)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config("OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=10, cast=int)
+OPENAI_KEEPALIVE_EXPIRY = config("OPENAI_KEEPALIVE_EXPIRY", default=60.0, cast=float)
+OPENAI_MAX_RETRIES = config("OPENAI_MAX_RETRIES", default=2, cast=int)
 # Courtlisterner API settings
 COURTLISTENER_API_KEY = config("COURTLISTENER_API_KEY", default="")
 
@@ -448,6 +460,87 @@ SITE_ID = config("SITE_ID", default=2, cast=int)
 # ===========================================
 TEMP_PATH = os.path.join(BASE_DIR, 'temp_files')
 
+
+# ===========================================
+# BACKGROUND PDF JOBS
+# ===========================================
+# Worker pool started with `python manage.py run_pdf_worker`
+PDF_JOB_WORKERS = config("PDF_JOB_WORKERS", default=2, cast=int)
+PDF_JOB_POLL_INTERVAL = config("PDF_JOB_POLL_INTERVAL", default=1.0, cast=float)
+# Queue OCR/compress/convert requests even when the client does not send background=true
+PDF_JOBS_ASYNC_BY_DEFAULT = config("PDF_JOBS_ASYNC_BY_DEFAULT", default=False, cast=bool)
+
+
+# ===========================================
+# OCR
+# ===========================================
+# Processes used to OCR pages in parallel. Every OCR request starts its own pool, so keep this small
+# on web servers (0 = one per CPU core, for dedicated job workers)
+OCR_WORKERS = config("OCR_WORKERS", default=2, cast=int)
+# Default ocr_mode of /ocr_to_pdf/: 'full' OCRs every page, 'hybrid' skips pages that already have a text layer
+OCR_MODE = config("OCR_MODE", default="full")
+# 'tesserocr' keeps libtesseract loaded in each worker (pip install tesserocr; needs libtesseract),
+# 'pytesseract' starts the tesseract executable per call, 'auto' uses tesserocr when installed
+OCR_BACKEND = config("OCR_BACKEND", default="auto")
+# Image cleanup before recognition, comma separated: grayscale, binarize, deskew (empty for none)
+OCR_PREPROCESS = config("OCR_PREPROCESS", default="grayscale")
+# 'single' reads each page once; 'two_pass' does a fast pass and re-reads only low-confidence lines/pages
+OCR_STRATEGY = config("OCR_STRATEGY", default="single")
+# Per-page OCR results keyed by rendered page content, evicted least-recently-used
+OCR_CACHE_ENABLED = config("OCR_CACHE_ENABLED", default=True, cast=bool)
+OCR_CACHE_DIR = config("OCR_CACHE_DIR", default=os.path.join(BASE_DIR, 'cache', 'ocr'))
+OCR_CACHE_MAX_MB = config("OCR_CACHE_MAX_MB", default=512, cast=int)
+
+# ===========================================
+# TEXT STORE
+# ===========================================
+# Per-page PDF text shared by the summarizer, legal chat and PDF text endpoints (keyed by content hash)
+TEXT_STORE_ENABLED = config("TEXT_STORE_ENABLED", default=True, cast=bool)
+# Stored documents unused for this many days are deleted, then the least recently used beyond
+# TEXT_STORE_MAX_DOCUMENTS (0 disables either limit); see also `manage.py prune_text_store`
+TEXT_STORE_MAX_AGE_DAYS = config("TEXT_STORE_MAX_AGE_DAYS", default=30, cast=int)
+TEXT_STORE_MAX_DOCUMENTS = config("TEXT_STORE_MAX_DOCUMENTS", default=5000, cast=int)
+# Also store the text of PDFs uploaded to the legal AI chat (off: parsed in memory only)
+TEXT_STORE_CHAT_UPLOADS = config("TEXT_STORE_CHAT_UPLOADS", default=False, cast=bool)
+
+# ===========================================
+# DOCUMENT SUMMARIZER
+# ===========================================
+# Longest document text summarized (longer uploads are cut here)
+SUMMARY_MAX_DOCUMENT_CHARS = config("SUMMARY_MAX_DOCUMENT_CHARS", default=2000000, cast=int)
+# Documents up to this many (estimated) tokens are summarized in one call, longer ones map-reduce over chunks
+SUMMARY_SINGLE_CALL_TOKENS = config("SUMMARY_SINGLE_CALL_TOKENS", default=12000, cast=int)
+SUMMARY_CHUNK_TOKENS = config("SUMMARY_CHUNK_TOKENS", default=8000, cast=int)
+# Concurrent GPT calls per summary
+SUMMARY_MAX_PARALLEL = config("SUMMARY_MAX_PARALLEL", default=8, cast=int)
+# Finished summaries keyed by normalized document text, settings and model. Stored in the
+# CACHES entry named SUMMARY_CACHE_ALIAS when there is one, otherwise in an LRU directory
+# on local disk (per server). To share them between servers, define a shared cache, e.g.:
+# CACHES = {
+#     'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+#     'summaries': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': config("SUMMARY_CACHE_REDIS_URL", default="redis://127.0.0.1:6379/1"),
+#     },
+# }
+SUMMARY_CACHE_ENABLED = config("SUMMARY_CACHE_ENABLED", default=True, cast=bool)
+SUMMARY_CACHE_TTL = config("SUMMARY_CACHE_TTL", default=7 * 24 * 3600, cast=int)
+SUMMARY_CACHE_ALIAS = config("SUMMARY_CACHE_ALIAS", default="summaries")
+SUMMARY_CACHE_DIR = config("SUMMARY_CACHE_DIR", default=os.path.join(BASE_DIR, 'cache', 'summaries'))
+SUMMARY_CACHE_MAX_MB = config("SUMMARY_CACHE_MAX_MB", default=64, cast=int)
+# Threads saving streamed summaries (text files, PDFs) after the response text is sent
+SUMMARY_BACKGROUND_WORKERS = config("SUMMARY_BACKGROUND_WORKERS", default=2, cast=int)
+
+# ===========================================
+# PAGE RENDERING
+# ===========================================
+# Processes used to rasterize pages for PDF-to-image conversion (0 = one per CPU core)
+RENDER_WORKERS = config("RENDER_WORKERS", default=0, cast=int)
+# Page thumbnails: uploaded sources and rendered pages, each evicted least-recently-used
+PREVIEW_CACHE_DIR = config("PREVIEW_CACHE_DIR", default=os.path.join(BASE_DIR, 'cache', 'previews'))
+PREVIEW_SOURCE_MAX_MB = config("PREVIEW_SOURCE_MAX_MB", default=1024, cast=int)
+PREVIEW_CACHE_MAX_MB = config("PREVIEW_CACHE_MAX_MB", default=256, cast=int)
+
 # ===========================================
 # ENV-BASED OVERRIDES
 # ===========================================
@@ -0,0 +1,31 @@
+"""
+Server-sent events shared by the streaming endpoints (legal AI chat, document summarizer).
+
+Views write the events themselves into a StreamingHttpResponse with sse_event();
+EventStreamRenderer only lets DRF accept requests sent with Accept: text/event-stream.
+"""
+
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+def sse_event(data, event=None):
+    """One server-sent event with a JSON payload"""
+    lines = f"event: {event}\n" if event else ""
+    return f"{lines}data: {json.dumps(data)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets clients send Accept: text/event-stream; the events are written by the view.
+
+    Anything DRF renders itself through this renderer (validation errors,
+    authentication failures) is sent as a single error event.
+    """
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event(data, event="error").encode(self.charset)